@@ -12,9 +12,9 @@
 # along with this program. If not, see <http://www.gnu.org/licenses/>.
 
 import bpy
-from bpy.app.handlers import frame_change_pre, load_post, save_post
+from bpy.app.handlers import frame_change_pre, load_post, render_pre, save_post
 from bpy.props import PointerProperty, CollectionProperty
-from .handlers import update_entities
+from .handlers import update_entities, update_entities_full
 from . import entities, operators, props, session, ui
 from .utils import add_current_module_to_path
 from . import pref
@@ -59,6 +59,10 @@ def register():
     save_post.append(session._pickle)
     load_post.append(session._load)
     frame_change_pre.append(update_entities)
+    render_pre.append(update_entities_full)
+    # not available in all of the supported versions of Blender
+    if hasattr(bpy.app.handlers, "animation_playback_post"):
+        bpy.app.handlers.animation_playback_post.append(update_entities_full)
 
     bpy.types.Scene.MNSession = session.MNSession()  # type: ignore
     bpy.types.Object.uuid = props.uuid_property  # type: ignore
@@ -84,6 +88,9 @@ def unregister():
     save_post.remove(session._pickle)
     load_post.remove(session._load)
     frame_change_pre.remove(update_entities)
+    render_pre.remove(update_entities_full)
+    if hasattr(bpy.app.handlers, "animation_playback_post"):
+        bpy.app.handlers.animation_playback_post.remove(update_entities_full)
     del bpy.types.Scene.MNSession  # type: ignore
     del bpy.types.Scene.mn  # type: ignore
     del bpy.types.Object.mn  # type: ignore
@@ -218,6 +218,89 @@ def append(name: str, link: bool = False) -> bpy.types.GeometryNodeTree:
     return append_from_blend(name, filepath=GN_TREES_PATH, link=link)
 
 
+def _socket_string(
+    socket: bpy.types.NodeSocket, group_inputs: dict[str, str | None]
+) -> str | None:
+    "The string value of a socket, or None if it can't be known before evaluation"
+    if not socket.is_linked:
+        return socket.default_value
+    link = socket.links[0]
+    if link.from_node.bl_idname == "NodeGroupInput":
+        return group_inputs.get(link.from_socket.identifier)
+    if link.from_node.bl_idname == "FunctionNodeInputString":
+        return link.from_node.string
+    return None
+
+
+def _read_attributes(
+    tree: bpy.types.NodeTree,
+    names: set[str],
+    group_inputs: dict[str, str | None],
+    visited: set,
+) -> bool:
+    "Add the attributes read in the tree to names, returning False if any are unknown"
+    key = (tree.name, tuple(sorted(group_inputs.items())))
+    if key in visited:
+        return True
+    visited.add(key)
+
+    resolved = True
+    for node in tree.nodes:
+        if node.mute:
+            continue
+        if node.bl_idname == "GeometryNodeInputNamedAttribute":
+            name = _socket_string(node.inputs["Name"], group_inputs)
+            if name is None:
+                resolved = False
+            elif name:
+                names.add(name)
+        elif node.bl_idname == "ShaderNodeAttribute":
+            if node.attribute_type == "GEOMETRY" and node.attribute_name:
+                names.add(node.attribute_name)
+        elif node.bl_idname == "GeometryNodeGroup" and node.node_tree is not None:
+            inputs = {
+                socket.identifier: _socket_string(socket, group_inputs)
+                for socket in node.inputs
+                if socket.type == "STRING"
+            }
+            resolved &= _read_attributes(node.node_tree, names, inputs, visited)
+
+        # attributes read by the shaders of materials that are assigned in the tree
+        for socket in node.inputs:
+            if socket.type == "MATERIAL" and not socket.is_linked:
+                material = socket.default_value
+                if material is not None and material.node_tree is not None:
+                    resolved &= _read_attributes(material.node_tree, names, {}, visited)
+
+    return resolved
+
+
+def required_attributes(tree: bpy.types.NodeTree) -> set[str] | None:
+    """
+    Find the names of the attributes which are read when evaluating the node tree.
+
+    Named Attribute nodes are collected from the tree and recursively from the node
+    groups inside of it, including the shaders of any materials that are assigned.
+    Names which are passed into a node group are resolved from the inputs of the group
+    node.
+
+    Parameters
+    ----------
+    tree : bpy.types.NodeTree
+        The node tree to search.
+
+    Returns
+    -------
+    set[str] | None
+        The names of the attributes that are read, or None if the name of any attribute
+        can't be determined without evaluating the tree.
+    """
+    names: set[str] = set()
+    if not _read_attributes(tree, names, {}, set()):
+        return None
+    return names
+
+
 def MN_micrograph_material():
     """
     Append MN_micrograph_material to the .blend file it it doesn't already exist,
@@ -7,6 +7,7 @@ from .molecule import BCIF, CIF, PDB, SDF, Molecule
 from .molecule.pdb import PDB
 from .molecule.pdbx import BCIF, CIF
 from .molecule.sdf import SDF
+from .molecule.batch import load_many
 from .molecule.ui import fetch, load_local, parse
 from .trajectory import OXDNA, Trajectory
 from .trajectory.dna import MN_OT_Import_OxDNA_Trajectory
@@ -0,0 +1,256 @@
+"""
+Computing the attributes of an entity's object concurrently, then writing them in bulk.
+
+Each `Attribute` declares how its values are computed, the names of any other
+attributes it takes as inputs, and the type and domain it is stored with. An
+`AttributePipeline` computes the attributes which don't depend on each other in
+parallel on a pool of threads, as most of the work is numpy or lookups which release
+the GIL for long enough to overlap. All of the values are then written to the object
+one after another on the calling thread, as Blender data can only be modified from
+the main thread. Failures and the time taken by each attribute are collected into an
+`AttributeReport` rather than being printed as they happen.
+"""
+
+import os
+import time
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass, field, replace
+from typing import Callable, Dict, Iterable, List, Tuple
+
+import numpy as np
+from databpy import AttributeTypes, BlenderObject, Domains
+
+
+@dataclass
+class Attribute:
+    """
+    An attribute to compute and store on an object.
+
+    Parameters
+    ----------
+    name : str
+        Name of the attribute on the object.
+    func : Callable[..., np.ndarray]
+        Computes the values, called with the values of each of the `inputs`.
+    atype : str | AttributeTypes | None, optional
+        Type to store the attribute as, by default guessed from the values.
+    domain : str | Domains, optional
+        Domain to store the attribute on, by default "POINT".
+    inputs : tuple[str, ...], optional
+        Names of other attributes in the pipeline whose values `func` takes.
+    store : bool, optional
+        Whether to write the attribute to the object. Attributes which aren't stored
+        are still computed as inputs for others. By default True.
+    """
+
+    name: str
+    func: Callable[..., np.ndarray]
+    atype: str | AttributeTypes | None = None
+    domain: str | Domains = "POINT"
+    inputs: Tuple[str, ...] = ()
+    store: bool = True
+
+
+@dataclass
+class AttributeReport:
+    "The time taken by each attribute, and the errors of any that failed"
+
+    compute_time: Dict[str, float] = field(default_factory=dict)
+    write_time: Dict[str, float] = field(default_factory=dict)
+    errors: Dict[str, Exception] = field(default_factory=dict)
+
+    @property
+    def total_time(self) -> float:
+        return sum(self.compute_time.values()) + sum(self.write_time.values())
+
+    def summary(self) -> str:
+        "A table of the time taken by each attribute, slowest first, and any errors"
+        names = sorted(
+            set(self.compute_time) | set(self.errors),
+            key=lambda name: (
+                -(self.compute_time.get(name, 0) + self.write_time.get(name, 0))
+            ),
+        )
+        lines = [f"{'attribute':<20} {'compute (ms)':>12} {'write (ms)':>12}"]
+        for name in names:
+            if name in self.errors:
+                lines.append(f"{name:<20} failed: {self.errors[name]}")
+                continue
+            lines.append(
+                f"{name:<20} {self.compute_time.get(name, 0) * 1e3:>12.2f} "
+                f"{self.write_time.get(name, 0) * 1e3:>12.2f}"
+            )
+        return "\n".join(lines)
+
+
+def _compute(
+    att: Attribute, values: Dict[str, np.ndarray]
+) -> Tuple[np.ndarray | None, float, Exception | None]:
+    "Compute an attribute, returning its values, the time taken and any error"
+    start = time.perf_counter()
+    try:
+        result = att.func(*[values[name] for name in att.inputs])
+        return result, time.perf_counter() - start, None
+    except Exception as e:
+        return None, time.perf_counter() - start, e
+
+
+class AttributePipeline:
+    """
+    Computes a set of attributes concurrently and writes them to an object in bulk.
+
+    Parameters
+    ----------
+    attributes : Iterable[Attribute]
+        The attributes to compute. Inputs have to be the names of other attributes in
+        the pipeline.
+    workers : int | None, optional
+        Number of threads to compute the attributes on, by default one per CPU. With
+        1 the attributes are computed one after another.
+    """
+
+    def __init__(self, attributes: Iterable[Attribute], workers: int | None = None):
+        self.attributes: Dict[str, Attribute] = {att.name: att for att in attributes}
+        self.workers = workers or os.cpu_count() or 1
+        for att in self.attributes.values():
+            missing = [name for name in att.inputs if name not in self.attributes]
+            if missing:
+                raise ValueError(
+                    f"Attribute `{att.name}` takes inputs that aren't in the "
+                    f"pipeline: {missing}"
+                )
+
+    def select(self, names: Iterable[str]) -> "AttributePipeline":
+        """
+        A pipeline for only the named attributes and those they take as inputs.
+
+        Inputs which weren't named are computed but not stored, and names which aren't
+        in this pipeline are ignored.
+        """
+        selected = {name for name in names if name in self.attributes}
+        required: set = set()
+        stack = list(selected)
+        while stack:
+            name = stack.pop()
+            if name not in required:
+                required.add(name)
+                stack.extend(self.attributes[name].inputs)
+
+        return AttributePipeline(
+            [
+                att if name in selected else replace(att, store=False)
+                for name, att in self.attributes.items()
+                if name in required
+            ],
+            workers=self.workers,
+        )
+
+    def _stages(self) -> List[List[Attribute]]:
+        "Group the attributes so that each only depends on those in earlier stages"
+        stages = []
+        done: set = set()
+        remaining = list(self.attributes.values())
+        while remaining:
+            stage = [att for att in remaining if done.issuperset(att.inputs)]
+            if not stage:
+                names = [att.name for att in remaining]
+                raise ValueError(f"Attribute inputs form a cycle between: {names}")
+            stages.append(stage)
+            done.update(att.name for att in stage)
+            remaining = [att for att in remaining if att.name not in done]
+        return stages
+
+    def compute(
+        self, report: AttributeReport | None = None
+    ) -> Tuple[Dict[str, np.ndarray], AttributeReport]:
+        """
+        Compute the values of all of the attributes.
+
+        Returns
+        -------
+        Tuple[Dict[str, np.ndarray], AttributeReport]
+            The values of the attributes that were computed, and the report of the time
+            taken and errors for each attribute. Attributes whose inputs failed are
+            also failed.
+        """
+        report = report or AttributeReport()
+        values: Dict[str, np.ndarray] = {}
+        workers = max(1, min(self.workers, len(self.attributes)))
+        executor = None
+        if workers > 1:
+            executor = ThreadPoolExecutor(workers, thread_name_prefix="MNAttributes")
+
+        try:
+            for stage in self._stages():
+                runnable = []
+                for att in stage:
+                    failed = [name for name in att.inputs if name in report.errors]
+                    if failed:
+                        report.errors[att.name] = ValueError(
+                            f"Required inputs failed: {failed}"
+                        )
+                    else:
+                        runnable.append(att)
+
+                if executor is None:
+                    results = [_compute(att, values) for att in runnable]
+                else:
+                    futures = [
+                        executor.submit(_compute, att, values) for att in runnable
+                    ]
+                    results = [future.result() for future in futures]
+
+                for att, (result, elapsed, error) in zip(runnable, results):
+                    report.compute_time[att.name] = elapsed
+                    if error is None:
+                        values[att.name] = result
+                    else:
+                        report.errors[att.name] = error
+        finally:
+            if executor is not None:
+                executor.shutdown(wait=True)
+
+        return values, report
+
+    def write(
+        self,
+        bob: BlenderObject,
+        values: Dict[str, np.ndarray],
+        report: AttributeReport | None = None,
+    ) -> AttributeReport:
+        "Write the computed values to the object, in the order the attributes were given"
+        report = report or AttributeReport()
+        for name, att in self.attributes.items():
+            if not att.store or name not in values:
+                continue
+            start = time.perf_counter()
+            try:
+                bob.store_named_attribute(
+                    data=values[name], name=name, atype=att.atype, domain=att.domain
+                )
+                report.write_time[name] = time.perf_counter() - start
+            except Exception as e:
+                report.errors[name] = e
+        return report
+
+    def run(self, bob: BlenderObject, verbose: bool = False) -> AttributeReport:
+        """
+        Compute all of the attributes and write them to the object.
+
+        Parameters
+        ----------
+        bob : BlenderObject
+            The object to write the attributes to.
+        verbose : bool, optional
+            Print the time taken by each attribute and any errors, by default False.
+
+        Returns
+        -------
+        AttributeReport
+            The time taken by each attribute, and the errors of any that failed.
+        """
+        values, report = self.compute()
+        self.write(bob, values, report)
+        if verbose:
+            print(report.summary())
+        return report
@@ -1,9 +1,25 @@
 from abc import ABCMeta
+from typing import Iterable, Sequence
 import bpy
 from enum import Enum
 from databpy import (
     BlenderObject,
 )
+from ..blender import nodes
+from ..pref import addon_preferences
+from .attributes import Attribute, AttributePipeline, AttributeReport
+
+# attributes that are always written when creating objects with lazy attributes, as
+# they are read by the materials rather than the node tree
+LAZY_ALWAYS = ("Color",)
+
+
+def use_lazy_attributes(lazy_attributes: bool | None = None) -> bool:
+    "Whether to only write the attributes an object's node tree reads"
+    if lazy_attributes is not None:
+        return lazy_attributes
+    prefs = addon_preferences()
+    return prefs is not None and prefs.lazy_attributes
 
 
 # create a EntityType enum with strings for values, "md", "md-oxdna", "molecule", "star"
@@ -20,6 +36,9 @@ class MolecularEntity(
     BlenderObject,
     metaclass=ABCMeta,
 ):
+    # whether only the attributes read by the node tree are written to the object
+    _lazy_attributes: bool = False
+
     def __init__(self) -> None:
         super().__init__(obj=None)
         self._entity_type: EntityType
@@ -41,6 +60,61 @@ class MolecularEntity(
     def update_with_scene(self, value: bool) -> None:
         self.object.mn.update_with_scene = value
 
+    def _attribute_definitions(self) -> Sequence[Attribute]:
+        "The attributes which can be computed and written to the object on demand"
+        return ()
+
+    def required_attributes(self) -> set[str] | None:
+        """
+        The names of the attributes read by the object's node tree, or None if they
+        can't be determined without evaluating it.
+        """
+        try:
+            tree = self.node_group
+        except KeyError:
+            return set()
+        if tree is None:
+            return set()
+        return nodes.required_attributes(tree)
+
+    def materialize_attributes(
+        self, names: Iterable[str] | None = None
+    ) -> AttributeReport | None:
+        """
+        Compute and write any attributes which are needed but missing from the object.
+
+        Only entities created with lazy attributes have missing attributes, for all
+        others this does nothing.
+
+        Parameters
+        ----------
+        names : Iterable[str] | None, optional
+            The attributes that are needed. By default those read by the object's node
+            tree, or all of them if that can't be determined.
+
+        Returns
+        -------
+        AttributeReport | None
+            The report of the attributes that were written, or None if none were missing.
+        """
+        if not self._lazy_attributes:
+            return None
+        pipeline = AttributePipeline(self._attribute_definitions())
+        if names is None:
+            names = self.required_attributes()
+        if names is None:
+            names = pipeline.attributes.keys()
+        existing = set(self.list_attributes())
+        missing = [name for name in names if name not in existing]
+        selected = pipeline.select(missing)
+        if not selected.attributes:
+            return None
+
+        report = selected.run(self)
+        for name, e in report.errors.items():
+            print(f"Unable to add attribute `{name}`: {e}")
+        return report
+
     def _register_with_session(self) -> None:
         bpy.context.scene.MNSession.register_entity(self)
 
@@ -6,6 +6,7 @@ from biotite import InvalidFileError
 from biotite import structure as struc
 from biotite.structure.io import pdbx
 
+from ..molecule.bonds import connect_via_templates
 from ..molecule.pdbx import PDBX
 
 
@@ -91,9 +92,7 @@ class CellPackReader(PDBX):
         array = self.set_extra_annotations(array, self.file)
 
         if not array.bonds and bonds:
-            array.bonds = struc.bonds.connect_via_residue_names(
-                array, inter_residue=True
-            )
+            array.bonds = connect_via_templates(array, inter_residue=True)
         return array
 
     @property
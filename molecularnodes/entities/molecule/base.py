@@ -1,9 +1,8 @@
 import io
-import time
 import warnings
 from abc import ABCMeta
 from pathlib import Path
-from typing import Optional, Tuple, Union
+from typing import Callable, Optional, Tuple, Union
 import json
 
 import biotite.structure as struc
@@ -17,7 +16,23 @@ from ...blender.material import MaterialTreeInterface
 from ... import color, data, utils
 from databpy import Domains, AttributeTypes
 import databpy
-from ..base import MolecularEntity, EntityType
+from ..attributes import Attribute, AttributePipeline
+from ..base import LAZY_ALWAYS, MolecularEntity, EntityType, use_lazy_attributes
+from ...pref import addon_preferences
+from .cache import ParseCache
+from .parsing import cached_structure
+
+
+def parse_cache() -> ParseCache | None:
+    """
+    The parse cache with the size from the preferences, or None if it is turned off.
+
+    Without the addon's preferences, such as when used as a module, nothing is cached.
+    """
+    prefs = addon_preferences()
+    if prefs is None or not prefs.cache_parse:
+        return None
+    return ParseCache(max_size=prefs.cache_parse_size * 1024**2)
 
 
 class Molecule(MolecularEntity, metaclass=ABCMeta):
@@ -49,6 +64,9 @@ class Molecule(MolecularEntity, metaclass=ABCMeta):
         The chain IDs of the molecule.
     """
 
+    # the trajectory playing back the conformations, if they were loaded as one
+    trajectory = None
+
     def __init__(self, file_path: Union[str, Path, io.BytesIO]):
         """
         Initialize the Molecule object.
@@ -98,6 +116,73 @@ class Molecule(MolecularEntity, metaclass=ABCMeta):
 
         self._frames_collection = value.name
 
+    @classmethod
+    def _from_parsed(
+        cls,
+        file_path: Union[Path, str],
+        array: struc.AtomArray,
+        entity_ids: Optional[list] = None,
+        assemblies: Optional[dict] = None,
+    ) -> "Molecule":
+        """
+        Create the molecule from the results of parsing its file in another process.
+
+        Only the atoms, entity names and assemblies are sent back rather than the opened
+        file, so `file` is None on the created molecule.
+        """
+        mol = cls.__new__(cls)
+        MolecularEntity.__init__(mol)
+        mol.file_path = bl.path_resolve(file_path)
+        mol._entity_type = EntityType.MOLECULE
+        mol._set_parsed(array, entity_ids, assemblies)
+        return mol
+
+    def _set_parsed(
+        self,
+        array: struc.AtomArray,
+        entity_ids: Optional[list] = None,
+        assemblies: Optional[dict] = None,
+    ) -> None:
+        self.file = None
+        self.array = array
+        self._parsed_entity_ids = entity_ids
+        self._parsed_assemblies = assemblies
+
+    def _cached_structure(
+        self,
+        source: Union[str, Path, io.BytesIO],
+        parse: Callable[..., struc.AtomArray],
+        **kwargs,
+    ) -> struc.AtomArray:
+        """
+        Parse the structure, or load it from the parse cache if it was parsed before.
+
+        Besides the options, the key includes the extra annotations set by the parser
+        and the templates learned for connecting residues, so structures parsed with
+        different ones aren't reused. Streams other than `io.BytesIO` and `io.StringIO`
+        are always parsed.
+
+        Parameters
+        ----------
+        source : Union[str, Path, io.BytesIO]
+            The file that is being parsed, whose contents key the cache.
+        parse : Callable[..., struc.AtomArray]
+            Parses the structure from `self.file`, called with `kwargs`.
+        **kwargs
+            Options to parse with, which are part of the key.
+
+        Returns
+        -------
+        struc.AtomArray
+            The parsed structure.
+        """
+        if not isinstance(source, io.IOBase):
+            source = bl.path_resolve(source)
+        annotations = sorted(getattr(self, "_extra_annotations", {}))
+        return cached_structure(
+            parse_cache(), source, parse, type(self).__name__, annotations, **kwargs
+        )
+
     @classmethod
     def _read(self, file_path: Union[Path, io.BytesIO]):
         """
@@ -222,6 +307,8 @@ class Molecule(MolecularEntity, metaclass=ABCMeta):
         collection=None,
         verbose: bool = False,
         color: Optional[str] = "common",
+        lazy_attributes: bool | None = None,
+        as_trajectory: bool = False,
     ) -> bpy.types.Object:
         """
         Create a 3D model of the molecule inside of Blender.
@@ -232,7 +319,10 @@ class Molecule(MolecularEntity, metaclass=ABCMeta):
 
         If multiple conformations of the structure are detected, the collection attribute
         is also created which will store an object for each conformation, so that the
-        object can interpolate between those conformations.
+        object can interpolate between those conformations. Alternatively with
+        `as_trajectory` the conformations are kept in memory as the frames of a
+        `Trajectory`, which updates the positions of the one object as the scene frame
+        changes.
 
         Parameters
         ----------
@@ -259,6 +349,15 @@ class Molecule(MolecularEntity, metaclass=ABCMeta):
             Whether to print verbose output. Default is False.
         color : Optional[str], optional
             The color scheme to use for the model. Default is 'common'.
+        lazy_attributes : bool | None, optional
+            Whether to only write the attributes which are read by the node tree, with
+            the others added by `materialize_attributes()` when they are needed. Default
+            is None, which uses the add-on preferences. All attributes are written when
+            conformations are loaded as a trajectory.
+        as_trajectory : bool, optional
+            Whether to play back multiple conformations as a `Trajectory` instead of
+            creating an object for each of them. The trajectory is available as
+            `trajectory` and replaces the molecule in the session. Default is False.
 
         Returns
         -------
@@ -287,12 +386,16 @@ class Molecule(MolecularEntity, metaclass=ABCMeta):
             else:
                 array = array[mask]
 
+        as_trajectory = as_trajectory and is_stack and array.stack_depth() > 1
+        lazy_attributes = use_lazy_attributes(lazy_attributes) and not as_trajectory
         obj, frames = _create_object(
             array=array,
             name=name,
             centre=centre if centre and not build_assembly else "",
             collection=collection,
             verbose=verbose,
+            lazy_attributes=lazy_attributes,
+            create_frames=not as_trajectory,
         )
 
         if style and style != "":
@@ -318,8 +421,43 @@ class Molecule(MolecularEntity, metaclass=ABCMeta):
         # same with the collection of bpy Objects for frames
         self.frames = frames
 
+        # keep the atoms of the object to compute the missing attributes from later
+        self._lazy_attributes = lazy_attributes
+        if lazy_attributes:
+            self._object_array = array[0] if is_stack else array
+            self.materialize_attributes()
+
+        if as_trajectory:
+            self.trajectory = self._create_trajectory(array)
+
         return obj
 
+    def _create_trajectory(self, stack: struc.AtomArrayStack):
+        """
+        Create a trajectory with the conformations of the stack as its frames, which
+        takes over updating the molecule's object as the scene frame changes.
+        """
+        # the trajectory module imports the session, which imports this module
+        from ..trajectory.base import Trajectory
+        from ..trajectory.stack import universe_from_stack
+
+        trajectory = Trajectory(universe_from_stack(stack))
+        # the trajectory shares the uuid of the molecule and its object, and replaces
+        # the molecule in the session so that it is updated on frame changes
+        session = bpy.context.scene.MNSession
+        session.entities.pop(trajectory.uuid, None)
+        trajectory._uuid = self.uuid
+        trajectory.object = self.object
+        session.register_entity(trajectory)
+
+        trajectory.save_filepaths_on_object()
+        self.object.mn.entity_type = trajectory._entity_type.value
+        trajectory.set_frame(bpy.context.scene.frame_current)
+        return trajectory
+
+    def _attribute_definitions(self) -> Tuple[Attribute, ...]:
+        return _attributes(self._object_array)
+
     def assemblies(self, as_array=False):
         """
         Get the biological assemblies of the molecule.
@@ -335,10 +473,14 @@ class Molecule(MolecularEntity, metaclass=ABCMeta):
             The biological assemblies of the molecule, as a dictionary of
             transformation matrices, or None if no assemblies are available.
         """
-        try:
-            assemblies_info = self._assemblies()
-        except InvalidFileError:
-            return None
+        if self.file is None:
+            # parsed in another process, which sent back the assemblies
+            assemblies_info = self._parsed_assemblies
+        else:
+            try:
+                assemblies_info = self._assemblies()
+            except InvalidFileError:
+                return None
 
         if isinstance(assemblies_info, dict) and as_array:
             return utils.array_quaternions_from_dict(assemblies_info)
@@ -357,80 +499,78 @@ class Molecule(MolecularEntity, metaclass=ABCMeta):
         return f"<Molecule object: {self.name}>"
 
 
-def _create_object(
-    array,
-    name=None,
-    centre="",
-    collection=None,
-    world_scale=0.01,
-    color_plddt: bool = False,
-    verbose=False,
-) -> Tuple[bpy.types.Object, bpy.types.Collection]:
-    import biotite.structure as struc
-
-    frames = None
-    is_stack = isinstance(array, struc.AtomArrayStack)
-
-    try:
-        mass = np.array(
-            [
-                data.elements.get(x, {}).get("standard_mass", 0.0)
-                for x in np.char.title(array.element)
-            ]
-        )
-        array.set_annotation("mass", mass)
-    except AttributeError as e:
-        print(e)
-
-    def centre_array(atom_array, centre):
-        if centre == "centroid":
-            atom_array.coord -= databpy.centre(atom_array.coord)
-        elif centre == "mass":
-            atom_array.coord -= databpy.centre(atom_array.coord, weight=atom_array.mass)
-
-    if centre in ["mass", "centroid"]:
-        if is_stack:
-            for atom_array in array:
-                centre_array(atom_array, centre)
-        else:
-            centre_array(atom_array, centre)
-
-    if is_stack:
-        if array.stack_depth() > 1:
-            frames = array
-        array = array[0]
+def _res_name_nums(
+    res_name: np.ndarray, res_id: np.ndarray
+) -> tuple[np.ndarray, np.ndarray]:
+    """
+    Encode residue names as the integer values of the `res_name` attribute.
 
-    if not collection:
-        collection = bl.coll.mn()
+    Residues in `data.residues` take their `res_name_num`, and unknown residues are -1.
+    Residues marked as ligands (a `res_name_num` of 9999) are instead numbered from 100
+    in the order they appear in the structure, where a new ligand starts whenever the
+    name or the residue ID differs from that of the previous atom.
 
-    bonds_array = []
-    bond_idx = []
+    Parameters
+    ----------
+    res_name : np.ndarray
+        The residue name of each atom.
+    res_id : np.ndarray
+        The residue ID of each atom.
+
+    Returns
+    -------
+    tuple[np.ndarray, np.ndarray]
+        The encoded value for each atom, and the name of each ligand as
+        "<value>_<res_name>" in the order of their values.
+    """
+    res_nums = utils.lookup(
+        lambda x: data.residues.get(x, {"res_name_num": -1}).get("res_name_num"),
+        res_name,
+        dtype=int,
+    )
+    is_ligand = res_nums == 9999
+    if not is_ligand.any():
+        return res_nums, np.array([])
+
+    is_start = np.ones(len(res_name), dtype=bool)
+    is_start[1:] = (res_name[1:] != res_name[:-1]) | (res_id[1:] != res_id[:-1])
+    is_start &= is_ligand
+    ligand_nums = np.cumsum(is_start) + 99
+    res_nums[is_ligand] = ligand_nums[is_ligand]
+
+    ligand_names = np.char.add(
+        np.char.add(ligand_nums[is_start].astype(str), "_"),
+        res_name[is_start].astype(str),
+    )
+    return res_nums, ligand_names
 
-    if array.bonds:
-        bonds_array = array.bonds.as_array()
-        bond_idx = bonds_array[:, [0, 1]]
-        # the .copy(order = 'C') is to fix a weird ordering issue with the resulting array
-        bond_types = bonds_array[:, 2].copy(order="C")
 
-    # creating the blender object and meshes and everything
-    bob = databpy.create_bob(
-        name=name,
-        collection=collection,
-        vertices=array.coord * world_scale,
-        edges=bond_idx,
-    )
+def _attributes(
+    array, world_scale: float = 0.01, color_plddt: bool = False, ligands=None
+) -> Tuple[Attribute, ...]:
+    """
+    Define the attributes of the object created for the atom array.
 
-    # Add information about the bond types to the model on the edge domain
-    # Bond types: 'ANY' = 0, 'SINGLE' = 1, 'DOUBLE' = 2, 'TRIPLE' = 3, 'QUADRUPLE' = 4
-    # 'AROMATIC_SINGLE' = 5, 'AROMATIC_DOUBLE' = 6, 'AROMATIC_TRIPLE' = 7
-    # https://www.biotite-python.org/apidoc/biotite.structure.BondType.html#biotite.structure.BondType
-    if array.bonds:
-        bob.store_named_attribute(
-            data=bond_types,
-            name="bond_type",
-            atype=AttributeTypes.INT,
-            domain=Domains.EDGE,
-        )
+    Parameters
+    ----------
+    array : AtomArray
+        The atoms of the object.
+    world_scale : float, optional
+        Scale of the object's coordinates, by default 0.01.
+    color_plddt : bool, optional
+        Whether to color the atoms by their pLDDT (stored as the b-factor), by
+        default False.
+    ligands : dict, optional
+        Given the names of the ligands under "names" once the `res_name` attribute is
+        computed, as Blender data can't be modified off the main thread.
+
+    Returns
+    -------
+    Tuple[Attribute, ...]
+        The attributes, to be computed and written by an `AttributePipeline`.
+    """
+    if ligands is None:
+        ligands = {}
 
     # The attributes for the model are initially defined as single-use functions. This allows
     # for a loop that attempts to add each attibute by calling the function. Only during this
@@ -442,13 +582,13 @@ def _create_object(
     # anybody might have.
 
     def att_atomic_number():
-        atomic_number = np.array(
-            [
-                data.elements.get(x, {"atomic_number": -1}).get("atomic_number")
-                for x in np.char.title(array.element)
-            ]
+        return utils.lookup(
+            lambda x: data.elements.get(x.title(), {"atomic_number": -1}).get(
+                "atomic_number"
+            ),
+            array.element,
+            dtype=int,
         )
-        return atomic_number
 
     def att_atom_id():
         return array.atom_id
@@ -460,36 +600,8 @@ def _create_object(
         return array.res_id
 
     def att_res_name():
-        other_res = []
-        counter = 0
-        id_counter = -1
-        res_names = array.res_name
-        res_ids = array.res_id
-        res_nums = []
-
-        for name in res_names:
-            res_num = data.residues.get(name, {"res_name_num": -1}).get("res_name_num")
-
-            if res_num == 9999:
-                if (
-                    res_names[counter - 1] != name
-                    or res_ids[counter] != res_ids[counter - 1]
-                ):
-                    id_counter += 1
-
-                unique_res_name = str(id_counter + 100) + "_" + str(name)
-                other_res.append(unique_res_name)
-
-                num = (
-                    np.where(np.isin(np.unique(other_res), unique_res_name))[0][0] + 100
-                )
-                res_nums.append(num)
-            else:
-                res_nums.append(res_num)
-            counter += 1
-
-        bob.object["ligands"] = np.unique(other_res)
-        return np.array(res_nums)
+        res_nums, ligands["names"] = _res_name_nums(array.res_name, array.res_id)
+        return res_nums
 
     def att_chain_id():
         if isinstance(array.chain_id[0], int):
@@ -507,15 +619,12 @@ def _create_object(
         return array.occupancy
 
     def att_vdw_radii():
-        vdw_radii = np.array(
-            list(
-                map(
-                    # divide by 100 to convert from picometres to angstroms which is
-                    # what all of coordinates are in
-                    lambda x: data.elements.get(x, {}).get("vdw_radii", 100.0) / 100,
-                    np.char.title(array.element),
-                )
-            )
+        vdw_radii = utils.lookup(
+            # divide by 100 to convert from picometres to angstroms which is
+            # what all of coordinates are in
+            lambda x: data.elements.get(x.title(), {}).get("vdw_radii", 100.0) / 100,
+            array.element,
+            dtype=float,
         )
         return vdw_radii * world_scale
 
@@ -523,42 +632,32 @@ def _create_object(
         return array.mass
 
     def att_atom_name():
-        atom_name = np.array(
-            list(map(lambda x: data.atom_names.get(x, -1), array.atom_name))
+        return utils.lookup(
+            lambda x: data.atom_names.get(x, -1), array.atom_name, dtype=int
         )
 
-        return atom_name
-
+    # looked up once for each unique (res_name, atom_name) pair
     def att_lipophobicity():
-        lipo = np.array(
-            list(
-                map(
-                    lambda x, y: data.lipophobicity.get(x, {"0": 0}).get(y, 0),
-                    array.res_name,
-                    array.atom_name,
-                )
-            )
+        return utils.lookup(
+            lambda x, y: data.lipophobicity.get(x, {"0": 0}).get(y, 0),
+            array.res_name,
+            array.atom_name,
+            dtype=float,
         )
 
-        return lipo
-
     def att_charge():
-        charge = np.array(
-            list(
-                map(
-                    lambda x, y: data.atom_charge.get(x, {"0": 0}).get(y, 0),
-                    array.res_name,
-                    array.atom_name,
-                )
-            )
+        return utils.lookup(
+            lambda x, y: data.atom_charge.get(x, {"0": 0}).get(y, 0),
+            array.res_name,
+            array.atom_name,
+            dtype=float,
         )
-        return charge
 
-    def att_color():
+    def att_color(atomic_number=None, chain_id=None):
         if color_plddt:
             return color.plddt(array.b_factor)
         else:
-            return color.color_chains(att_atomic_number(), att_chain_id())
+            return color.color_chains(atomic_number, chain_id)
 
     def att_is_alpha():
         return np.isin(array.atom_name, "CA")
@@ -611,12 +710,10 @@ def _create_object(
 
         return aa | con_aa
 
-    def att_is_side_chain() -> npt.NDArray[np.bool_]:
-        not_backbone = np.logical_not(att_is_backbone())
+    def att_is_side_chain(is_backbone, is_nucleic, is_peptide) -> npt.NDArray[np.bool_]:
+        not_backbone = np.logical_not(is_backbone)
 
-        return np.logical_and(
-            not_backbone, np.logical_or(att_is_nucleic(), att_is_peptide())
-        )
+        return np.logical_and(not_backbone, np.logical_or(is_nucleic, is_peptide))
 
     def att_is_hetero():
         return array.hetero
@@ -627,121 +724,138 @@ def _create_object(
     def att_sec_struct():
         return array.sec_struct
 
-    # these are all of the attributes that will be added to the structure
-    # TODO add capcity for selection of particular attributes to include / not include to potentially
-    # boost performance, unsure if actually a good idea of not. Need to do some testing.
-    attributes = (
-        {"name": "res_id", "value": att_res_id, "type": "INT", "domain": "POINT"},
-        {"name": "res_name", "value": att_res_name, "type": "INT", "domain": "POINT"},
-        {
-            "name": "atomic_number",
-            "value": att_atomic_number,
-            "type": "INT",
-            "domain": "POINT",
-        },
-        {"name": "b_factor", "value": att_b_factor, "type": "FLOAT", "domain": "POINT"},
-        {
-            "name": "occupancy",
-            "value": att_occupancy,
-            "type": "FLOAT",
-            "domain": "POINT",
-        },
-        {
-            "name": "vdw_radii",
-            "value": att_vdw_radii,
-            "type": "FLOAT",
-            "domain": "POINT",
-        },
-        {"name": "mass", "value": att_mass, "type": "FLOAT", "domain": "POINT"},
-        {"name": "chain_id", "value": att_chain_id, "type": "INT", "domain": "POINT"},
-        {
-            "name": "pdb_model_num",
-            "value": att_pdb_model_num,
-            "type": "INT",
-            "domain": "POINT",
-        },
-        {"name": "entity_id", "value": att_entity_id, "type": "INT", "domain": "POINT"},
-        {"name": "atom_id", "value": att_atom_id, "type": "INT", "domain": "POINT"},
-        {"name": "atom_name", "value": att_atom_name, "type": "INT", "domain": "POINT"},
-        {
-            "name": "lipophobicity",
-            "value": att_lipophobicity,
-            "type": "FLOAT",
-            "domain": "POINT",
-        },
-        {"name": "charge", "value": att_charge, "type": "FLOAT", "domain": "POINT"},
-        {"name": "Color", "value": att_color, "type": "FLOAT_COLOR", "domain": "POINT"},
-        {
-            "name": "is_backbone",
-            "value": att_is_backbone,
-            "type": "BOOLEAN",
-            "domain": "POINT",
-        },
-        {
-            "name": "is_side_chain",
-            "value": att_is_side_chain,
-            "type": "BOOLEAN",
-            "domain": "POINT",
-        },
-        {
-            "name": "is_alpha_carbon",
-            "value": att_is_alpha,
-            "type": "BOOLEAN",
-            "domain": "POINT",
-        },
-        {
-            "name": "is_solvent",
-            "value": att_is_solvent,
-            "type": "BOOLEAN",
-            "domain": "POINT",
-        },
-        {
-            "name": "is_nucleic",
-            "value": att_is_nucleic,
-            "type": "BOOLEAN",
-            "domain": "POINT",
-        },
-        {
-            "name": "is_peptide",
-            "value": att_is_peptide,
-            "type": "BOOLEAN",
-            "domain": "POINT",
-        },
-        {
-            "name": "is_hetero",
-            "value": att_is_hetero,
-            "type": "BOOLEAN",
-            "domain": "POINT",
-        },
-        {"name": "is_carb", "value": att_is_carb, "type": "BOOLEAN", "domain": "POINT"},
-        {
-            "name": "sec_struct",
-            "value": att_sec_struct,
-            "type": "INT",
-            "domain": "POINT",
-        },
+    # these are all of the attributes that can be added to the structure
+    return (
+        Attribute("res_id", att_res_id, "INT"),
+        Attribute("res_name", att_res_name, "INT"),
+        Attribute("atomic_number", att_atomic_number, "INT"),
+        Attribute("b_factor", att_b_factor, "FLOAT"),
+        Attribute("occupancy", att_occupancy, "FLOAT"),
+        Attribute("vdw_radii", att_vdw_radii, "FLOAT"),
+        Attribute("mass", att_mass, "FLOAT"),
+        Attribute("chain_id", att_chain_id, "INT"),
+        Attribute("pdb_model_num", att_pdb_model_num, "INT"),
+        Attribute("entity_id", att_entity_id, "INT"),
+        Attribute("atom_id", att_atom_id, "INT"),
+        Attribute("atom_name", att_atom_name, "INT"),
+        Attribute("lipophobicity", att_lipophobicity, "FLOAT"),
+        Attribute("charge", att_charge, "FLOAT"),
+        Attribute(
+            "Color",
+            att_color,
+            "FLOAT_COLOR",
+            inputs=() if color_plddt else ("atomic_number", "chain_id"),
+        ),
+        Attribute("is_backbone", att_is_backbone, "BOOLEAN"),
+        Attribute(
+            "is_side_chain",
+            att_is_side_chain,
+            "BOOLEAN",
+            inputs=("is_backbone", "is_nucleic", "is_peptide"),
+        ),
+        Attribute("is_alpha_carbon", att_is_alpha, "BOOLEAN"),
+        Attribute("is_solvent", att_is_solvent, "BOOLEAN"),
+        Attribute("is_nucleic", att_is_nucleic, "BOOLEAN"),
+        Attribute("is_peptide", att_is_peptide, "BOOLEAN"),
+        Attribute("is_hetero", att_is_hetero, "BOOLEAN"),
+        Attribute("is_carb", att_is_carb, "BOOLEAN"),
+        Attribute("sec_struct", att_sec_struct, "INT"),
     )
 
-    # assign the attributes to the object
-    for att in attributes:
-        if verbose:
-            start = time.process_time()
-        try:
-            bob.store_named_attribute(
-                data=att["value"](),
-                name=att["name"],
-                atype=att["type"],
-                domain=att["domain"],
-            )
-            if verbose:
-                print(f'Added {att["name"]} after {time.process_time() - start} s')
-        except Exception as e:
-            if verbose:
-                print(e)
-                warnings.warn(f"Unable to add attribute: {att['name']}")
-                print(
-                    f'Failed adding {att["name"]} after {time.process_time() - start} s'
-                )
+
+def _create_object(
+    array,
+    name=None,
+    centre="",
+    collection=None,
+    world_scale=0.01,
+    color_plddt: bool = False,
+    verbose=False,
+    lazy_attributes: bool = False,
+    create_frames: bool = True,
+) -> Tuple[bpy.types.Object, bpy.types.Collection]:
+    import biotite.structure as struc
+
+    frames = None
+    is_stack = isinstance(array, struc.AtomArrayStack)
+
+    try:
+        mass = utils.lookup(
+            lambda x: data.elements.get(x.title(), {}).get("standard_mass", 0.0),
+            array.element,
+            dtype=float,
+        )
+        array.set_annotation("mass", mass)
+    except AttributeError as e:
+        print(e)
+
+    def centre_array(atom_array, centre):
+        if centre == "centroid":
+            atom_array.coord -= databpy.centre(atom_array.coord)
+        elif centre == "mass":
+            atom_array.coord -= databpy.centre(atom_array.coord, weight=atom_array.mass)
+
+    if centre in ["mass", "centroid"]:
+        if is_stack:
+            for atom_array in array:
+                centre_array(atom_array, centre)
+        else:
+            centre_array(atom_array, centre)
+
+    if is_stack:
+        if array.stack_depth() > 1 and create_frames:
+            frames = array
+        array = array[0]
+
+    if not collection:
+        collection = bl.coll.mn()
+
+    bonds_array = []
+    bond_idx = []
+
+    if array.bonds:
+        bonds_array = array.bonds.as_array()
+        bond_idx = bonds_array[:, [0, 1]]
+        # the .copy(order = 'C') is to fix a weird ordering issue with the resulting array
+        bond_types = bonds_array[:, 2].copy(order="C")
+
+    # creating the blender object and meshes and everything
+    bob = databpy.create_bob(
+        name=name,
+        collection=collection,
+        vertices=array.coord * world_scale,
+        edges=bond_idx,
+    )
+
+    # Add information about the bond types to the model on the edge domain
+    # Bond types: 'ANY' = 0, 'SINGLE' = 1, 'DOUBLE' = 2, 'TRIPLE' = 3, 'QUADRUPLE' = 4
+    # 'AROMATIC_SINGLE' = 5, 'AROMATIC_DOUBLE' = 6, 'AROMATIC_TRIPLE' = 7
+    # https://www.biotite-python.org/apidoc/biotite.structure.BondType.html#biotite.structure.BondType
+    if array.bonds:
+        bob.store_named_attribute(
+            data=bond_types,
+            name="bond_type",
+            atype=AttributeTypes.INT,
+            domain=Domains.EDGE,
+        )
+
+    # names of the ligands in the order of their res_name values, stored on the object
+    # after the attributes are computed
+    ligands: dict = {}
+    pipeline = AttributePipeline(_attributes(array, world_scale, color_plddt, ligands))
+    # with lazy attributes, the others are added once the node tree is known
+    if lazy_attributes:
+        pipeline = pipeline.select(LAZY_ALWAYS)
+        ligands["names"] = _res_name_nums(array.res_name, array.res_id)[1]
+
+    # compute the attributes in parallel, then assign them all to the object
+    report = pipeline.run(bob)
+    if verbose:
+        print(report.summary())
+        for name in report.errors:
+            warnings.warn(f"Unable to add attribute: {name}")
+    if "names" in ligands:
+        bob.object["ligands"] = ligands["names"]
 
     coll_frames = None
     if frames:
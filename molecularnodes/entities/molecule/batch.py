@@ -0,0 +1,200 @@
+"""
+Loading many structure files at once, parsing them in parallel.
+
+Reading a file and building its atoms and bonds is pure Python and numpy, so each file
+is parsed in a separate process with only the picklable results (its `AtomArray`,
+entity names and assemblies) sent back. The objects are then created one after another
+on the calling thread as each file finishes parsing, as Blender data can only be
+modified from the main thread. A file which fails to parse or create is recorded in the
+`BatchReport` rather than stopping the rest of the batch.
+"""
+
+import multiprocessing
+import os
+import time
+from concurrent.futures import (
+    Executor,
+    Future,
+    ProcessPoolExecutor,
+    ThreadPoolExecutor,
+    as_completed,
+)
+from concurrent.futures.process import BrokenProcessPool
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Dict, Iterable, List
+
+from ...blender import path_resolve
+from .base import Molecule, parse_cache
+from .bonds import add_templates, learned_templates
+from .parsing import ParsedFile, parse_file, worker_initargs
+from .ui import PARSERS, parser_for_suffix
+
+
+@dataclass
+class LoadResult:
+    "The molecule created from a file, or the error from trying to load it"
+
+    path: Path
+    molecule: Molecule | None = None
+    parse_time: float = 0.0
+    create_time: float = 0.0
+    error: Exception | None = None
+
+    @property
+    def ok(self) -> bool:
+        return self.error is None
+
+
+@dataclass
+class BatchReport:
+    "The result of loading each file, in the order the paths were given"
+
+    results: List[LoadResult] = field(default_factory=list)
+    total_time: float = 0.0
+
+    @property
+    def molecules(self) -> List[Molecule]:
+        return [result.molecule for result in self.results if result.ok]
+
+    @property
+    def errors(self) -> Dict[Path, Exception]:
+        return {result.path: result.error for result in self.results if not result.ok}
+
+    def summary(self) -> str:
+        "A table of the time taken to parse and create each file, and any errors"
+        lines = [f"{'file':<30} {'parse (ms)':>12} {'create (ms)':>12}"]
+        for result in self.results:
+            name = result.path.name
+            if not result.ok:
+                lines.append(f"{name:<30} failed: {result.error}")
+                continue
+            lines.append(
+                f"{name:<30} {result.parse_time * 1e3:>12.2f} "
+                f"{result.create_time * 1e3:>12.2f}"
+            )
+        lines.append(
+            f"Loaded {len(self.molecules)}/{len(self.results)} files in "
+            f"{self.total_time:.2f} s"
+        )
+        return "\n".join(lines)
+
+
+def _executor(workers: int) -> Executor:
+    """
+    The pool to parse the files on.
+
+    The workers are spawned rather than forked, as forking a process with running
+    threads is unsafe. Each worker only imports the parsing module without the rest of
+    the addon, as from inside Blender `bpy` can only be imported by the main process.
+    If the processes can't be started the files are parsed on threads instead.
+    """
+    try:
+        return ProcessPoolExecutor(
+            workers,
+            mp_context=multiprocessing.get_context("spawn"),
+            initializer=exec,
+            initargs=worker_initargs(learned_templates()),
+        )
+    except Exception as e:
+        print(f"Unable to parse in other processes, parsing on threads instead: {e}")
+        return ThreadPoolExecutor(workers, thread_name_prefix="MNLoadMany")
+
+
+def load_many(
+    paths: Iterable[str | Path],
+    workers: int | None = None,
+    verbose: bool = False,
+    **kwargs,
+) -> BatchReport:
+    """
+    Load many structure files, parsing them in parallel.
+
+    The files are parsed on a pool of worker processes, and an object is created for
+    each on the calling thread as soon as it has been parsed. Files which fail to
+    parse or create are recorded in the report and don't stop the rest of the batch.
+
+    Parameters
+    ----------
+    paths : Iterable[str | Path]
+        The structure files to load, with any of the suffixes supported by
+        `load_local()`.
+    workers : int | None, optional
+        Number of processes to parse the files on, by default one per CPU. With 1 the
+        files are parsed one after another on the calling thread.
+    verbose : bool, optional
+        Print the time taken by each file and any errors, by default False.
+    **kwargs
+        Passed on to `Molecule.create_object()` for each file, such as `style`,
+        `centre` or `del_solvent`. The name of each object is the stem of its file.
+
+    Returns
+    -------
+    BatchReport
+        The molecule or error of each file, in the order of `paths`, with the time
+        taken to parse and create each.
+    """
+    start = time.perf_counter()
+    results = [LoadResult(path_resolve(path)) for path in paths]
+    report = BatchReport(results)
+    workers = max(1, min(workers or os.cpu_count() or 1, len(results)))
+    cache = parse_cache()
+    # the class of each suffix is part of the key of the parsed structure in the cache
+    names = {suffix: parser.__name__ for suffix, parser in PARSERS.items()}
+
+    def parse_args(result: LoadResult) -> tuple:
+        return str(result.path), names.get(result.path.suffix), cache
+
+    def create(result: LoadResult, parsed: ParsedFile) -> None:
+        result.parse_time = parsed.parse_time
+        create_start = time.perf_counter()
+        try:
+            add_templates(parsed.learned)
+            mol = parser_for_suffix(parsed.suffix)._from_parsed(
+                result.path, parsed.array, parsed.entity_ids, parsed.assemblies
+            )
+            result.molecule = mol
+            mol.create_object(name=result.path.stem, **kwargs)
+        except Exception as e:
+            result.error = e
+        result.create_time = time.perf_counter() - create_start
+
+    def load(result: LoadResult) -> None:
+        try:
+            parsed = parse_file(*parse_args(result))
+        except Exception as e:
+            result.error = e
+            return
+        create(result, parsed)
+
+    pending = list(results)
+    if workers > 1:
+        executor = _executor(workers)
+        try:
+            futures: Dict[Future, LoadResult] = {
+                executor.submit(parse_file, *parse_args(result)): result
+                for result in results
+            }
+            for future in as_completed(futures):
+                result = futures[future]
+                try:
+                    parsed = future.result()
+                except BrokenProcessPool:
+                    # the pool can't be used, so the files which remain are parsed
+                    # on this thread below
+                    break
+                except Exception as e:
+                    result.error = e
+                else:
+                    create(result, parsed)
+                pending.remove(result)
+        finally:
+            executor.shutdown(wait=True, cancel_futures=True)
+
+    for result in pending:
+        load(result)
+
+    report.total_time = time.perf_counter() - start
+    if verbose:
+        print(report.summary())
+    return report
@@ -0,0 +1,330 @@
+"""
+Bond perception from residue templates, vectorized over all residues of each type.
+
+A drop-in for biotite's `connect_via_residue_names()`, creating the same bonds in the
+same order. The intra-residue bonds of each residue name are looked up once from the
+Chemical Component Dictionary and cached as arrays of atom names, then applied to
+every residue with that name at once by indexing a (residue, atom name) table of atom
+indices. Residues which aren't in the dictionary can have templates learned from
+structures which come with their bonds, so ligands seen before in another file are
+also connected.
+
+Peptide and phosphodiester links between consecutive residues are found for all of
+the residues at once, only linking connector atoms which are close enough to be
+bonded. Structures with many atoms are split between chains and processed on a pool
+of threads.
+"""
+
+import hashlib
+import os
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, List, Tuple
+
+import biotite.structure as struc
+import numpy as np
+from biotite.structure.info import bonds_in_residue, link_type
+
+# (atom names, atom names, bond types) of the intra-residue bonds for each residue
+_TEMPLATES: Dict[str, Tuple[np.ndarray, np.ndarray, np.ndarray]] = {}
+# templates learned from structures with bonds, for residues not in the dictionary
+_LEARNED: Dict[str, Tuple[np.ndarray, np.ndarray, np.ndarray]] = {}
+_LINKS: Dict[str, int] = {}
+
+_PEPTIDE_LINKS = ("PEPTIDE LINKING", "L-PEPTIDE LINKING", "D-PEPTIDE LINKING")
+_NUCLEIC_LINKS = ("RNA LINKING", "DNA LINKING")
+# connecting atoms (current residue, next residue) for peptide and nucleic links
+_CONNECTORS = {1: ("C", "N"), 2: ("O3'", "P")}
+
+# the longest peptide or phosphodiester bond in Angstrom, beyond which consecutive
+# residues are treated as a break in the chain
+MAX_LINK_DISTANCE = 2.5
+# the number of atoms above which chains are processed in parallel
+PARALLEL_ATOMS = 100_000
+
+
+def _template(res_name: str) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+    "The cached intra-residue bonds for the residue name"
+    try:
+        return _TEMPLATES[res_name]
+    except KeyError:
+        pass
+    bonds = bonds_in_residue(res_name)
+    if bonds:
+        names = np.array(list(bonds.keys()))
+        template = (names[:, 0], names[:, 1], np.fromiter(bonds.values(), int))
+    else:
+        empty = np.array([], dtype=str)
+        template = _LEARNED.get(res_name, (empty, empty, np.array([], int)))
+    _TEMPLATES[res_name] = template
+    return template
+
+
+def _link(res_name: str) -> int:
+    "0 if the residue isn't linked, 1 for peptide links and 2 for nucleic links"
+    try:
+        return _LINKS[res_name]
+    except KeyError:
+        pass
+    link = link_type(res_name)
+    _LINKS[res_name] = (
+        1 if link in _PEPTIDE_LINKS else 2 if link in _NUCLEIC_LINKS else 0
+    )
+    return _LINKS[res_name]
+
+
+def learn_templates(array: struc.AtomArray | struc.AtomArrayStack) -> None:
+    """
+    Store the bonds of residues which aren't in the Chemical Component Dictionary.
+
+    The intra-residue bonds of the first residue with each unknown name are used as its
+    template, so the same residue is connected in structures without bonds.
+    """
+    if array.bonds is None:
+        return
+    starts = struc.get_residue_starts(array, add_exclusive_stop=True)
+    bonds = array.bonds.as_array()
+    for start, stop in zip(starts[:-1], starts[1:]):
+        res_name = array.res_name[start]
+        if res_name in _LEARNED or len(_template(res_name)[2]) > 0:
+            continue
+        in_res = np.all((bonds[:, :2] >= start) & (bonds[:, :2] < stop), axis=1)
+        res_bonds = bonds[in_res]
+        _LEARNED[res_name] = (
+            array.atom_name[res_bonds[:, 0]],
+            array.atom_name[res_bonds[:, 1]],
+            res_bonds[:, 2].astype(int),
+        )
+        _TEMPLATES.pop(res_name, None)
+
+
+def learned_templates() -> Dict[str, Tuple[np.ndarray, np.ndarray, np.ndarray]]:
+    "The templates learned so far, to pass on to other processes"
+    return dict(_LEARNED)
+
+
+def add_templates(
+    templates: Dict[str, Tuple[np.ndarray, np.ndarray, np.ndarray]],
+) -> None:
+    "Add templates learned in another process, keeping any already learned here"
+    for res_name, template in templates.items():
+        if res_name in _LEARNED or len(_template(res_name)[2]) > 0:
+            continue
+        _LEARNED[res_name] = template
+        _TEMPLATES.pop(res_name, None)
+
+
+def learned_templates_key() -> str:
+    "A hash of the learned templates, which change the bonds of structures without them"
+    digest = hashlib.sha1()
+    for res_name in sorted(_LEARNED):
+        digest.update(res_name.encode())
+        for array in _LEARNED[res_name]:
+            digest.update(array.astype(str).tobytes())
+    return digest.hexdigest()
+
+
+def _first_named(
+    atom_names: np.ndarray, res_index: np.ndarray, name: str, n_res: int
+) -> np.ndarray:
+    "The index of the first atom with the name in each residue, -1 where there is none"
+    atoms = np.flatnonzero(atom_names == name)
+    first = np.full(n_res, -1)
+    residues, i = np.unique(res_index[atoms], return_index=True)
+    first[residues] = atoms[i]
+    return first
+
+
+def _intra_bonds(
+    atom_names: np.ndarray,
+    res_names: np.ndarray,
+    res_index: np.ndarray,
+) -> np.ndarray:
+    "The intra-residue bonds as rows of (atom, atom, bond type)"
+    res_types, res_type = np.unique(res_names, return_inverse=True)
+    atom_type = res_type[res_index]
+    order = np.argsort(atom_type, kind="stable")
+    bounds = np.searchsorted(atom_type[order], np.arange(len(res_types) + 1))
+
+    # the bonds with the residue and template bond that they are from, to sort them
+    # into the same order that biotite creates them in
+    bonds: List[np.ndarray] = [np.empty((0, 3), dtype=int)]
+    keys: List[np.ndarray] = [np.empty((0, 3), dtype=int)]
+    for t, res_type_name in enumerate(res_types):
+        names_1, names_2, bond_types = _template(res_type_name)
+        if len(bond_types) == 0:
+            continue
+        atoms = order[bounds[t] : bounds[t + 1]]
+        residues = np.unique(res_index[atoms])
+        names = np.unique(np.concatenate((names_1, names_2)))
+
+        code = np.minimum(np.searchsorted(names, atom_names[atoms]), len(names) - 1)
+        matches = names[code] == atom_names[atoms]
+        atoms, code = atoms[matches], code[matches]
+        row = np.searchsorted(residues, res_index[atoms])
+
+        # table of the atom index for each atom name of each residue
+        table = np.full((len(residues), len(names)), -1)
+        table[row, code] = atoms
+        i_1 = table[:, np.searchsorted(names, names_1)]
+        i_2 = table[:, np.searchsorted(names, names_2)]
+        rows, k = np.nonzero((i_1 >= 0) & (i_2 >= 0))
+
+        # the same atom name can appear more than once in a residue (e.g. altlocs),
+        # where every combination of the atoms are bonded
+        flat = row * len(names) + code
+        unique, counts = np.unique(flat, return_counts=True)
+        repeated = np.unique(unique[counts > 1] // len(names))
+        single = ~np.isin(rows, repeated)
+        rows, k = rows[single], k[single]
+        bonds.append(np.column_stack((i_1[rows, k], i_2[rows, k], bond_types[k])))
+        keys.append(np.column_stack((residues[rows], k, np.zeros_like(k))))
+
+        for r in repeated:
+            in_res = atoms[row == r]
+            for k, (name_1, name_2) in enumerate(zip(names_1, names_2)):
+                pairs = [
+                    (i, j)
+                    for i in in_res[atom_names[in_res] == name_1]
+                    for j in in_res[atom_names[in_res] == name_2]
+                ]
+                for n, (i, j) in enumerate(pairs):
+                    bonds.append(np.array([[i, j, bond_types[k]]]))
+                    keys.append(np.array([[residues[r], k, n]]))
+
+    bonds_array = np.concatenate(bonds)
+    keys_array = np.concatenate(keys)
+    return bonds_array[np.lexsort(keys_array.T[::-1])]
+
+
+def _inter_bonds(
+    atoms: struc.AtomArray | struc.AtomArrayStack,
+    starts: np.ndarray,
+    res_index: np.ndarray,
+    max_distance: float | None,
+) -> np.ndarray:
+    "The peptide and phosphodiester bonds between consecutive residues"
+    n_res = len(starts) - 1
+    if n_res < 2:
+        return np.empty((0, 3), dtype=int)
+    current, following = starts[:-2], starts[1:-1]
+    res_names = atoms.res_name[starts[:-1]]
+    res_types, res_type = np.unique(res_names, return_inverse=True)
+    link = np.array([_link(name) for name in res_types], dtype=int)[res_type]
+
+    linked = (
+        (atoms.chain_id[following] == atoms.chain_id[current])
+        & (atoms.res_id[following] - atoms.res_id[current] <= 1)
+        & (link[:-1] > 0)
+        & (link[:-1] == link[1:])
+    )
+    atom_1 = np.full(n_res - 1, -1)
+    atom_2 = np.full(n_res - 1, -1)
+    for kind, (name_1, name_2) in _CONNECTORS.items():
+        is_kind = link[:-1] == kind
+        first_1 = _first_named(atoms.atom_name, res_index, name_1, n_res)
+        first_2 = _first_named(atoms.atom_name, res_index, name_2, n_res)
+        atom_1[is_kind] = first_1[:-1][is_kind]
+        atom_2[is_kind] = first_2[1:][is_kind]
+    linked &= (atom_1 >= 0) & (atom_2 >= 0)
+
+    atom_1, atom_2 = atom_1[linked], atom_2[linked]
+    if max_distance is not None:
+        coord = atoms.coord if atoms.coord.ndim == 2 else atoms.coord[0]
+        distance = np.linalg.norm(coord[atom_1] - coord[atom_2], axis=1)
+        close = distance <= max_distance
+        atom_1, atom_2 = atom_1[close], atom_2[close]
+    return np.column_stack(
+        (atom_1, atom_2, np.full(len(atom_1), struc.BondType.SINGLE))
+    )
+
+
+def _connect(
+    atoms: struc.AtomArray | struc.AtomArrayStack,
+    inter_residue: bool,
+    max_distance: float | None,
+) -> Tuple[np.ndarray, np.ndarray]:
+    "The intra-residue and inter-residue bonds for a set of whole chains"
+    starts = struc.get_residue_starts(atoms, add_exclusive_stop=True)
+    res_index = np.repeat(np.arange(len(starts) - 1), np.diff(starts))
+    intra = _intra_bonds(atoms.atom_name, atoms.res_name[starts[:-1]], res_index)
+    if not inter_residue:
+        return intra, np.empty((0, 3), dtype=int)
+    return intra, _inter_bonds(atoms, starts, res_index, max_distance)
+
+
+def _chunks(chain_id: np.ndarray, n_chunks: int) -> np.ndarray:
+    "Split the atoms at changes of chain into chunks of about the same size"
+    breaks = np.flatnonzero(chain_id[1:] != chain_id[:-1]) + 1
+    targets = np.linspace(0, len(chain_id), n_chunks + 1)[1:-1]
+    i = np.minimum(np.searchsorted(breaks, targets), len(breaks) - 1)
+    cuts = breaks[i] if len(breaks) else np.array([], dtype=int)
+    return np.unique(np.concatenate(([0], cuts, [len(chain_id)])))
+
+
+def connect_via_templates(
+    atoms: struc.AtomArray | struc.AtomArrayStack,
+    inter_residue: bool = True,
+    max_distance: float | None = MAX_LINK_DISTANCE,
+    workers: int | None = None,
+) -> struc.BondList:
+    """
+    Create the bonds of the structure from the templates of its residues.
+
+    Bonds within residues are the same as biotite's `connect_via_residue_names()`, with
+    the addition of residues whose templates were learned with `learn_templates()`.
+
+    Parameters
+    ----------
+    atoms : struc.AtomArray | struc.AtomArrayStack
+        The structure to create the bonds for.
+    inter_residue : bool, optional
+        Whether to add the peptide and phosphodiester links between consecutive
+        residues of each chain, by default True.
+    max_distance : float | None, optional
+        Longest distance in Angstrom between the connecting atoms of consecutive
+        residues for them to be linked, using the first model of a stack. By default
+        2.5, and with None consecutive residues are linked at any distance.
+    workers : int | None, optional
+        Number of threads to split the chains between for large structures, by default
+        one per CPU.
+
+    Returns
+    -------
+    struc.BondList
+        The bonds of the structure.
+    """
+    n_atoms = atoms.array_length()
+    workers = workers or os.cpu_count() or 1
+    bounds = np.array([0, n_atoms])
+    if workers > 1 and n_atoms > PARALLEL_ATOMS:
+        bounds = _chunks(atoms.chain_id, workers)
+
+    if len(bounds) > 2:
+        with ThreadPoolExecutor(
+            len(bounds) - 1, thread_name_prefix="MNBonds"
+        ) as executor:
+            results = list(
+                executor.map(
+                    lambda bound: _connect(
+                        atoms[..., bound[0] : bound[1]], inter_residue, max_distance
+                    ),
+                    zip(bounds[:-1], bounds[1:]),
+                )
+            )
+    else:
+        results = [_connect(atoms, inter_residue, max_distance)]
+
+    # intra-residue bonds of every chunk before the inter-residue bonds, matching the
+    # order of biotite
+    offsets = np.array([0, 0, 0])
+    intra, inter = [], []
+    for start, (intra_bonds, inter_bonds) in zip(bounds[:-1], results):
+        offsets[:2] = start
+        intra.append(intra_bonds + offsets)
+        inter.append(inter_bonds + offsets)
+    bonds = struc.BondList(n_atoms, np.concatenate(intra).astype(np.uint32))
+    if inter_residue:
+        bonds = bonds.merge(
+            struc.BondList(n_atoms, np.concatenate(inter).astype(np.uint32))
+        )
+    return bonds
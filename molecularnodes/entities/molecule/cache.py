@@ -0,0 +1,232 @@
+"""
+A cache of parsed structures on disk, so reopening a file skips parsing it again.
+
+Entries are keyed by a hash of the file's contents together with the options it was
+parsed with, so an edited file or different options are parsed afresh rather than
+returning stale atoms. Each entry is the `.npz` of the annotations, coordinates, box and
+bonds of the parsed `AtomArray` which loads without any of the parsing work, along with
+any extra arrays stored with it. When the total size of the entries goes over the limit,
+the least recently used are removed.
+"""
+
+import hashlib
+import io
+import os
+import tomllib
+from functools import lru_cache
+from pathlib import Path
+from typing import Callable
+
+import biotite.structure as struc
+import numpy as np
+
+from ...download import CACHE_DIR
+
+PARSE_DIR = os.path.join(CACHE_DIR, "parsed")
+DEFAULT_MAX_SIZE = 2 * 1024**3
+
+# bump when the parsing or the stored format changes, to invalidate existing entries
+_CACHE_VERSION = 2
+_ANNOTATION = "annotation_"
+_EXTRA = "extra_"
+MANIFEST = Path(__file__).parents[2] / "blender_manifest.toml"
+
+
+@lru_cache
+def _addon_version() -> str:
+    "The version of the addon, so entries parsed by other versions aren't used"
+    with open(MANIFEST, "rb") as f:
+        return tomllib.load(f)["version"]
+
+
+def _content_hash(source: str | Path | io.IOBase) -> str:
+    "Hash the contents of a file on disk or in memory"
+    digest = hashlib.sha1()
+    if isinstance(source, io.BytesIO):
+        digest.update(source.getvalue())
+    elif isinstance(source, io.StringIO):
+        digest.update(source.getvalue().encode())
+    elif isinstance(source, io.IOBase):
+        # other streams can't be read without moving their position for the parser
+        raise TypeError(
+            f"Only files on disk, BytesIO or StringIO can be cached, not {type(source)}"
+        )
+    else:
+        with open(source, "rb") as f:
+            while chunk := f.read(1 << 20):
+                digest.update(chunk)
+    return digest.hexdigest()
+
+
+def _to_arrays(array: struc.AtomArray | struc.AtomArrayStack, extra: dict) -> dict:
+    arrays = {_EXTRA + name: values for name, values in extra.items()}
+    arrays["coord"] = array.coord
+    for name in array.get_annotation_categories():
+        arrays[_ANNOTATION + name] = array.get_annotation(name)
+    if array.box is not None:
+        arrays["box"] = array.box
+    if array.bonds is not None:
+        arrays["bonds"] = array.bonds.as_array()
+    return arrays
+
+
+def _from_arrays(arrays) -> struc.AtomArray | struc.AtomArrayStack:
+    coord = arrays["coord"]
+    if coord.ndim == 3:
+        array = struc.AtomArrayStack(coord.shape[0], coord.shape[1])
+    else:
+        array = struc.AtomArray(coord.shape[0])
+    array.coord = coord
+    for name in arrays.files:
+        if name.startswith(_ANNOTATION):
+            array.set_annotation(name[len(_ANNOTATION) :], arrays[name])
+    if "box" in arrays.files:
+        array.box = arrays["box"]
+    if "bonds" in arrays.files:
+        array.bonds = struc.BondList(array.array_length(), arrays["bonds"])
+    return array
+
+
+class ParseCache:
+    """
+    Parsed structures stored as `.npz` files, keyed by file contents and parse options.
+
+    Parameters
+    ----------
+    directory : str | Path | None, optional
+        Directory to store the parsed structures in, by default `PARSE_DIR`.
+    max_size : int, optional
+        Total size in bytes of the stored structures, over which the least recently
+        used are removed. By default 2 GB.
+    """
+
+    def __init__(
+        self, directory: str | Path | None = None, max_size: int = DEFAULT_MAX_SIZE
+    ):
+        self.directory = Path(directory or PARSE_DIR)
+        self.max_size = max_size
+
+    def key(self, source: str | Path | io.IOBase, *options) -> str:
+        "The key for the contents of a file parsed with the given options"
+        key = "_".join(
+            str(x)
+            for x in (_content_hash(source), _CACHE_VERSION, _addon_version(), *options)
+        )
+        return hashlib.sha1(key.encode()).hexdigest()
+
+    def path(self, key: str) -> Path:
+        return self.directory / f"{key}.npz"
+
+    @property
+    def entries(self) -> list[Path]:
+        "The stored structures, least recently used first"
+        if not self.directory.exists():
+            return []
+        return sorted(self.directory.glob("*.npz"), key=lambda p: p.stat().st_mtime_ns)
+
+    @property
+    def size(self) -> int:
+        "Total size in bytes of the stored structures"
+        return sum(path.stat().st_size for path in self.entries)
+
+    def load(self, key: str) -> struc.AtomArray | struc.AtomArrayStack | None:
+        "Return the stored structure for the key, or None if it isn't stored"
+        entry = self.load_entry(key)
+        return None if entry is None else entry[0]
+
+    def load_entry(
+        self, key: str
+    ) -> tuple[struc.AtomArray | struc.AtomArrayStack, dict] | None:
+        """
+        Return the stored structure for the key and the extra arrays stored with it,
+        or None if it isn't stored.
+        """
+        path = self.path(key)
+        try:
+            with np.load(path, allow_pickle=False) as arrays:
+                array = _from_arrays(arrays)
+                extra = {
+                    name[len(_EXTRA) :]: arrays[name]
+                    for name in arrays.files
+                    if name.startswith(_EXTRA)
+                }
+        except FileNotFoundError:
+            return None
+        except Exception as e:
+            # a partial or corrupt entry is removed and parsed again
+            print(f"Unable to load the cached structure `{path}`: {e}")
+            path.unlink(missing_ok=True)
+            return None
+        # the modification time is used as the time it was last used, for eviction
+        os.utime(path)
+        return array, extra
+
+    def save(
+        self,
+        key: str,
+        array: struc.AtomArray | struc.AtomArrayStack,
+        extra: dict | None = None,
+    ) -> None:
+        """
+        Store the structure for the key, then remove old entries if over the limit.
+
+        Any `extra` arrays are stored alongside the structure, and returned with it
+        by `load_entry()`.
+        """
+        self.directory.mkdir(parents=True, exist_ok=True)
+        path = self.path(key)
+        # written to a temporary file first, so readers never see a partial entry
+        tmp = path.with_suffix(f".{os.getpid()}.tmp")
+        try:
+            with open(tmp, "wb") as f:
+                np.savez(f, **_to_arrays(array, extra or {}))
+            os.replace(tmp, path)
+        except (OSError, ValueError) as e:
+            # annotations which aren't plain arrays can't be stored without pickling
+            print(f"Unable to cache the parsed structure: {e}")
+            tmp.unlink(missing_ok=True)
+            return
+        self.evict()
+
+    def evict(self) -> None:
+        "Remove the least recently used structures until under the size limit"
+        entries = self.entries
+        size = sum(path.stat().st_size for path in entries)
+        for path in entries:
+            if size <= self.max_size:
+                break
+            size -= path.stat().st_size
+            path.unlink(missing_ok=True)
+
+    def clear(self) -> None:
+        "Remove all of the stored structures"
+        for path in self.entries:
+            path.unlink(missing_ok=True)
+
+    def cached(
+        self,
+        source: str | Path | io.IOBase,
+        parse: Callable[..., struc.AtomArray | struc.AtomArrayStack],
+        *options,
+        **kwargs,
+    ) -> struc.AtomArray | struc.AtomArrayStack:
+        """
+        Return the stored structure for the file, or parse and store it.
+
+        Parameters
+        ----------
+        source : str | Path | io.IOBase
+            The file that is being parsed, whose contents are hashed for the key.
+        parse : Callable[..., struc.AtomArray | struc.AtomArrayStack]
+            Parses the file, called with `kwargs` when the structure isn't stored.
+        *options
+            Anything else which changes the parsed structure, included in the key.
+        **kwargs
+            The parse options passed to `parse`, also included in the key.
+        """
+        key = self.key(source, *options, *sorted(kwargs.items()))
+        array = self.load(key)
+        if array is None:
+            array = parse(**kwargs)
+            self.save(key, array)
+        return array
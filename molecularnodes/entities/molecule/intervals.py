@@ -0,0 +1,88 @@
+"""
+Assigning values to atoms from ranges of residues, such as secondary structure.
+
+Ranges are given as a chain with the first and last residue ID, inclusive, as they are
+in the HELIX / SHEET records of PDB files and the `struct_conf` / `struct_sheet_range`
+categories of mmCIF files. Each chain and residue ID are combined into a single
+sortable key, so the ranges of every chain are split into segments between their
+starts and stops with one `np.unique()`, and each atom is matched to the segment it
+falls in with a single `np.searchsorted()`.
+"""
+
+import numpy as np
+import numpy.typing as npt
+
+
+def assign_ranges(
+    chain_id: npt.ArrayLike,
+    res_id: npt.ArrayLike,
+    range_chain: npt.ArrayLike,
+    range_start: npt.ArrayLike,
+    range_end: npt.ArrayLike,
+    range_value: npt.ArrayLike,
+    default: int = 0,
+) -> np.ndarray:
+    """
+    Assign each atom the value of the range of residues that it is in.
+
+    Where ranges overlap, the atom takes the value of the range which comes last, the
+    same as assigning the value of each range in turn.
+
+    Parameters
+    ----------
+    chain_id : npt.ArrayLike
+        Chain ID of each atom.
+    res_id : npt.ArrayLike
+        Residue ID of each atom.
+    range_chain : npt.ArrayLike
+        Chain ID of each range.
+    range_start : npt.ArrayLike
+        Residue ID of the first residue in each range.
+    range_end : npt.ArrayLike
+        Residue ID of the last residue in each range, inclusive.
+    range_value : npt.ArrayLike
+        Value to assign to the atoms in each range.
+    default : int, optional
+        Value for atoms which aren't in any range, by default 0.
+
+    Returns
+    -------
+    np.ndarray
+        The value for each atom.
+    """
+    chain_id = np.asarray(chain_id)
+    res_id = np.asarray(res_id, dtype=np.int64)
+    range_start = np.asarray(range_start, dtype=np.int64)
+    range_end = np.asarray(range_end, dtype=np.int64)
+    range_value = np.asarray(range_value)
+    values = np.full(len(res_id), default, dtype=np.result_type(range_value, default))
+    if len(range_start) == 0 or len(res_id) == 0:
+        return values
+
+    # a key for each (chain, residue) which sorts by chain then residue, with a gap
+    # between chains so that ranges can't run on into the next chain
+    _, codes = np.unique(
+        np.concatenate((np.asarray(range_chain).astype(str), chain_id.astype(str))),
+        return_inverse=True,
+    )
+    range_code, atom_code = codes[: len(range_start)], codes[len(range_start) :]
+    low = min(range_start.min(), res_id.min())
+    span = max(range_end.max(), res_id.max()) - low + 2
+    key_start = range_code * span + range_start - low
+    key_stop = range_code * span + range_end - low + 1
+
+    # split the ranges into segments at every start and stop, and give each segment
+    # the last range which covers it
+    breaks = np.unique(np.concatenate((key_start, key_stop)))
+    first = np.searchsorted(breaks, key_start)
+    n_segments = np.maximum(np.searchsorted(breaks, key_stop) - first, 0)
+    offsets = np.cumsum(n_segments) - n_segments
+    segments = np.arange(n_segments.sum()) - np.repeat(offsets - first, n_segments)
+    covering = np.full(len(breaks), -1)
+    np.maximum.at(covering, segments, np.repeat(np.arange(len(first)), n_segments))
+
+    segment = np.searchsorted(breaks, atom_code * span + res_id - low, side="right") - 1
+    in_range = segment >= 0
+    in_range[in_range] = covering[segment[in_range]] >= 0
+    values[in_range] = range_value[covering[segment[in_range]]]
+    return values
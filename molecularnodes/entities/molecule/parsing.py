@@ -0,0 +1,738 @@
+"""
+Reading structure files and building their atoms, without any of Blender.
+
+Everything here only depends on numpy and biotite, so files can be parsed in worker
+processes which can't import `bpy`. The Molecule classes use the same functions when
+parsing in Blender, so a file gives the same atoms whichever process parsed it. Only
+the picklable results of parsing (the `AtomArray`, entity names and assemblies) are
+sent back from the workers rather than the opened file.
+"""
+
+import io
+import itertools
+import time
+from dataclasses import dataclass
+from functools import partial
+from pathlib import Path
+from typing import Any, Callable, Dict, List
+
+import biotite.structure as struc
+import biotite.structure.io.pdbx as pdbx
+import numpy as np
+from biotite import InvalidFileError
+from biotite.structure import BadStructureError, annotate_sse, spread_residue_wise
+from biotite.structure.io import pdb
+from biotite.structure.io.mol import MOLFile
+
+from ... import utils
+from .assembly import AssemblyParser
+from .bonds import (
+    add_templates,
+    connect_via_templates,
+    learn_templates,
+    learned_templates,
+    learned_templates_key,
+)
+from .cache import ParseCache
+from .intervals import assign_ranges
+
+
+def cached_structure(
+    cache: ParseCache | None,
+    source: str | Path | io.IOBase,
+    parse: Callable[..., struc.AtomArray],
+    *options,
+    **kwargs,
+) -> struc.AtomArray:
+    """
+    Parse the structure with `parse(**kwargs)`, or load it from the cache.
+
+    Besides the options, the key includes the templates learned for connecting
+    residues. The templates learned from the bonds of the structure while parsing it
+    are stored with it, and learned again when it is loaded from the cache. Streams
+    other than `io.BytesIO` and `io.StringIO` are always parsed.
+    """
+    if cache is None:
+        return parse(**kwargs)
+    if isinstance(source, io.IOBase):
+        if not isinstance(source, (io.BytesIO, io.StringIO)):
+            return parse(**kwargs)
+    key = cache.key(source, *options, learned_templates_key(), *sorted(kwargs.items()))
+    entry = cache.load_entry(key)
+    if entry is not None:
+        array, extra = entry
+        add_templates(_templates_from_arrays(extra))
+        return array
+
+    before = set(learned_templates())
+    array = parse(**kwargs)
+    cache.save(key, array, _templates_to_arrays(_learned_since(before)))
+    return array
+
+
+def _learned_since(before: set) -> dict:
+    "The templates learned for residues other than those in `before`"
+    return {
+        res_name: template
+        for res_name, template in learned_templates().items()
+        if res_name not in before
+    }
+
+
+def _templates_to_arrays(templates: dict) -> dict:
+    arrays = {}
+    for res_name, (names_a, names_b, bond_types) in templates.items():
+        arrays[f"template_{res_name}_names"] = np.column_stack((names_a, names_b))
+        arrays[f"template_{res_name}_types"] = bond_types
+    return arrays
+
+
+def _templates_from_arrays(arrays: dict) -> dict:
+    templates = {}
+    for name, values in arrays.items():
+        if name.startswith("template_") and name.endswith("_names"):
+            res_name = name[len("template_") : -len("_names")]
+            types = arrays[f"template_{res_name}_types"]
+            templates[res_name] = (values[:, 0], values[:, 1], types)
+    return templates
+
+
+def pdb_structure(file: pdb.PDBFile) -> struc.AtomArray:
+    "The atoms of a PDB file, with their bonds and secondary structure"
+    # TODO: implement entity ID, sec_struct for PDB files
+
+    # a bit dirty, but we first try and get the bond information from the file
+    # if that fails, then we extract without the bonds and try to create bonds based
+    # on residue / atom names.
+    try:
+        array = pdb.get_structure(
+            pdb_file=file,
+            extra_fields=["b_factor", "occupancy", "charge", "atom_id"],
+            include_bonds=True,
+        )
+        # ligands bonded with CONECT records are kept to connect the same residue in
+        # structures that don't have bonds
+        learn_templates(array)
+    except AttributeError as e:
+        print(
+            f"Unable to get bond information: {e}\nAttempting `connect_via_templates()`"
+        )
+        array = pdb.get_structure(
+            pdb_file=file,
+            extra_fields=["b_factor", "occupancy", "charge", "atom_id"],
+            include_bonds=False,
+        )
+        try:
+            array.bonds = connect_via_templates(array)
+        except AttributeError as e:
+            print("Not able to find bonds via residue: {e}")
+
+    try:
+        sec_struct = _get_sec_struct(file, array)
+    except BadStructureError:
+        sec_struct = _comp_secondary_structure(array[0])
+
+    array.set_annotation("sec_struct", sec_struct)
+
+    return array
+
+
+def _get_sec_struct(file, array):
+    lines = np.array(file.lines)
+    lines_helix = lines[np.char.startswith(lines, "HELIX")]
+    lines_sheet = lines[np.char.startswith(lines, "SHEET")]
+    if len(lines_helix) == 0 and len(lines_sheet) == 0:
+        raise struc.BadStructureError("No secondary structure information detected.")
+
+    helix_values = (22, 25, 34, 37, 20)
+    sheet_values = (23, 26, 34, 37, 22)
+
+    values = ((lines_helix, 1, helix_values), (lines_sheet, 2, sheet_values))
+
+    # the (chain, start, end, value) of each range, from the columns of the records
+    # which are 1-based and inclusive
+    ranges = [
+        (
+            line[chainid - 1].strip(),
+            int(line[start1 - 1 : end1]),
+            int(line[start2 - 1 : end2]),
+            idx,
+        )
+        for lines, idx, (start1, end1, start2, end2, chainid) in values
+        for line in lines
+    ]
+    chains, starts, ends, ids = zip(*ranges)
+
+    # assigns secondary structure to the atoms in each range, later records taking
+    # precedence over earlier ones
+    sec_struct = assign_ranges(
+        array.chain_id, array.res_id, chains, starts, ends, ids, default=0
+    )
+
+    # assign remaining AA atoms to 3 (loop), while all other remaining
+    # atoms will be 0 (not relevant)
+    mask = np.logical_and(sec_struct == 0, struc.filter_canonical_amino_acids(array))
+
+    sec_struct[mask] = 3
+
+    return sec_struct
+
+
+def _comp_secondary_structure(array):
+    """Use dihedrals to compute the secondary structure of proteins
+
+    Through biotite built-in method derivated from P-SEA algorithm (Labesse 1997)
+    Returns an array with secondary structure for each atoms where:
+    - 0 = '' = non-protein or not assigned by biotite annotate_sse
+    - 1 = a = alpha helix
+    - 2 = b = beta sheet
+    - 3 = c = coil
+
+    Inspired from https://www.biotite-python.org/examples/gallery/structure/transketolase_sse.html
+    """
+    # TODO Port [PyDSSP](https://github.com/ShintaroMinami/PyDSSP)
+
+    conv_sse_char_int = {"a": 1, "b": 2, "c": 3, "": 0}
+
+    char_sse = annotate_sse(array)
+    int_sse = np.array([conv_sse_char_int[char] for char in char_sse], dtype=int)
+    atom_sse = spread_residue_wise(array, int_sse)
+
+    return atom_sse
+
+
+class PDBAssemblyParser(AssemblyParser):
+    # Implementation adapted from ``biotite.structure.io.pdb.file``
+
+    def __init__(self, pdb_file):
+        self._file = pdb_file
+
+    def list_assemblies(self):
+        return self._file.list_assemblies()
+
+    def get_transformations(self, assembly_id):
+        # Get lines containing transformations for assemblies
+        remark_lines = self._file.get_remark(350)
+        if remark_lines is None:
+            raise InvalidFileError(
+                "File does not contain assembly information (REMARK 350)"
+            )
+        # Get lines corresponding to selected assembly ID
+        assembly_start_i = None
+        assembly_stop_i = None
+        for i, line in enumerate(remark_lines):
+            if line.startswith("BIOMOLECULE"):
+                current_assembly_id = line[12:].strip()
+                if assembly_start_i is not None:
+                    # Start was already found -> this is the next entry
+                    # -> this is the stop
+                    assembly_stop_i = i
+                    break
+                if current_assembly_id == assembly_id:
+                    assembly_start_i = i
+        # In case of the final assembly of the file,
+        # the 'stop' is the end of REMARK 350 lines
+        assembly_stop_i = len(remark_lines) if assembly_stop_i is None else i
+        if assembly_start_i is None:
+            raise KeyError(f"The assembly ID '{assembly_id}' is not found")
+        assembly_lines = remark_lines[assembly_start_i:assembly_stop_i]
+
+        # Get transformations for a sets of chains
+        transformations = []
+        chain_set_start_indices = [
+            i
+            for i, line in enumerate(assembly_lines)
+            if line.startswith("APPLY THE FOLLOWING TO CHAINS")
+        ]
+        # Add exclusive stop at end of records
+        chain_set_start_indices.append(len(assembly_lines))
+        for i in range(len(chain_set_start_indices) - 1):
+            start = chain_set_start_indices[i]
+            stop = chain_set_start_indices[i + 1]
+            # Read affected chain IDs from the following line(s)
+            affected_chain_ids = []
+            transform_start = None
+            for j, line in enumerate(assembly_lines[start:stop]):
+                if line.startswith("APPLY THE FOLLOWING TO CHAINS:") or line.startswith(
+                    "                   AND CHAINS:"
+                ):
+                    affected_chain_ids += [
+                        chain_id.strip() for chain_id in line[30:].split(",")
+                    ]
+                else:
+                    # Chain specification has finished
+                    # BIOMT lines start directly after chain specification
+                    transform_start = start + j
+                    break
+            # Parse transformations from BIOMT lines
+            if transform_start is None:
+                raise InvalidFileError("No 'BIOMT' records found for chosen assembly")
+
+            matrices = _parse_transformations(assembly_lines[transform_start:stop])
+
+            for matrix in matrices:
+                transformations.append((affected_chain_ids, matrix.tolist()))
+
+        return transformations
+
+    def get_assemblies(self):
+        assembly_dict = {}
+        for assembly_id in self.list_assemblies():
+            assembly_dict[assembly_id] = self.get_transformations(assembly_id)
+
+        return assembly_dict
+
+
+def _parse_transformations(lines):
+    """
+    Parse the rotation and translation transformations from
+    *REMARK* 290 or 350.
+    Return as array of matrices and vectors respectively
+    """
+
+    # Each transformation requires 3 lines for the (x,y,z) components
+    if len(lines) % 3 != 0:
+        raise InvalidFileError("Invalid number of transformation vectors")
+    n_transformations = len(lines) // 3
+
+    matrices = np.tile(np.identity(4), (n_transformations, 1, 1))
+
+    transformation_i = 0
+    component_i = 0
+    for line in lines:
+        # The first two elements (component and
+        # transformation index) are not used
+        transformations = [float(e) for e in line.split()[2:]]
+
+        if len(transformations) != 4:
+            raise InvalidFileError("Invalid number of transformation vector elements")
+        matrices[transformation_i, component_i, :] = transformations
+
+        component_i += 1
+        if component_i == 3:
+            # All (x,y,z) components were parsed
+            # -> head to the next transformation
+            transformation_i += 1
+            component_i = 0
+
+    return matrices
+
+
+def set_extra_annotations(
+    array: struc.AtomArray,
+    file: pdbx.BinaryCIFFile | pdbx.CIFFile,
+    annotations: Dict[str, Callable],
+    report: Any = None,
+) -> struc.AtomArray:
+    """
+    Set new annotations on the array from custom functions.
+
+    Each function takes the array and the file and returns the values of its
+    annotation. The time taken by each and any `KeyError` they raise are recorded in
+    the `compute_time` and `errors` of the report, when one is given.
+    """
+    for name, func in annotations.items():
+        start = time.perf_counter()
+        try:
+            values = func(array, file)
+            # for the getting of some custom attributes, we get it for the full atom_site
+            # but we need to assign a subset of the array that is that model in the full
+            # atom_site, so we subset using the atom_id
+            try:
+                array.set_annotation(name, values)
+            except IndexError:
+                array.set_annotation(name, values[array.atom_id - 1])
+        except KeyError as e:
+            if report is not None:
+                report.errors[name] = e
+        if report is not None:
+            report.compute_time[name] = time.perf_counter() - start
+
+    return array
+
+
+def pdbx_structure(
+    file: pdbx.BinaryCIFFile | pdbx.CIFFile,
+    annotate: Callable[..., struc.AtomArray],
+    extra_fields=["b_factor", "occupancy", "atom_id"],
+    bonds=True,
+    model: int | None = None,
+) -> struc.AtomArray:
+    "The atoms of a CIF or BinaryCIF file, annotated by `annotate(array, file)`"
+    try:
+        array = pdbx.get_structure(file, model=model, extra_fields=extra_fields)
+        array = annotate(array, file)
+        if not array.bonds and bonds:
+            array.bonds = connect_via_templates(array, inter_residue=True)
+    except InvalidFileError:
+        array = pdbx.get_component(file)
+        # the bonds of components from their own file are kept to connect the same
+        # residue in structures that don't have bonds
+        learn_templates(array)
+        if not array.bonds and bonds:
+            array.bonds = connect_via_templates(array, inter_residue=True)
+
+    return array
+
+
+def pdbx_entity_ids(file: pdbx.BinaryCIFFile | pdbx.CIFFile) -> List[str]:
+    return file.block.get("entity").get("pdbx_description").as_array().tolist()
+
+
+def entity_id(array, file):
+    chain_ids = file.block["entity_poly"]["pdbx_strand_id"].as_array(str)
+
+    # the chain_ids are an array of individual items np.array(['A,B', 'C', 'D,E,F'])
+    # which need to be categorised as [1, 1, 2, 3, 3, 3] for their belonging to individual
+    # entities
+
+    chains = []
+    idx = []
+    for i, chain_str in enumerate(chain_ids):
+        for chain in chain_str.split(","):
+            chains.append(chain)
+            idx.append(i)
+
+    # this is how we map the chain_ids and res_names of our entities to their integer
+    # representations
+    entity_lookup = dict(zip(chains, idx))
+
+    # for the hetero atoms, we need to add a new entity_id into the lookup so that
+    # they can be assigned an entity ID
+    unique_res_het = np.unique(array.res_name[array.hetero])
+    for het in unique_res_het:
+        if het not in entity_lookup:
+            entity_lookup[het] = max(entity_lookup.values()) + 1
+
+    # looked up once for each combination of residue name and chain, which raises a
+    # KeyError for chains without an entity even when the residue has one
+    entity_id_int = utils.lookup(
+        lambda res_name, chain_id: entity_lookup.get(res_name, entity_lookup[chain_id]),
+        array.res_name,
+        array.chain_id,
+        dtype=int,
+    )
+
+    return entity_id_int
+
+
+def secondary_structure(array, file):
+    """
+    Get secondary structure information for the array from the file.
+
+    Parameters
+    ----------
+    array : numpy array
+        The array for which secondary structure information is to be retrieved.
+    file : object
+        The file object containing the secondary structure information.
+
+    Returns
+    -------
+    numpy array
+        A numpy array of secondary structure information, where each element is either 0, 1, 2, or 3.
+        - 0: Not a peptide
+        - 1: Alpha helix
+        - 2: Beta sheet
+        - 3: Loop
+
+    Raises
+    ------
+    KeyError
+        If the 'struct_conf' category is not found in the file.
+    """
+
+    # get the annotations for the struc_conf cetegory. Provides start and end
+    # residues for the annotations. For most files this will only contain the
+    # alpha helices, but will sometimes contain also other secondary structure
+    # information such as in AlphaFold predictions
+
+    conf = file.block.get("struct_conf")
+    if conf:
+        starts = conf["beg_auth_seq_id"].as_array().astype(int)
+        ends = conf["end_auth_seq_id"].as_array().astype(int)
+        chains = conf["end_auth_asym_id"].as_array().astype(str)
+        id_label = conf["id"].as_array().astype(str)
+    else:
+        starts = np.empty(0, dtype=int)
+        ends = np.empty(0, dtype=int)
+        chains = np.empty(0, dtype=str)
+        id_label = np.empty(0, dtype=int)
+
+    # most files will have a separate category for the beta sheets
+    # this can just be appended to the other start / end / id and be processed
+    # as normalquit
+    sheet = file.block.get("struct_sheet_range")
+    if sheet:
+        starts = np.append(starts, sheet["beg_auth_seq_id"].as_array().astype(int))
+        ends = np.append(ends, sheet["end_auth_seq_id"].as_array().astype(int))
+        chains = np.append(chains, sheet["end_auth_asym_id"].as_array().astype(str))
+        id_label = np.append(id_label, np.repeat("STRN", len(sheet["id"])))
+
+    if not conf and not sheet:
+        raise KeyError
+
+    # convert the string labels to integer representations of the SS
+    # AH: 1, BS: 2, LOOP: 3
+
+    id_int = np.array([_ss_label_to_int(label) for label in id_label], int)
+
+    # residues outside of the ranges are loops, unless their chain has no ranges
+    secondary_structure = assign_ranges(
+        array.chain_id, array.res_id, chains, starts, ends, id_int, default=3
+    )
+    secondary_structure[~np.isin(array.chain_id, chains)] = 0
+
+    # assign SS to 0 where not peptide
+    secondary_structure[~struc.filter_amino_acids(array)] = 0
+    return secondary_structure
+
+
+def _ss_label_to_int(label):
+    if "HELX" in label:
+        return 1
+    elif "STRN" in label:
+        return 2
+    else:
+        return 3
+
+
+# the annotations set on the structures of every CIF and BinaryCIF file
+EXTRA_ANNOTATIONS = {"sec_struct": secondary_structure, "entity_id": entity_id}
+
+
+class CIFAssemblyParser:
+    # Implementation adapted from ``biotite.structure.io.pdbx.convert``
+
+    def __init__(self, file_cif):
+        self._file = file_cif
+
+    def list_assemblies(self):
+        return list(pdbx.list_assemblies(self._file).keys())
+
+    def get_transformations(self, assembly_id):
+        assembly_gen_category = self._file.block["pdbx_struct_assembly_gen"]
+
+        struct_oper_category = self._file.block["pdbx_struct_oper_list"]
+
+        if assembly_id not in assembly_gen_category["assembly_id"].as_array(str):
+            raise KeyError(f"File has no Assembly ID '{assembly_id}'")
+
+        # Extract all possible transformations indexed by operation ID
+        # transformation_dict = _get_transformations(struct_oper_category)
+        transformation_dict = _extract_matrices(struct_oper_category)
+
+        # Get necessary transformations and the affected chain IDs
+        # NOTE: The chains given here refer to the `label_asym_id` field
+        # of the `atom_site` category
+        # However, by default `PDBxFile` uses the `auth_asym_id` as
+        # chain ID
+        matrices = []
+        pdb_model_num = -1
+        for id, op_expr, asym_id_expr in zip(
+            assembly_gen_category["assembly_id"].as_array(str),
+            assembly_gen_category["oper_expression"].as_array(str),
+            assembly_gen_category["asym_id_list"].as_array(str),
+        ):
+            pdb_model_num += 1
+            # Find the operation expressions for given assembly ID
+            # We already asserted that the ID is actually present
+            if id != assembly_id:
+                continue
+
+            operations = _parse_operation_expression(op_expr)
+
+            affected_chain_ids = asym_id_expr.split(",")
+
+            for i, operation in enumerate(operations):
+                # for op_step in operation:
+                matrices.append(
+                    {
+                        "chain_ids": affected_chain_ids,
+                        "matrix": transformation_dict[operation[0]].tolist(),
+                        "pdb_model_num": pdb_model_num,
+                    }
+                )
+
+        return matrices
+
+    def get_assemblies(self):
+        assembly_dict = {}
+        for assembly_id in self.list_assemblies():
+            assembly_dict[assembly_id] = self.get_transformations(assembly_id)
+
+        return assembly_dict
+
+
+def _extract_matrices(category, scale=True):
+    matrix_columns = [
+        "matrix[1][1]",
+        "matrix[1][2]",
+        "matrix[1][3]",
+        "vector[1]",
+        "matrix[2][1]",
+        "matrix[2][2]",
+        "matrix[2][3]",
+        "vector[2]",
+        "matrix[3][1]",
+        "matrix[3][2]",
+        "matrix[3][3]",
+        "vector[3]",
+    ]
+
+    columns = [category[name].as_array().astype(float) for name in matrix_columns]
+    n = 4 if scale else 3
+    matrices = np.empty((len(columns[0]), n, 4), float)
+
+    col_mask = np.tile((0, 1, 2, 3), 3)
+    row_mask = np.repeat((0, 1, 2), 4)
+    for column, coli, rowi in zip(columns, col_mask, row_mask):
+        matrices[:, rowi, coli] = column
+
+    return dict(zip(category["id"].as_array(str), matrices))
+
+
+def _parse_operation_expression(expression):
+    """
+    Get successive operation steps (IDs) for the given
+    ``oper_expression``.
+    Form the cartesian product, if necessary.
+    """
+    # Split groups by parentheses:
+    # use the opening parenthesis as delimiter
+    # and just remove the closing parenthesis
+    expressions_per_step = expression.replace(")", "").split("(")
+    expressions_per_step = [e for e in expressions_per_step if len(e) > 0]
+    # Important: Operations are applied from right to left
+    expressions_per_step.reverse()
+
+    operations = []
+    for expr in expressions_per_step:
+        if "-" in expr:
+            if "," in expr:
+                for gexpr in expr.split(","):
+                    if "-" in gexpr:
+                        first, last = gexpr.split("-")
+                        operations.append(
+                            [str(id) for id in range(int(first), int(last) + 1)]
+                        )
+                    else:
+                        operations.append([gexpr])
+            else:
+                # Range of operation IDs, they must be integers
+                first, last = expr.split("-")
+                operations.append([str(id) for id in range(int(first), int(last) + 1)])
+        elif "," in expr:
+            # List of operation IDs
+            operations.append(expr.split(","))
+        else:
+            # Single operation ID
+            operations.append([expr])
+
+    # Cartesian product of operations
+    return list(itertools.product(*operations))
+
+
+@dataclass
+class ParsedFile:
+    "The picklable results of parsing a file, sent back from the worker"
+
+    suffix: str
+    array: struc.AtomArray
+    entity_ids: List[str] | None
+    assemblies: dict | None
+    # templates learned from the bonds in the file, for connecting the same residues
+    # in the process which creates the molecule
+    learned: dict
+    parse_time: float
+
+
+def _assemblies(parser) -> dict | None:
+    try:
+        return parser.get_assemblies()
+    except InvalidFileError:
+        return None
+
+
+def parse_file(path: str, name: str, cache: ParseCache | None = None) -> ParsedFile:
+    """
+    Parse a single file the same way as the Molecule class called `name`.
+
+    Run in the worker processes, so only the results are sent back rather than the
+    opened file. The name of the class is part of the key of the parsed structure in
+    the cache, so the structures are shared with files opened in Blender.
+    """
+    start = time.perf_counter()
+    suffix = Path(path).suffix
+    before = set(learned_templates())
+    entity_ids = None
+    if suffix == ".pdb":
+        file = pdb.PDBFile.read(path)
+        parse = partial(pdb_structure, file)
+        array = cached_structure(cache, path, parse, name, [])
+        assemblies = _assemblies(PDBAssemblyParser(file))
+    elif suffix in (".pdbx", ".cif", ".bcif"):
+        if suffix == ".bcif":
+            file = pdbx.BinaryCIFFile.read(path)
+        else:
+            file = pdbx.CIFFile.read(path)
+        annotate = partial(set_extra_annotations, annotations=EXTRA_ANNOTATIONS)
+        parse = partial(pdbx_structure, file, annotate)
+        array = cached_structure(cache, path, parse, name, sorted(EXTRA_ANNOTATIONS))
+        try:
+            entity_ids = pdbx_entity_ids(file)
+        except AttributeError:
+            pass
+        assemblies = _assemblies(CIFAssemblyParser(file))
+    elif suffix in (".mol", ".sdf"):
+        array = MOLFile.read(path).get_structure()
+        # TODO maybe look into symmetry operations for small mols
+        assemblies = None
+    else:
+        raise ValueError(f"Unable to open local file. Format '{suffix}' not supported.")
+
+    return ParsedFile(
+        suffix,
+        array,
+        entity_ids,
+        assemblies,
+        _learned_since(before),
+        time.perf_counter() - start,
+    )
+
+
+def init_worker(learned: dict) -> None:
+    "Start a worker with the templates learned so far in the main process"
+    add_templates(learned)
+
+
+# Run first in each worker process. The packages above this module are registered
+# as empty packages, so importing it doesn't import the addon and Blender with it.
+WORKER_BOOTSTRAP = """
+import importlib
+import sys
+import types
+
+for name, path in packages:
+    if name not in sys.modules:
+        package = types.ModuleType(name)
+        package.__path__ = [path]
+        sys.modules[name] = package
+importlib.import_module(module).init_worker(*args)
+"""
+
+
+def worker_initargs(learned: dict) -> tuple:
+    "The arguments for `exec()` as the initializer of the worker processes"
+    parts = __name__.split(".")[:-1]
+    parents = Path(__file__).parents
+    packages = [
+        (".".join(parts[: i + 1]), str(parents[len(parts) - 1 - i]))
+        for i in range(len(parts))
+    ]
+    scope = {
+        "packages": packages,
+        "module": __name__,
+        "args": (learned,),
+    }
+    return WORKER_BOOTSTRAP, scope
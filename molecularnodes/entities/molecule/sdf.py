@@ -12,6 +12,10 @@ class SDF(Molecule):
     def read(self, file_path):
         return MOLFile.read(file_path)
 
+    def _set_parsed(self, array, entity_ids=None, assemblies=None):
+        super()._set_parsed(array, entity_ids, assemblies)
+        self.n_atoms = self.array.array_length()
+
     def _get_structure(self):
         return self.file.get_structure()
 
@@ -51,19 +51,24 @@ def parse(filepath) -> Molecule:
         filepath = path_resolve(filepath)
         suffix = Path(filepath).suffix
 
-    parser = {
-        ".pdb": PDB,
-        ".pdbx": CIF,
-        ".cif": CIF,
-        ".bcif": BCIF,
-        ".mol": SDF,
-        ".sdf": SDF,
-    }
-
-    if suffix not in parser:
-        raise ValueError(f"Unable to open local file. Format '{suffix}' not supported.")
+    return parser_for_suffix(suffix)(filepath)
+
+
+PARSERS = {
+    ".pdb": PDB,
+    ".pdbx": CIF,
+    ".cif": CIF,
+    ".bcif": BCIF,
+    ".mol": SDF,
+    ".sdf": SDF,
+}
 
-    return parser[suffix](filepath)
+
+def parser_for_suffix(suffix: str) -> type[Molecule]:
+    "The Molecule class which parses files with the given suffix"
+    if suffix not in PARSERS:
+        raise ValueError(f"Unable to open local file. Format '{suffix}' not supported.")
+    return PARSERS[suffix]
 
 
 def fetch(
@@ -77,6 +82,7 @@ def fetch(
     database: str = "rcsb",
     format: str = "bcif",
     color: str = "common",
+    as_trajectory: bool = False,
 ) -> Molecule:
     """Fetch and create a molecular structure from online databases.
 
@@ -102,6 +108,9 @@ def fetch(
         File format to download ("bcif", "pdb", etc), by default "bcif"
     color : str, optional
         Coloring scheme to apply, by default "common"
+    as_trajectory : bool, optional
+        Whether to play back multiple models as a trajectory of a single object rather
+        than creating an object for each model, by default False
 
     Returns
     -------
@@ -124,10 +133,12 @@ def fetch(
         del_hydrogen=del_hydrogen,
         build_assembly=build_assembly,
         color=color,
+        as_trajectory=as_trajectory,
     )
 
     obj.mn["code"] = code
-    obj.mn["entity_type"] = format
+    if mol.trajectory is None:
+        obj.mn["entity_type"] = format
 
     return mol
 
@@ -139,6 +150,7 @@ def load_local(
     del_solvent=True,
     del_hydrogen=False,
     build_assembly=False,
+    as_trajectory=False,
 ):
     mol = parse(file_path)
     mol.create_object(
@@ -148,6 +160,7 @@ def load_local(
         centre=centre,
         del_solvent=del_solvent,
         del_hydrogen=del_hydrogen,
+        as_trajectory=as_trajectory,
     )
     return mol
 
@@ -200,6 +213,14 @@ class Import_Molecule(bpy.types.Operator):
         name="Build Biological Assembly",
         description="Build the biological assembly for the structure on import",
     )
+    as_trajectory: BoolProperty(  # type: ignore
+        default=False,
+        name="Models as Trajectory",
+        description=(
+            "Play back multiple models as a trajectory of a single object, rather than "
+            "creating an object for each model"
+        ),
+    )
 
     def draw(self, context: Context) -> UILayout:
         layout = self.layout
@@ -212,6 +233,7 @@ class Import_Molecule(bpy.types.Operator):
         layout.prop(self, "centre")
         layout.prop(self, "del_solvent")
         layout.prop(self, "assembly")
+        layout.prop(self, "as_trajectory")
 
         return layout
 
@@ -250,6 +272,7 @@ class MN_OT_Import_Molecule(Import_Molecule):
                     style=style,
                     del_solvent=self.del_solvent,
                     build_assembly=self.assembly,
+                    as_trajectory=self.as_trajectory,
                 )
             except Exception as e:
                 print(f"Failed importing {file}: {e}")
@@ -341,6 +364,14 @@ class MN_OT_Import_Fetch(bpy.types.Operator):
         description="Centre the structure on the world origin",
         default=False,
     )
+    as_trajectory: BoolProperty(  # type: ignore
+        name="Models as Trajectory",
+        description=(
+            "Play back multiple models as a trajectory of a single object, rather than "
+            "creating an object for each model"
+        ),
+        default=False,
+    )
 
     database: EnumProperty(  # type: ignore
         name="Method",
@@ -392,6 +423,7 @@ class MN_OT_Import_Fetch(bpy.types.Operator):
                 cache_dir=self.cache_dir,
                 build_assembly=self.assembly,
                 format=self.file_format,
+                as_trajectory=self.as_trajectory,
             )
         except FileDownloadPDBError as e:
             self.report({"ERROR"}, str(e))
@@ -428,6 +460,7 @@ class MN_OT_Import_Protein_Local(Import_Molecule):
             build_assembly=self.assembly,
             centre=self.centre_type if self.centre else None,
             del_solvent=self.del_solvent,
+            as_trajectory=self.as_trajectory,
         )
 
         # return the good news!
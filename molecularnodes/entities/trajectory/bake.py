@@ -0,0 +1,293 @@
+import hashlib
+import os
+import threading
+from concurrent.futures import Future, ThreadPoolExecutor
+from pathlib import Path
+
+import numpy as np
+import numpy.typing as npt
+
+from ...download import CACHE_DIR
+
+BAKE_DIR = os.path.join(CACHE_DIR, "trajectories")
+
+
+def _trajectory_key(filename: str | Path, *args) -> str:
+    "Hash the trajectory file's path, size and modification time along with any extra args"
+    if filename is None or not os.path.exists(filename):
+        raise ValueError(
+            f"Only trajectories read from a file can be baked, not '{filename}'"
+        )
+    path = Path(filename).resolve()
+    stat = path.stat()
+    key = "_".join(str(x) for x in (path, stat.st_size, stat.st_mtime_ns, *args))
+    return hashlib.sha1(key.encode()).hexdigest()[:16]
+
+
+class FrameArray:
+    """
+    Per-frame values for a set of frames, stored in a memory-mapped file on disk.
+
+    Which frames have been written is stored alongside the values, so the writing of
+    values which was cancelled or interrupted resumes where it left off.
+
+    Parameters
+    ----------
+    path : Path
+        Path of the `.npy` file to store the values in.
+    frames : ArrayLike
+        The trajectory frames that values are stored for.
+    shape : tuple
+        The shape of the values for a single frame.
+    dtype : DTypeLike, optional
+        The dtype of the stored values, by default float32.
+    """
+
+    def __init__(
+        self,
+        path: Path,
+        frames: npt.ArrayLike,
+        shape: tuple,
+        dtype: npt.DTypeLike = np.float32,
+    ):
+        self.frames = np.unique(np.asarray(frames, dtype=int))
+        self.path = Path(path)
+        self.path_done = self.path.with_suffix(".done.npy")
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self._open((len(self.frames), *shape), np.dtype(dtype))
+
+    def _open(self, shape: tuple, dtype: np.dtype) -> None:
+        try:
+            self._values = np.load(self.path, mmap_mode="r+")
+            self._done = np.load(self.path_done, mmap_mode="r+")
+            if (
+                self._values.shape != shape
+                or self._values.dtype != dtype
+                or len(self._done) != shape[0]
+            ):
+                raise ValueError("Stored file doesn't match the trajectory")
+        except (FileNotFoundError, ValueError):
+            self._values = np.lib.format.open_memmap(
+                self.path, mode="w+", dtype=dtype, shape=shape
+            )
+            self._done = np.lib.format.open_memmap(
+                self.path_done, mode="w+", dtype=bool, shape=(shape[0],)
+            )
+            self._done.flush()
+
+        # a separate read-only map of the same file, so slices handed out can't be used
+        # to accidentally write back into the stored values
+        self.values: np.memmap = np.load(self.path, mmap_mode="r")
+
+    def __len__(self) -> int:
+        return len(self.frames)
+
+    def index(self, frame: int) -> int | None:
+        "Return the index into the stored values for a frame, or None if not stored"
+        i = int(np.searchsorted(self.frames, frame))
+        if i < len(self.frames) and self.frames[i] == frame:
+            return i
+        return None
+
+    def get(self, frame: int) -> np.ndarray | None:
+        "Return the values for a frame, or None if they haven't been written yet"
+        i = self.index(frame)
+        if i is None or not self._done[i]:
+            return None
+        return self.values[i]
+
+    @property
+    def progress(self) -> float:
+        "Fraction of the frames that have been written, between 0 and 1"
+        if len(self) == 0:
+            return 1.0
+        return float(np.count_nonzero(self._done)) / len(self)
+
+    @property
+    def is_complete(self) -> bool:
+        return bool(np.all(self._done))
+
+    def flush(self, done: npt.ArrayLike | None = None) -> None:
+        """
+        Write the values to disk, and only then mark the frames selected by `done` as
+        complete, so frames are never marked complete without their values.
+        """
+        self._values.flush()
+        if done is not None:
+            self._done[done] = True
+        self._done.flush()
+
+    def _remove_files(self) -> None:
+        del self.values, self._values, self._done
+        for path in (self.path, self.path_done):
+            if path.exists():
+                os.remove(path)
+
+
+class PositionBake(FrameArray):
+    """
+    Atom positions for a set of frames, decoded once into a memory-mapped file on disk.
+
+    The positions are stored pre-scaled as a float32 array of shape
+    (n_frames, n_atoms, 3) in the cache directory, keyed by the trajectory's path, size
+    and modification time. After baking, positions for any frame are a zero-copy slice
+    into the file, giving fast random access both forwards and backwards in time.
+
+    Which frames have been written is stored alongside the positions, so a bake which
+    was cancelled or interrupted resumes where it left off.
+
+    Parameters
+    ----------
+    reader : MDAnalysis.coordinates.base.ProtoReader
+        The reader of the trajectory to bake. A copy of the reader is used for baking,
+        the original is not modified.
+    frames : ArrayLike | None, optional
+        The trajectory frames to bake, by default all frames.
+    world_scale : float, optional
+        Scale applied to the positions as they are baked, by default 0.01
+    indices : ArrayLike | None, optional
+        Only bake the positions of the atoms at these indices, by default all atoms.
+    directory : str | Path | None, optional
+        Directory to store the baked files in, by default `BAKE_DIR`.
+    """
+
+    def __init__(
+        self,
+        reader,
+        frames: npt.ArrayLike | None = None,
+        world_scale: float = 0.01,
+        indices: npt.ArrayLike | None = None,
+        directory: str | Path | None = None,
+    ):
+        if frames is None:
+            frames = np.arange(reader.n_frames)
+        frames = np.unique(np.asarray(frames, dtype=int))
+        self.world_scale = world_scale
+        self.directory = Path(directory or BAKE_DIR)
+        self._reader = reader.copy()
+        self.indices = None if indices is None else np.asarray(indices, dtype=int)
+        if self.indices is None:
+            self.n_atoms: int = self._reader.n_atoms
+            subset = ()
+        else:
+            self.n_atoms = len(self.indices)
+            subset = (hashlib.sha1(self.indices.tobytes()).hexdigest(),)
+
+        key = _trajectory_key(
+            reader.filename,
+            self.n_atoms,
+            world_scale,
+            hashlib.sha1(frames.tobytes()).hexdigest(),
+            *subset,
+        )
+        super().__init__(self.directory / f"{key}.npy", frames, shape=(self.n_atoms, 3))
+        self._open_dimensions()
+
+        self._executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="MNBake")
+        self._future: Future | None = None
+        self._cancel = threading.Event()
+
+    def _open_dimensions(self) -> None:
+        # unit cell dimensions for each frame, stored alongside the positions and with
+        # NaN for frames without a unit cell
+        self.path_dimensions = self.path.with_suffix(".dims.npy")
+        shape = (len(self.frames), 6)
+        try:
+            self._dimensions = np.load(self.path_dimensions, mmap_mode="r+")
+            if self._dimensions.shape != shape:
+                raise ValueError("Stored dimensions don't match the trajectory")
+        except (FileNotFoundError, ValueError):
+            self._dimensions = np.lib.format.open_memmap(
+                self.path_dimensions, mode="w+", dtype=np.float32, shape=shape
+            )
+            # the dimensions weren't stored with the positions, so they are rebaked
+            self._done[:] = False
+            self._done.flush()
+
+    @property
+    def positions(self) -> np.memmap:
+        return self.values
+
+    def flush(self, done: npt.ArrayLike | None = None) -> None:
+        self._dimensions.flush()
+        super().flush(done)
+
+    def get_dimensions(self, frame: int) -> np.ndarray | None:
+        "Return the unit cell dimensions for a frame, or None if not baked or no cell"
+        i = self.index(frame)
+        if i is None or not self._done[i] or np.isnan(self._dimensions[i, 0]):
+            return None
+        return np.array(self._dimensions[i])
+
+    @property
+    def is_baking(self) -> bool:
+        return self._future is not None and not self._future.done()
+
+    def bake(self, background: bool = False, flush_every: int = 50) -> None:
+        """
+        Decode and write all of the frames that haven't yet been baked.
+
+        Parameters
+        ----------
+        background : bool, optional
+            Bake on a background thread and return immediately, with `progress`
+            reporting how far through baking is. By default False.
+        flush_every : int, optional
+            Number of frames to write before flushing to disk, by default 50.
+        """
+        if self.is_baking:
+            return
+        self._cancel.clear()
+        if background:
+            self._future = self._executor.submit(self._bake, flush_every)
+        else:
+            self._bake(flush_every)
+
+    def _bake(self, flush_every: int) -> None:
+        todo = np.flatnonzero(~self._done)
+        # the frames written since the last flush, which are marked as done once their
+        # positions are on disk
+        written = np.zeros(len(self), dtype=bool)
+        for n, i in enumerate(todo, start=1):
+            if self._cancel.is_set():
+                break
+            frame = int(self.frames[i])
+            # decode sequentially where we can, only seeking when frames are skipped
+            if frame > 0 and self._reader.ts.frame == frame - 1:
+                ts = self._reader.next()
+            else:
+                ts = self._reader[frame]
+            positions = ts.positions
+            if self.indices is not None:
+                positions = positions[self.indices]
+            self._values[i] = positions * self.world_scale
+            self._dimensions[i] = np.nan if ts.dimensions is None else ts.dimensions
+            written[i] = True
+            if n % flush_every == 0:
+                self.flush(written)
+                written[:] = False
+        self.flush(written)
+
+    def wait(self) -> None:
+        "Block until a background bake has finished"
+        if self._future is not None:
+            self._future.result()
+
+    def cancel(self) -> None:
+        "Stop a background bake, it can be resumed later by calling `bake()` again"
+        self._cancel.set()
+        self.wait()
+
+    def close(self) -> None:
+        "Stop any baking and close the reader, the baked files are kept on disk"
+        self.cancel()
+        self._executor.shutdown(wait=True)
+        self._reader.close()
+
+    def delete(self) -> None:
+        "Close and remove the baked files from disk"
+        self.close()
+        del self._dimensions
+        if self.path_dimensions.exists():
+            os.remove(self.path_dimensions)
+        self._remove_files()
@@ -1,3 +1,8 @@
+import itertools
+import threading
+import time
+from collections import OrderedDict
+from functools import cached_property
 from typing import Dict, Callable
 
 import bpy
@@ -9,30 +14,165 @@ from math import floor, remainder
 from enum import Enum
 
 from ... import data
-from ..base import MolecularEntity, EntityType
+from ...profiling import stage
+from ..attributes import Attribute, AttributePipeline
+from ..base import LAZY_ALWAYS, MolecularEntity, EntityType, use_lazy_attributes
 from ...blender import coll, nodes, path_resolve
 import databpy
+from databpy.object import LinkedObjectError
+from MDAnalysis.coordinates.memory import MemoryReader
 from ...utils import (
-    correct_periodic_positions,
-    frame_mapper,
+    frame_lookup_table,
+    frame_mapping_from_times,
     frames_to_average,
     fraction,
+    lookup,
+    minimum_image,
 )
+from .bake import PositionBake
+from .precompute import PrecomputedCalculation
+from .prefetch import FramePrefetcher
+from .proxy import TrajectoryProxy
 from .selections import Selection
 
 
+# a number for each universe given to a trajectory, which unlike `id()` is never reused
+# for a later universe once the previous one is freed
+_UNIVERSE_GENERATIONS = itertools.count()
+_SELECTION_LOCK = threading.Lock()
+
+
 class Trajectory(MolecularEntity):
-    def __init__(self, universe: mda.Universe, world_scale: float = 0.01):
+    # attributes which hold background workers, open file handles or the inputs of the
+    # last update, these aren't pickled with the session and are recreated after loading
+    _TRANSIENT = (
+        "_prefetcher",
+        "_bake",
+        "_precomputed",
+        "_last_update",
+        "_window",
+        "_endpoints",
+        "_dimensions",
+        "_frame_lut",
+        "_settings",
+        "_pending",
+        "_universe_generation",
+    )
+    # playback settings read from the object, which are snapshot at the start of an
+    # update so that the positions can be computed away from the main thread
+    _SETTINGS = (
+        "subframes",
+        "offset",
+        "average",
+        "prefetch",
+        "correct_periodic",
+        "interpolate",
+    )
+    # attributes which depend only on the topology, these are computed once and cached
+    # until the universe is replaced
+    _TOPOLOGY_CACHED = (
+        "atoms",
+        "subset_indices",
+        "elements",
+        "atomic_number",
+        "res_num",
+        "atom_name_num",
+        "is_nucleic",
+        "is_peptide",
+        "is_lipid",
+        "is_backbone",
+        "is_alpha_carbon",
+        "is_solvent",
+    )
+
+    # class level defaults for sessions pickled before subsets and frame windows could
+    # be imported
+    _subset: str | None = None
+    _frame_window: tuple = (None, None, None)
+    _proxy: TrajectoryProxy | None = None
+
+    def __init__(
+        self,
+        universe: mda.Universe,
+        world_scale: float = 0.01,
+        subset: str | None = None,
+        start: int | None = None,
+        stop: int | None = None,
+        step: int | None = None,
+    ):
         super().__init__()
-        self.universe: mda.Universe = universe
+        self._init_transient()
+        self._subset = subset or None
+        if step is not None and step < 1:
+            raise ValueError(f"Frame step must be at least 1, not {step}")
+        self._frame_window = (start, stop, step)
+        self.universe = universe
+        if self.subset is not None and self.n_atoms == 0:
+            raise ValueError(f"Subset `{self.subset}` doesn't match any atoms")
+        if self.n_frames == 0:
+            raise ValueError(
+                f"No frames between start={start}, stop={stop} with step={step}"
+            )
         self.selections: Dict[str, Selection] = {}
         self.calculations: Dict[str, Callable] = {}
         self.world_scale = world_scale
-        self.frame_mapping: npt.NDArray[np.int64] | None = None
+        self._frame_mapping: npt.NDArray[np.int64] | None = None
         self.cache: dict = {}
         self._entity_type = EntityType.MD
         self._updating_in_progress = False
 
+    def _init_transient(self) -> None:
+        self._prefetcher: FramePrefetcher | None = None
+        self._bake: PositionBake | None = None
+        self._precomputed: Dict[str, PrecomputedCalculation] = {}
+        self._last_update: dict = {}
+        self._window: dict = {}
+        self._endpoints: dict = {}
+        self._dimensions: OrderedDict[int, np.ndarray | None] = OrderedDict()
+        self._frame_lut: tuple | None = None
+        self._settings: dict | None = None
+        self._pending: dict | None = None
+        self._universe_generation = next(_UNIVERSE_GENERATIONS)
+
+    def __getstate__(self):
+        state = self.__dict__.copy()
+        for name in self._TRANSIENT + self._TOPOLOGY_CACHED:
+            state.pop(name, None)
+        return state
+
+    def __setstate__(self, state):
+        # sessions saved before `universe` became a property stored it directly
+        if "universe" in state:
+            state["_universe"] = state.pop("universe")
+        if "frame_mapping" in state:
+            state["_frame_mapping"] = state.pop("frame_mapping")
+        self.__dict__.update(state)
+        self._init_transient()
+
+    @property
+    def universe(self) -> mda.Universe:
+        return self._universe
+
+    @universe.setter
+    def universe(self, value: mda.Universe) -> None:
+        self._universe = value
+        self._universe_generation = next(_UNIVERSE_GENERATIONS)
+        # anything read from the previous trajectory is no longer valid
+        self._frame_lut = None
+        self.clear_topology_cache()
+        self._dimensions.clear()
+        self._window = {}
+        self._endpoints = {}
+        self.mark_dirty()
+        self.stop_prefetch()
+        self.clear_bake()
+        self.clear_precomputed()
+
+    def clear_topology_cache(self) -> None:
+        "Discard the cached topology attributes, so they are recomputed on next access"
+        for name in self._TOPOLOGY_CACHED:
+            self.__dict__.pop(name, None)
+
     def selection_from_ui(self, item):
         self.add_selection(
             name=item.name,
@@ -97,16 +237,35 @@ class Trajectory(MolecularEntity):
         return sel
 
     @property
-    def is_orthorhombic(self):
-        dim = self.universe.dimensions
-        if dim is None:
-            return False
-
-        return np.allclose(dim[3:], 90.0)
+    def is_periodic(self) -> bool:
+        "Whether the trajectory has a unit cell, so periodic boundaries can be corrected"
+        return self.universe.dimensions is not None
 
     @property
+    def subset(self) -> str | None:
+        "Selection of the atoms imported from the universe, or None for all atoms"
+        return self._subset
+
+    @cached_property
     def atoms(self) -> mda.AtomGroup:
-        return self.universe.atoms
+        "The atoms of the universe which make up the object"
+        if self.subset is None:
+            return self.universe.atoms
+        return self.universe.select_atoms(self.subset)
+
+    @cached_property
+    def subset_indices(self) -> npt.NDArray[np.int64] | None:
+        "Index into the universe atoms of each vertex, or None if all atoms are used"
+        if self.subset is None:
+            return None
+        return self.atoms.ix
+
+    def _to_subset(self, values: np.ndarray) -> np.ndarray:
+        "Return the values for the imported atoms, from values for all universe atoms"
+        indices = self.subset_indices
+        if indices is None or len(values) != self.universe.atoms.n_atoms:
+            return values
+        return values[indices]
 
     @property
     def n_atoms(self) -> int:
@@ -114,7 +273,16 @@ class Trajectory(MolecularEntity):
 
     @staticmethod
     def bool_selection(ag, selection, **kwargs) -> np.ndarray:
-        return np.isin(ag.ix, ag.select_atoms(selection, **kwargs).ix).astype(bool)
+        # the attributes are computed on a pool of threads, but selecting atoms isn't
+        # thread safe in MDAnalysis so only one selection is made at a time
+        with _SELECTION_LOCK:
+            selected = ag.select_atoms(selection, **kwargs)
+        if ag.n_atoms != ag.universe.atoms.n_atoms:
+            return np.isin(ag.ix, selected.ix)
+        # for all of the atoms in the universe, ix is also the index into the mask
+        mask = np.zeros(ag.n_atoms, dtype=bool)
+        mask[selected.ix] = True
+        return mask
 
     @property
     def univ_positions(self) -> np.ndarray:
@@ -122,47 +290,60 @@ class Trajectory(MolecularEntity):
 
     @property
     def bonds(self) -> np.ndarray:
-        # the code to remap indices for a selection was removed as we don't subset the trajectory anymore
-        # when importing it, everything is imported and the selections just update
-        if hasattr(self.atoms, "bonds"):
-            return self.atoms.bonds.indices
-        else:
+        if not hasattr(self.universe.atoms, "bonds"):
             return None
-
-    @property
+        bonds = self.universe.atoms.bonds.indices
+        indices = self.subset_indices
+        if indices is None:
+            return bonds
+
+        # only keep the bonds between imported atoms, remapped to the vertex indices
+        ix_map = np.full(self.universe.atoms.n_atoms, -1, dtype=int)
+        ix_map[indices] = np.arange(len(indices))
+        bonds = ix_map[bonds]
+        return bonds[np.all(bonds >= 0, axis=1)]
+
+    @cached_property
     def elements(self) -> np.ndarray:
         if hasattr(self.atoms, "elements"):
             return self.atoms.elements
 
+        # only guess once per unique atom name rather than for every atom
         try:
-            guessed_elements = [
-                x
-                if x in data.elements.keys()
-                else mda.topology.guessers.guess_atom_element(x)
-                for x in self.atoms.names
-            ]
-            return np.array(guessed_elements)
+            return lookup(
+                lambda x: (
+                    x
+                    if x in data.elements.keys()
+                    else mda.topology.guessers.guess_atom_element(x)
+                ),
+                self.atoms.names,
+            )
 
         except Exception:
             return np.repeat("X", self.n_atoms)
 
-    @property
+    @cached_property
     def atomic_number(self) -> np.ndarray:
-        return np.array(
-            [
-                data.elements.get(element, data.elements.get("X")).get("atomic_number")
-                for element in self.elements
-            ]
+        return self._atomic_number(self.elements)
+
+    @staticmethod
+    def _atomic_number(elements: np.ndarray) -> np.ndarray:
+        return lookup(
+            lambda x: data.elements.get(x, data.elements.get("X")).get("atomic_number"),
+            elements,
+            dtype=int,
         )
 
     @property
     def vdw_radii(self) -> np.ndarray:
+        return self._vdw_radii(self.elements)
+
+    def _vdw_radii(self, elements: np.ndarray) -> np.ndarray:
         return (
-            np.array(
-                [
-                    data.elements.get(element, {}).get("vdw_radii", 100)
-                    for element in self.elements
-                ]
+            lookup(
+                lambda x: data.elements.get(x, {}).get("vdw_radii", 100),
+                elements,
+                dtype=float,
             )
             * 0.01  # pm to Angstrom
             * self.world_scale  # Angstrom to world scale
@@ -170,19 +351,35 @@ class Trajectory(MolecularEntity):
 
     @property
     def mass(self) -> np.ndarray:
+        return self._mass(self.elements)
+
+    def _mass(self, elements: np.ndarray) -> np.ndarray:
         # units: daltons
         if hasattr(self.atoms, "masses"):
-            return np.array([x.mass for x in self.atoms])
+            return np.asarray(self.atoms.masses, dtype=float)
         else:
-            masses = [
-                data.elements.get(element, {"standard_mass": 0}).get("standard_mass")
-                for element in self.elements
-            ]
-            return np.array(masses)
+            return lookup(
+                lambda x: data.elements.get(x, {"standard_mass": 0}).get(
+                    "standard_mass"
+                ),
+                elements,
+                dtype=float,
+            )
+
+    @property
+    def frames(self) -> range:
+        """
+        The universe frames which make up the trajectory.
+
+        Like slicing an MDAnalysis trajectory this is lazy, so a window over a long
+        trajectory doesn't cost anything in proportion to its total number of frames.
+        Frame numbers used elsewhere on the trajectory index into this range.
+        """
+        return range(self.universe.trajectory.n_frames)[slice(*self._frame_window)]
 
     @property
     def n_frames(self) -> int:
-        return self.universe.trajectory.n_frames
+        return len(self.frames)
 
     @property
     def res_id(self) -> np.ndarray:
@@ -193,10 +390,17 @@ class Trajectory(MolecularEntity):
         """
         Get the current frame number of the linked `Universe.trajectory`.
 
+        The frame number is within the frames of the trajectory, if the universe is
+        currently at a frame outside of them the universe's frame is returned.
+
         Returns:
             int: Current frame number in the trajectory.
         """
-        return self.universe.trajectory.frame
+        frame = self.universe.trajectory.frame
+        frames = self.frames
+        if frame in frames:
+            return frames.index(frame)
+        return frame
 
     @uframe.setter
     def uframe(self, value) -> None:
@@ -212,26 +416,27 @@ class Trajectory(MolecularEntity):
         Returns:
             None
         """
+        value = self.frames[min(max(int(value), 0), self.n_frames - 1)]
         if self.universe.trajectory.frame != value:
             self.universe.trajectory[value]
 
     @property
     def res_name(self) -> np.ndarray:
-        return np.array(list(map(lambda x: x[0:3], self.atoms.resnames)))
+        # casting to a 3 character string truncates longer residue names
+        return np.asarray(self.atoms.resnames).astype("U3")
 
     @property
     def atom_id(self) -> np.ndarray:
         return self.universe.atoms.atom_id
 
-    @property
+    @cached_property
     def res_num(self) -> np.ndarray:
-        return np.array(
-            [
-                data.residues.get(res_name, data.residues.get("UNK")).get(
-                    "res_name_num"
-                )
-                for res_name in self.res_name
-            ]
+        return lookup(
+            lambda x: data.residues.get(x, data.residues.get("UNK")).get(
+                "res_name_num"
+            ),
+            self.res_name,
+            dtype=int,
         )
 
     @property
@@ -287,135 +492,92 @@ class Trajectory(MolecularEntity):
         else:
             return np.zeros(self.n_atoms)
 
-    @property
+    @cached_property
     def atom_name_num(self) -> np.ndarray:
         if hasattr(self.atoms, "names"):
-            return np.array(
-                list(map(lambda x: data.atom_names.get(x, -1), self.atom_name))
+            return lookup(
+                lambda x: data.atom_names.get(x, -1), self.atom_name, dtype=int
             )
         else:
             return np.repeat(-1, self.n_atoms)
 
-    @property
+    @cached_property
     def is_nucleic(self) -> np.ndarray:
         return self.bool_selection(self.atoms, "nucleic")
 
-    @property
+    @cached_property
     def is_peptide(self) -> np.ndarray:
         return self.bool_selection(self.atoms, "protein or (name BB SC*)")
 
-    @property
+    @cached_property
     def is_lipid(self) -> np.ndarray:
         return np.isin(self.atoms.resnames, data.lipid_names)
 
-    @property
+    @cached_property
     def is_backbone(self) -> np.ndarray:
         return self.bool_selection(self.atoms, "backbone or nucleicbackbone or name BB")
 
-    @property
+    @cached_property
     def is_alpha_carbon(self) -> np.ndarray:
         return self.bool_selection(self.atoms, "name CA or name BB")
 
-    @property
+    @cached_property
     def is_solvent(self) -> np.ndarray:
         return self.bool_selection(
             self.atoms, "name OW or name HW1 or name HW2 or resname W or resname PW"
         )
 
     @property
-    def _attributes_2_blender(self):
+    def _attributes(self) -> tuple[Attribute, ...]:
         """
         The attributes that will be added to the Blender object.
         """
-        return {
-            "atomic_number": {
-                "value": self.atomic_number,
-                "type": "INT",
-                "domain": "POINT",
-            },
-            "vdw_radii": {
-                "value": self.vdw_radii,
-                "type": "FLOAT",
-                "domain": "POINT",
-            },
-            "mass": {
-                "value": self.mass,
-                "type": "FLOAT",
-                "domain": "POINT",
-            },
-            "res_id": {
-                "value": self.res_id,
-                "type": "INT",
-                "domain": "POINT",
-            },
-            "segid": {
-                "value": self.segindices,
-                "type": "INT",
-                "domain": "POINT",
-            },
-            "res_name": {
-                "value": self.res_num,
-                "type": "INT",
-                "domain": "POINT",
-            },
-            "b_factor": {
-                "value": self.b_factor,
-                "type": "FLOAT",
-                "domain": "POINT",
-            },
-            "chain_id": {
-                "value": self.chain_id_num,
-                "type": "INT",
-                "domain": "POINT",
-            },
-            "atom_types": {
-                "value": self.atom_type_num,
-                "type": "INT",
-                "domain": "POINT",
-            },
-            "atom_name": {
-                "value": self.atom_name_num,
-                "type": "INT",
-                "domain": "POINT",
-            },
-            "is_backbone": {
-                "value": self.is_backbone,
-                "type": "BOOLEAN",
-                "domain": "POINT",
-            },
-            "is_alpha_carbon": {
-                "value": self.is_alpha_carbon,
-                "type": "BOOLEAN",
-                "domain": "POINT",
-            },
-            "is_solvent": {
-                "value": self.is_solvent,
-                "type": "BOOLEAN",
-                "domain": "POINT",
-            },
-            "is_nucleic": {
-                "value": self.is_nucleic,
-                "type": "BOOLEAN",
-                "domain": "POINT",
-            },
-            "is_lipid": {
-                "value": self.is_lipid,
-                "type": "BOOLEAN",
-                "domain": "POINT",
-            },
-            "is_peptide": {
-                "value": self.is_peptide,
-                "type": "BOOLEAN",
-                "domain": "POINT",
-            },
-        }
+        return (
+            # computed once for the attributes which take them, rather than by each of
+            # them at the same time on the pipeline's threads
+            Attribute("elements", lambda: self.elements, store=False),
+            Attribute(
+                "atomic_number", self._atomic_number, "INT", inputs=("elements",)
+            ),
+            Attribute("vdw_radii", self._vdw_radii, "FLOAT", inputs=("elements",)),
+            Attribute("mass", self._mass, "FLOAT", inputs=("elements",)),
+            Attribute("res_id", lambda: self.res_id, "INT"),
+            Attribute("segid", lambda: self.segindices, "INT"),
+            Attribute("res_name", lambda: self.res_num, "INT"),
+            Attribute("b_factor", lambda: self.b_factor, "FLOAT"),
+            Attribute("chain_id", lambda: self.chain_id_num, "INT"),
+            Attribute("atom_types", lambda: self.atom_type_num, "INT"),
+            Attribute("atom_name", lambda: self.atom_name_num, "INT"),
+            Attribute("is_backbone", lambda: self.is_backbone, "BOOLEAN"),
+            Attribute("is_alpha_carbon", lambda: self.is_alpha_carbon, "BOOLEAN"),
+            Attribute("is_solvent", lambda: self.is_solvent, "BOOLEAN"),
+            Attribute("is_nucleic", lambda: self.is_nucleic, "BOOLEAN"),
+            Attribute("is_lipid", lambda: self.is_lipid, "BOOLEAN"),
+            Attribute("is_peptide", lambda: self.is_peptide, "BOOLEAN"),
+        )
+
+    def _attribute_definitions(self) -> tuple[Attribute, ...]:
+        return self._attributes
+
+    @property
+    def in_memory(self) -> bool:
+        "Whether the frames are held in memory rather than read from a file"
+        # a universe transferred to memory keeps the filename it was read from
+        return isinstance(self.universe.trajectory, MemoryReader)
 
     def save_filepaths_on_object(self) -> None:
         obj = self.object
-        obj.mn.filepath_topology = str(path_resolve(self.universe.filename))
-        obj.mn.filepath_trajectory = str(
-            path_resolve(self.universe.trajectory.filename)
-        )
+        if self.in_memory:
+            obj.mn.filepath_topology = ""
+            obj.mn.filepath_trajectory = ""
+        else:
+            obj.mn.filepath_topology = str(path_resolve(self.universe.filename))
+            obj.mn.filepath_trajectory = str(
+                path_resolve(self.universe.trajectory.filename)
+            )
+        obj.mn.subset = self.subset or ""
+        frames = self.frames
+        obj["frame_window"] = [frames.start, frames.stop, frames.step]
 
     def reset_playback(self) -> None:
         "Set the playback settings to their default values"
@@ -435,20 +597,18 @@ class Trajectory(MolecularEntity):
             edges=self.bonds,
         )
 
-        for att_name, att in self._attributes_2_blender.items():
-            try:
-                self.store_named_attribute(
-                    data=att["value"],
-                    name=att_name,
-                    atype=att["type"],
-                    domain=att["domain"],
-                )
-            except Exception as e:
-                print(e)
+        pipeline = AttributePipeline(self._attributes)
+        # with lazy attributes, the others are added once the node tree is known
+        if self._lazy_attributes:
+            pipeline = pipeline.select(LAZY_ALWAYS)
+        report = pipeline.run(self)
+        for name, e in report.errors.items():
+            print(f"Unable to add attribute `{name}`: {e}")
 
         if hasattr(self.atoms, "segindices"):
             segs = []
-            for seg in self.atoms.segments:
+            # the segindices index into all of the universe's segments
+            for seg in self.universe.segments:
                 segs.append(seg.atoms[0].segid)
 
             self.object["segments"] = segs
@@ -462,8 +622,11 @@ class Trajectory(MolecularEntity):
         self,
         name: str = "NewUniverseObject",
         style: str | None = "vdw",
+        lazy_attributes: bool | None = None,
     ):
+        self._lazy_attributes = use_lazy_attributes(lazy_attributes)
         self._create_object(style=style, name=name)
+        self.materialize_attributes()
 
         self.object["chain_ids"] = self.chain_ids
 
@@ -472,6 +635,7 @@ class Trajectory(MolecularEntity):
 
         self.object.mn.entity_type = self._entity_type.value
         self.save_filepaths_on_object()
+        self.mark_dirty()
         bpy.context.view_layer.objects.active = self.object
 
         return self.object
@@ -479,7 +643,16 @@ class Trajectory(MolecularEntity):
     def _update_calculations(self):
         for name, func in self.calculations.items():
             try:
-                self.store_named_attribute(data=func(self.universe), name=name)
+                data = self._precomputed_at_frame(name, self._frame)
+                if data is None:
+                    data = func(self.universe)
+                data = self._to_subset(np.asarray(data))
+                # don't write the attribute again if the result hasn't changed
+                previous = self._last_update.get(("calculation", name))
+                if previous is not None and np.array_equal(previous, data):
+                    continue
+                self.store_named_attribute(data=data, name=name)
+                self._last_update[("calculation", name)] = np.array(data, copy=True)
             except Exception as e:
                 print(e)
 
@@ -505,9 +678,15 @@ class Trajectory(MolecularEntity):
     def frame(self, value: int) -> None:
         self.object.mn.frame = value
 
+    def _setting(self, name: str):
+        "Return a playback setting, from the snapshot if an update is in progress"
+        if self._settings is not None:
+            return self._settings[name]
+        return getattr(self.object.mn, name)
+
     @property
     def subframes(self) -> int:
-        return self.object.mn.subframes
+        return self._setting("subframes")
 
     @subframes.setter
     def subframes(self, value: int) -> None:
@@ -515,7 +694,7 @@ class Trajectory(MolecularEntity):
 
     @property
     def offset(self) -> int:
-        return self.object.mn.offset
+        return self._setting("offset")
 
     @offset.setter
     def offset(self, value: int) -> None:
@@ -523,15 +702,23 @@ class Trajectory(MolecularEntity):
 
     @property
     def average(self) -> int:
-        return self.object.mn.average
+        return self._setting("average")
 
     @average.setter
     def average(self, value: int) -> None:
         self.object.mn.average = value
 
+    @property
+    def prefetch(self) -> bool:
+        return self._setting("prefetch")
+
+    @prefetch.setter
+    def prefetch(self, value: bool) -> None:
+        self.object.mn.prefetch = value
+
     @property
     def correct_periodic(self) -> bool:
-        return self.object.mn.correct_periodic
+        return self._setting("correct_periodic")
 
     @correct_periodic.setter
     def correct_periodic(self, value: bool) -> None:
@@ -539,7 +726,7 @@ class Trajectory(MolecularEntity):
 
     @property
     def interpolate(self) -> bool:
-        return self.object.mn.interpolate
+        return self._setting("interpolate")
 
     @interpolate.setter
     def interpolate(self, value: bool) -> None:
@@ -547,22 +734,29 @@ class Trajectory(MolecularEntity):
 
     def _frame_range(self, frame: int):
         "Get the trajectory frame numbers over which we will average values"
-        return frames_to_average(frame, self.average)
-
-    def _cache_ordered(self) -> np.ndarray:
-        "Return the cached frames as a 3D array, in chronological order"
-        keys = list(self.cache.keys())
-        keys.sort()
-        return np.array([self.cache[k] for k in keys])
-
-    def adjust_periodic_positions(
-        self, pos1: np.ndarray, pos2: np.ndarray
-    ) -> np.ndarray:
-        "Returns the input pos2 with a periodic correction potentially applied"
-        if self.correct_periodic and self.is_orthorhombic:
-            return correct_periodic_positions(pos1, pos2, self.universe.dimensions[:3])
-        else:
-            return pos2
+        return frames_to_average(frame, self.average, upper_bound=self.n_frames - 1)
+
+    def _scale_dimensions(self, dimensions: np.ndarray | None) -> np.ndarray | None:
+        "Scale the lengths of the unit cell dimensions to match the scaled positions"
+        if dimensions is None:
+            return None
+        dimensions = np.array(dimensions, dtype=float)
+        dimensions[:3] *= self.world_scale
+        return dimensions
+
+    def _remember_dimensions(self, frame: int, dimensions: np.ndarray | None) -> None:
+        self._dimensions[frame] = None if dimensions is None else dimensions.copy()
+        self._dimensions.move_to_end(frame)
+        # only the dimensions for the frames around the playhead are needed
+        while len(self._dimensions) > 64:
+            self._dimensions.popitem(last=False)
+
+    def _box_at_frame(self, frame: int) -> np.ndarray | None:
+        "Return the scaled unit cell dimensions for the universe frame, or None"
+        if frame not in self._dimensions:
+            # reading the positions records the dimensions from wherever they came from
+            self._position_at_frame(frame)
+        return self._scale_dimensions(self._dimensions.get(frame))
 
     def position_cache_mean(self, frame: int) -> np.ndarray:
         "Return the mean position from the currently cached positions"
@@ -571,30 +765,497 @@ class Trajectory(MolecularEntity):
         if self.average == 0:
             return self.cache[frame]
 
-        array = self._cache_ordered()
-        if self.correct_periodic and self.is_orthorhombic:
-            # we want to correct the periodic boundary crossing in refernce to the fist
-            # frame we are averaging
-            for i, pos in enumerate(array):
-                if i == 0:
-                    continue
-                array[i] = self.adjust_periodic_positions(array[0], pos)
+        return self._window_mean(frame)
+
+    def _window_settings(self) -> tuple:
+        "The settings which if changed invalidate the averaging window and endpoints"
+        return (
+            self._universe_generation,
+            self.average,
+            self.correct_periodic,
+            self.world_scale,
+        )
 
-        return np.mean(array, axis=0)
+    def _window_mean(self, frame: int) -> np.ndarray:
+        """
+        Return the mean position over the averaging window around the frame.
+
+        A running sum of the frames in the window is kept, so as the window slides only
+        the frame that enters is added and the frame that leaves is subtracted. When
+        correcting for periodic boundaries, each entering frame is unwrapped against its
+        neighbour in the window, and the mean is then wrapped back to the minimum image
+        of the first frame of the window.
+        """
+        frames = [int(f) for f in self._frame_range(frame)]
+        periodic = self.correct_periodic and self.is_periodic
+        window = self._window
+
+        if window.get("settings") != self._window_settings() or not any(
+            f in window["positions"] for f in frames
+        ):
+            # nothing to reuse, so start again to avoid accumulating rounding errors
+            window.clear()
+            window["settings"] = self._window_settings()
+            window["positions"] = {}
+            window["sum"] = np.zeros((self.n_atoms, 3), dtype=np.float64)
+
+        positions: Dict[int, np.ndarray] = window["positions"]
+        for f in [f for f in positions if f not in frames]:
+            window["sum"] -= positions.pop(f)
+
+        for f in sorted(
+            (f for f in frames if f not in positions),
+            key=lambda f: min((abs(f - g) for g in positions), default=0),
+        ):
+            pos = np.array(self.cache[f], dtype=np.float64)
+            box = self._box_at_frame(f) if periodic else None
+            if box is not None and positions:
+                neighbour = min(positions, key=lambda g: abs(f - g))
+                minimum_image(positions[neighbour], pos, box, out=pos)
+            positions[f] = pos
+            window["sum"] += pos
+
+        mean = window["sum"] / len(positions)
+        box = self._box_at_frame(frames[0]) if periodic else None
+        if box is not None:
+            minimum_image(self.cache[frames[0]], mean, box, out=mean)
+        return mean.astype(np.float32)
 
     def set_frame(self, frame: int) -> None:
         """
         Update the positions, selections and calculations for this trajectory, based on
         frame number of the current scene, not the frame number of the Universe
         """
-        self._frame = self.frame_mapper(frame)
-        self._update_positions(frame)
-        self._update_selections()
-        self._update_calculations()
+        self.begin_frame(frame)
+        try:
+            self.compute_frame()
+        finally:
+            self.apply_frame()
+
+    def begin_frame(self, frame: int, proxy_only: bool = False) -> None:
+        """
+        First step of updating to a new scene frame, which has to run on the main thread.
+
+        Takes a snapshot of the playback settings from the object and works out which
+        of the positions, selections and calculations need updating. With `proxy_only`
+        and a proxy created, only the proxy is updated and the object is left for the
+        next full update.
+        """
+        with stage(self.uuid, "begin"):
+            # create or close the prefetcher here, as doing so can update the object
+            self._get_prefetcher()
+            self._settings = {
+                name: getattr(self.object.mn, name) for name in self._SETTINGS
+            }
+            self._frame = self.frame_mapper(frame)
+
+            # only update what could have changed since the last call, as multiple
+            # scene frames can map onto the same universe frame
+            proxy_only = proxy_only and self.proxy is not None
+            keys = {
+                "positions": self._positions_key(frame),
+                "selections": self._selections_key(),
+                "calculations": self._calculations_key(),
+            }
+            self._pending = {
+                "frame": frame,
+                "positions": None,
+                "proxy_only": proxy_only,
+                # the proxy is updated separately from the object, so has its own keys
+                "owner": "proxy" if proxy_only else "object",
+                "keys": keys,
+            }
+            for name, key in keys.items():
+                self._pending[f"update_{name}"] = self._is_dirty(
+                    (self._pending["owner"], name), key
+                )
+
+    def compute_frame(self) -> None:
+        """
+        Second step of updating to a new scene frame, which is safe to run on a worker
+        thread as it doesn't access any Blender data.
+
+        Reads the coordinates and computes the new positions with any interpolation,
+        averaging and periodic correction applied.
+        """
+        pending = self._pending
+        if pending is not None and pending["update_positions"]:
+            pending["positions"] = self._compute_positions(pending["frame"])
+
+    def apply_frame(self, deadline: float | None = None) -> bool:
+        """
+        Last step of updating to a new scene frame, which has to run on the main thread.
+
+        Writes the computed positions to the object, then updates the selections and
+        calculations. If `deadline` (from `time.perf_counter()`) has already passed
+        once the positions are written, the selections and calculations are deferred
+        until the next update and True is returned.
+        """
+        pending = self._pending
+        try:
+            if pending is None:
+                return False
+            if pending["proxy_only"]:
+                self._apply_proxy_frame(pending)
+                return False
+            if pending["positions"] is not None:
+                with stage(self.uuid, "write"):
+                    self.position = pending["positions"]
+                self._mark_updated(pending, "positions")
+
+            update_selections = pending["update_selections"]
+            update_calculations = pending["update_calculations"]
+            if (
+                (update_selections or update_calculations)
+                and deadline is not None
+                and time.perf_counter() > deadline
+            ):
+                # left unrecorded, so the next update writes them
+                return True
+            if update_selections or update_calculations:
+                self._sync_universe_frame()
+            if update_selections:
+                with stage(self.uuid, "selections"):
+                    self._update_selections()
+                self._mark_updated(pending, "selections")
+            if update_calculations:
+                with stage(self.uuid, "calculations"):
+                    self._update_calculations()
+                self._mark_updated(pending, "calculations")
+            return False
+        finally:
+            self._pending = None
+            self._settings = None
+
+    def _apply_proxy_frame(self, pending: dict) -> None:
+        "Write the computed positions and current selections to the proxy only"
+        selections = {}
+        if pending["update_selections"]:
+            self._sync_universe_frame()
+            for sel in self.object.mn_trajectory_selections:
+                selection = self.selections[sel.name]
+                if not selection.updating:
+                    continue
+                selection.set_atom_group(sel.selection_str)
+                selections[sel.name] = selection.to_mask()
+
+        with stage(self.uuid, "proxy"):
+            self.proxy.update(positions=pending["positions"], selections=selections)
+        if pending["positions"] is not None:
+            self._mark_updated(pending, "positions")
+        if pending["update_selections"]:
+            self._mark_updated(pending, "selections")
+
+    @property
+    def proxy(self) -> TrajectoryProxy | None:
+        "The proxy used in place of the object during playback, if one was created"
+        if self._proxy is not None:
+            try:
+                self._proxy.object
+            except LinkedObjectError:
+                # the proxy object was deleted
+                self._proxy = None
+        return self._proxy
+
+    def create_proxy(self, mode: str = "residue", stride: int = 10) -> TrajectoryProxy:
+        """
+        Create a lightweight proxy object, which is updated in place of the object
+        during interactive playback.
+
+        The object is only updated when playback stops or when rendering, which for
+        very large trajectories keeps playback interactive. Selections and the
+        attributes used for coloring are aggregated onto the points of the proxy.
+
+        Parameters
+        ----------
+        mode : str, optional
+            How atoms are grouped into points of the proxy. "residue" for the centroid
+            of each residue, "backbone" for each CA or BB bead and "stride" for one
+            point per `stride` atoms. By default "residue".
+        stride : int, optional
+            Number of atoms per point for the "stride" mode, by default 10.
+
+        Returns
+        -------
+        TrajectoryProxy
+            The created proxy.
+        """
+        self.remove_proxy()
+        proxy = TrajectoryProxy(self.atoms, mode=mode, stride=stride)
+        proxy.create_object(self, name=f"{self.name}_proxy")
+        self._proxy = proxy
+        return proxy
+
+    def remove_proxy(self) -> None:
+        "Delete the proxy object, and show the object during playback again"
+        if self.proxy is not None:
+            self.show_proxy(False)
+            self.proxy.remove()
+        self._proxy = None
+
+    def show_proxy(self, show: bool) -> None:
+        "Show the proxy in the viewport in place of the object, or the object itself"
+        if self.object.hide_viewport != show:
+            self.object.hide_viewport = show
+        proxy = self.proxy
+        if proxy is not None and proxy.object.hide_viewport == show:
+            proxy.object.hide_viewport = not show
+
+    def _is_dirty(self, name: tuple, key: tuple) -> bool:
+        "Whether `key` differs from that of the last update written for `name`"
+        return self._last_update.get(name) != key
+
+    def _mark_updated(self, pending: dict, name: str) -> None:
+        "Record the key of what was just written, so the same key isn't written again"
+        self._last_update[(pending["owner"], name)] = pending["keys"][name]
+
+    def mark_dirty(self) -> None:
+        "Force the positions, selections and calculations to update on the next frame set"
+        self._last_update.clear()
+        # the universe is set before any selections are added when initialising
+        for selection in getattr(self, "selections", {}).values():
+            selection._mask_written = None
+            selection._static_written = False
+
+    def _positions_key(self, frame: int) -> tuple:
+        interpolating = self.subframes > 0 and self.interpolate
+        return (
+            self._universe_generation,
+            self._frame,
+            self._frame_pair(frame) if interpolating else None,
+            self._frame_fraction(frame) if interpolating else None,
+            self.subframes,
+            self.interpolate,
+            self.average,
+            self.correct_periodic,
+            self.world_scale,
+        )
+
+    def _selections_key(self) -> tuple:
+        return (
+            self._universe_generation,
+            self._frame,
+            tuple(
+                (sel.name, sel.selection_str, sel.updating, sel.periodic)
+                for sel in self.object.mn_trajectory_selections
+            ),
+        )
+
+    def _calculations_key(self) -> tuple:
+        return (
+            self._universe_generation,
+            self._frame,
+            # the functions themselves rather than their ids, which are kept alive by
+            # the stored key so a replaced function never compares equal
+            tuple(self.calculations.items()),
+        )
+
+    def _sync_universe_frame(self) -> None:
+        """
+        Move the Universe to the current frame if selections or calculations need it.
+
+        Positions can come from the prefetcher without moving the Universe, so only seek
+        when there is something that will be evaluated against the Universe itself.
+        """
+        needs_universe = any(
+            self._precomputed_at_frame(name, self._frame) is None
+            for name in self.calculations
+        ) or any(
+            sel.updating and not self.selections[sel.name].is_static
+            for sel in self.object.mn_trajectory_selections
+            if sel.name in self.selections
+        )
+        if needs_universe:
+            self.uframe = self._frame
+
+    def _get_prefetcher(self) -> FramePrefetcher | None:
+        "Return the prefetcher if enabled, creating or closing it as required"
+        if not self.prefetch:
+            self.stop_prefetch()
+            return None
+
+        if self._prefetcher is None:
+            try:
+                self._prefetcher = FramePrefetcher(
+                    self.universe.trajectory,
+                    world_scale=self.world_scale,
+                    indices=self.subset_indices,
+                    frames=self.frames,
+                )
+            except (NotImplementedError, TypeError, ValueError) as e:
+                # not all readers support opening a second handle on the same file
+                print(f"Unable to prefetch frames for {self.name}: {e}")
+                self.prefetch = False
+                return None
+
+        return self._prefetcher
+
+    def stop_prefetch(self) -> None:
+        "Stop the background reading of frames and close the prefetch reader"
+        if self._prefetcher is not None:
+            self._prefetcher.close()
+            self._prefetcher = None
+
+    def bake(
+        self,
+        frames: npt.ArrayLike | None = None,
+        background: bool = False,
+        directory: str | None = None,
+    ) -> PositionBake:
+        """
+        Decode the positions for the given frames once, into a memory-mapped file.
+
+        Once baked, reading the positions for a frame doesn't touch the trajectory
+        file, so scrubbing in either direction is as fast as playing forwards. Baked
+        files are kept in the cache directory and are reused, or resumed if incomplete,
+        when baking the same trajectory again.
+
+        Parameters
+        ----------
+        frames : ArrayLike | None, optional
+            The frames of the trajectory to bake, by default all frames.
+        background : bool, optional
+            Bake on a background thread, with progress available from the returned
+            `PositionBake.progress`. By default False.
+        directory : str | None, optional
+            Directory to store the baked files, by default inside the cache directory.
+
+        Returns
+        -------
+        PositionBake
+            The baked positions.
+        """
+        self.clear_bake()
+        self._bake = PositionBake(
+            self.universe.trajectory,
+            frames=self._universe_frames(frames),
+            world_scale=self.world_scale,
+            indices=self.subset_indices,
+            directory=directory,
+        )
+        self._bake.bake(background=background)
+        return self._bake
+
+    def clear_bake(self, delete: bool = False) -> None:
+        "Stop using the baked positions, optionally deleting the baked files from disk"
+        if self._bake is None:
+            return
+        if delete:
+            self._bake.delete()
+        else:
+            self._bake.close()
+        self._bake = None
+
+    @property
+    def bake_progress(self) -> float | None:
+        "Fraction of frames that have been baked, or None if not baked"
+        if self._bake is None:
+            return None
+        return self._bake.progress
+
+    def precompute(
+        self,
+        name: str,
+        frames: npt.ArrayLike | None = None,
+        workers: int | None = None,
+        background: bool = True,
+        directory: str | None = None,
+    ) -> PrecomputedCalculation:
+        """
+        Evaluate a registered calculation for a range of frames ahead of playback.
+
+        The frames are split into chunks which are evaluated in parallel worker
+        processes, each with their own `Universe`, and the results are stored in a
+        memory-mapped file. During playback the stored results are used for the frame
+        instead of calling the function. Results are kept in the cache directory and
+        reused, or resumed if incomplete, when precomputing again.
+
+        Parameters
+        ----------
+        name : str
+            Name of the calculation in `Trajectory.calculations`.
+        frames : ArrayLike | None, optional
+            The frames of the trajectory to evaluate, by default all frames.
+        workers : int | None, optional
+            Number of worker processes, by default the number of CPUs.
+        background : bool, optional
+            Return immediately, with progress available from the returned
+            `PrecomputedCalculation.progress`. By default True.
+        directory : str | None, optional
+            Directory to store the results, by default inside the cache directory.
+
+        Returns
+        -------
+        PrecomputedCalculation
+            The precomputed results.
+        """
+        self.clear_precomputed(name)
+        precomputed = PrecomputedCalculation(
+            self.calculations[name],
+            self.universe,
+            name=name,
+            frames=self._universe_frames(frames),
+            workers=workers,
+            directory=directory,
+        )
+        self._precomputed[name] = precomputed
+        precomputed.compute(background=background)
+        return precomputed
+
+    def clear_precomputed(self, name: str | None = None, delete: bool = False) -> None:
+        """
+        Stop using precomputed results for a calculation, or for all calculations if no
+        name is given, optionally deleting the stored results from disk
+        """
+        names = list(self._precomputed) if name is None else [name]
+        for name in names:
+            precomputed = self._precomputed.pop(name, None)
+            if precomputed is None:
+                continue
+            if delete:
+                precomputed.delete()
+            else:
+                precomputed.close()
+
+    def precompute_progress(self, name: str) -> float | None:
+        "Fraction of frames precomputed for a calculation, or None if not precomputed"
+        if name not in self._precomputed:
+            return None
+        return self._precomputed[name].progress
+
+    def _precomputed_at_frame(self, name: str, frame: int) -> np.ndarray | None:
+        precomputed = self._precomputed.get(name)
+        if precomputed is None or precomputed.func is not self.calculations.get(name):
+            return None
+        return precomputed.get(self.frames[frame])
+
+    def _universe_frames(self, frames: npt.ArrayLike | None) -> np.ndarray:
+        "The universe frames for frames of the trajectory, by default all of them"
+        universe_frames = np.asarray(self.frames)
+        if frames is None:
+            return universe_frames
+        return universe_frames[np.asarray(frames, dtype=int)]
 
     def _position_at_frame(self, frame: int) -> np.ndarray:
         "Return the atom positions at the given universe frame number"
+        if self._bake is not None:
+            positions = self._bake.get(self.frames[frame])
+            if positions is not None:
+                self._remember_dimensions(
+                    frame, self._bake.get_dimensions(self.frames[frame])
+                )
+                return positions
+
+        prefetcher = self._get_prefetcher()
+        if prefetcher is not None:
+            positions = prefetcher.get(frame)
+            prefetcher.request(frame)
+            if positions is not None:
+                self._remember_dimensions(frame, prefetcher.get_dimensions(frame))
+                return positions
+
         self.uframe = frame
+        self._remember_dimensions(frame, self.universe.dimensions)
         return self.univ_positions
 
     def update_position_cache(self, frame: int, cache_ahead: bool = True) -> None:
@@ -605,7 +1266,7 @@ class Trajectory(MolecularEntity):
         # if we should be looking ahead by 1 for interpolating, ensure we are caching 1
         # frame ahead so when the frame changes we already have it stored and aren't
         # double dipping
-        if len(frames_to_cache) == 1 and cache_ahead:
+        if len(frames_to_cache) == 1 and cache_ahead and frame + 1 < self.n_frames:
             frames_to_cache = np.array(
                 (frames_to_cache[0], frames_to_cache[0] + 1), dtype=int
             )
@@ -623,54 +1284,164 @@ class Trajectory(MolecularEntity):
             if f not in self.cache:
                 self.cache[f] = self._position_at_frame(f)
 
-    def frame_mapper(self, frame: int):
-        return frame_mapper(
-            frame=frame,
-            subframes=self.subframes,
-            offset=self.offset,
-            mapping=self.frame_mapping,
-        )
+    @property
+    def frame_mapping(self) -> npt.NDArray[np.int64] | None:
+        "The universe frame for each scene frame, before subframes and offset are applied"
+        return self._frame_mapping
+
+    @frame_mapping.setter
+    def frame_mapping(self, value: npt.ArrayLike | None) -> None:
+        if value is not None:
+            value = np.asarray(value, dtype=int)
+            if value.ndim != 1 or len(value) == 0:
+                raise ValueError("Frame mapping must be a 1D array of frame numbers")
+            if value.min() < 0 or value.max() >= self.n_frames:
+                raise ValueError(
+                    f"Frame mapping must only contain frames between 0 and "
+                    f"{self.n_frames - 1}"
+                )
+        self._frame_mapping = value
+        self._frame_lut = None
+
+    def map_frames_to_time(self, step: float | None = None) -> npt.NDArray[np.int64]:
+        """
+        Set the frame mapping so each scene frame is evenly spaced in simulation time.
+
+        For trajectories written with varying intervals between frames, each scene
+        frame shows the last trajectory frame at or before its time.
+
+        Parameters
+        ----------
+        step : float | None, optional
+            The simulation time between each scene frame, in the units of the
+            trajectory. By default the smallest interval between trajectory frames.
+
+        Returns
+        -------
+        npt.NDArray[np.int64]
+            The new frame mapping.
+        """
+        reader = self.universe.trajectory.copy()
+        frames = self.frames
+        try:
+            times = np.array(
+                [ts.time for ts in reader[frames.start : frames.stop : frames.step]]
+            )
+        finally:
+            reader.close()
+        self.frame_mapping = frame_mapping_from_times(times, step=step)
+        return self.frame_mapping
+
+    def _frame_lookup(self) -> tuple[np.ndarray, np.ndarray]:
+        "Return the scene to universe frame lookup tables, rebuilding them if outdated"
+        # setting the frame mapping or the universe discards the tables
+        key = (self.subframes, self.n_frames)
+        if self._frame_lut is None or self._frame_lut[0] != key:
+            self._frame_lut = (
+                key,
+                *frame_lookup_table(
+                    self.n_frames, self.subframes, mapping=self._frame_mapping
+                ),
+            )
+        return self._frame_lut[1], self._frame_lut[2]
+
+    def _frame_index(self, frame: int) -> int:
+        "Index into the lookup tables for the scene frame, clamped to the trajectory"
+        lut, _ = self._frame_lookup()
+        return min(max(frame - self.offset, 0), len(lut) - 1)
+
+    def _frame_pair(self, frame: int) -> tuple[int, int]:
+        "The universe frame for the scene frame, and the one to interpolate towards"
+        lut, lut_next = self._frame_lookup()
+        i = self._frame_index(frame)
+        return int(lut[i]), int(lut_next[i])
+
+    def _frame_fraction(self, frame: int) -> float:
+        "How far the scene frame is between its two universe frames"
+        return fraction(self._frame_index(frame), self.subframes + 1)
+
+    def frame_mapper(self, frame: int) -> int:
+        "Return the universe frame to display for the scene frame"
+        lut, _ = self._frame_lookup()
+        return int(lut[self._frame_index(frame)])
 
     def _update_positions(self, frame):
         """
         The function that will be called when the frame changes.
         It will update the positions and selections of the atoms in the scene.
         """
+        self.position = self._compute_positions(frame)
+
+    def _compute_positions(self, frame: int) -> np.ndarray:
+        "Return the positions to display for the scene frame"
         # get the two frames of the trajectory to potentially access data from
-        # uframe_current, uframe_next = [self.frame_mapper(x) for x in (frame, frame + 1)]
-        uframe_current = self.frame_mapper(frame)
-        uframe_next = uframe_current + 1
+        uframe_current, uframe_next = self._frame_pair(frame)
 
         if self.subframes > 0 and self.interpolate:
             # if we are adding subframes and interpolating, then we get the positions
             # at the two universe frames, then interpolate between them, potentially
             # correcting for any periodic boundary crossing
-            pos_current = self.position_cache_mean(
-                uframe_current,
-            )
-            pos_next = self.position_cache_mean(uframe_next)
-
-            # if we are averaging, then we have already applied periodic correction
-            # and we can skip this step
-            if self.correct_periodic and self.is_orthorhombic and self.average == 0:
-                pos_next = correct_periodic_positions(
-                    pos_current,
-                    pos_next,
-                    dimensions=self.universe.dimensions[:3] * self.world_scale,
+            with stage(self.uuid, "read"):
+                pos_current, pos_next = self._interpolation_endpoints(
+                    uframe_current, uframe_next
                 )
 
             # interpolate between the two sets of positions
-            self.position = databpy.lerp(
-                pos_current, pos_next, t=fraction(frame, self.subframes + 1)
-            )
+            with stage(self.uuid, "interpolate"):
+                return databpy.lerp(
+                    pos_current, pos_next, t=self._frame_fraction(frame)
+                )
         elif self.average > 0:
             # if we have subframes then we get the potential mean positions for the cached
             # frames that we are looking at
-            self.position = self.position_cache_mean(uframe_current)
+            with stage(self.uuid, "average"):
+                return self.position_cache_mean(uframe_current)
         else:
             # otherwise just get the current positions for the relevant frame and set
             # those on the object
-            self.position = self._position_at_frame(uframe_current)
+            with stage(self.uuid, "read"):
+                return self._position_at_frame(uframe_current)
+
+    def _interpolation_endpoints(
+        self, uframe: int, uframe_next: int
+    ) -> tuple[np.ndarray, np.ndarray]:
+        """
+        Return the positions at the two universe frames which are interpolated between
+        for subframes.
+
+        The endpoints are cached, so they are only computed once for all of the
+        subframes between two universe frames. When moving forward a frame, the
+        previous next frame is reused as the current frame.
+        """
+        key = (uframe, uframe_next, self._window_settings())
+        endpoints = self._endpoints
+        if endpoints.get("key") == key:
+            return endpoints["current"], endpoints["next"]
+
+        means = endpoints.get("means", {})
+        if endpoints.get("key", (None, None, None))[2] != key[2]:
+            means = {}
+        means = {f: means[f] for f in (uframe, uframe_next) if f in means}
+        for f in (uframe, uframe_next):
+            if f not in means:
+                means[f] = self.position_cache_mean(f)
+
+        pos_current, pos_next = means[uframe], means[uframe_next]
+        # the next positions are moved to the images closest to the current, using the
+        # unit cell of the next frame. When averaging, each mean is only corrected
+        # within its own window so the two can still be in different images
+        if self.correct_periodic and self.is_periodic:
+            box = self._box_at_frame(uframe_next)
+            if box is not None:
+                pos_next = minimum_image(pos_current, pos_next, box)
+
+        self._endpoints = {
+            "key": key,
+            "means": means,
+            "current": pos_current,
+            "next": pos_next,
+        }
+        return pos_current, pos_next
 
     def __repr__(self):
         return f"<Trajectory, `universe`: {self.universe}, `object`: {self.object}"
@@ -2,11 +2,13 @@ from typing import Set
 
 import bpy
 import databpy
+import numpy as np
 from MDAnalysis import Universe
 
 from ... import color
 from ...blender import coll, nodes
-from ..base import EntityType
+from ..attributes import Attribute, AttributePipeline
+from ..base import LAZY_ALWAYS, EntityType
 from .base import Trajectory
 from .ops import TrajectoryImportOperator
 from .oxdna.OXDNAParser import OXDNAParser
@@ -66,39 +68,72 @@ class OXDNA(Trajectory):
             vertices=self.univ_positions,
             edges=self.bonds,
         )
-        self._update_timestep_values()
-
-        for name in ("chain_id", "res_id", "res_name"):
-            if name == "res_name":
-                att_name = "res_num"
-            else:
-                att_name = name
-            self.store_named_attribute(getattr(self, att_name), name)
-
-        self.store_named_attribute(
-            data=color.color_chains_equidistant(self.chain_id),
-            name="Color",
-            atype=databpy.AttributeTypes.FLOAT_COLOR,
-        )
+        pipeline = AttributePipeline(self._attribute_definitions())
+        # with lazy attributes, the others are added once the node tree is known
+        if self._lazy_attributes:
+            pipeline = pipeline.select(LAZY_ALWAYS)
+        report = pipeline.run(self)
+        for name, e in report.errors.items():
+            print(f"Unable to add attribute `{name}`: {e}")
 
         if style:
             nodes.create_starting_node_tree(self.object, style="oxdna", color=None)
 
         return self.object
 
-    def set_frame(self, frame: int) -> None:
-        super()._update_positions(frame)
-        self._update_timestep_values()
+    def apply_frame(self, deadline: float | None = None) -> bool:
+        pending = self._pending
+        deferred = super().apply_frame(deadline=deadline)
+        # the per-frame values only change along with the positions, so are skipped
+        # when the positions were already written for the same key
+        if pending is None or pending["proxy_only"] or not pending["update_positions"]:
+            return deferred
+        names = self._timestep_names()
+        if names:
+            # read from the universe, which the positions might not have needed to move
+            self.uframe = self._frame
+            self._update_timestep_values(names)
+        return deferred
+
+    def _attribute_definitions(self) -> tuple[Attribute, ...]:
+        return tuple(
+            Attribute(name, lambda name=name: self._timestep_value(name))
+            for name in self._att_names
+        ) + (
+            Attribute("chain_id", lambda: self.chain_id),
+            Attribute("res_id", lambda: self.res_id),
+            Attribute("res_name", lambda: self.res_num),
+            Attribute(
+                "Color",
+                color.color_chains_equidistant,
+                atype=databpy.AttributeTypes.FLOAT_COLOR,
+                inputs=("chain_id",),
+            ),
+        )
+
+    def _timestep_value(self, name: str) -> np.ndarray:
+        return self.universe.trajectory.ts.data[name] * self.world_scale
 
-    def _update_timestep_values(self):
+    def _timestep_names(self) -> list[str]:
         """
-        Update the timestep values for all tracked attributes.
+        The tracked attributes to update each frame.
+
+        With lazy attributes, only those which have been added to the object are
+        updated.
         """
-        for name in self._att_names:
+        names = list(self._att_names)
+        if self._lazy_attributes:
+            existing = set(self.list_attributes())
+            names = [name for name in names if name in existing]
+        return names
+
+    def _update_timestep_values(self, names: list[str] | None = None):
+        "Update the timestep values for the tracked attributes"
+        if names is None:
+            names = self._timestep_names()
+        for name in names:
             try:
-                self.store_named_attribute(
-                    self.universe.trajectory.ts.data[name] * self.world_scale, name=name
-                )
+                self.store_named_attribute(self._timestep_value(name), name=name)
             except KeyError as e:
                 print(e)
 
@@ -0,0 +1,320 @@
+import hashlib
+import multiprocessing
+import os
+import pickle
+import threading
+import types
+from concurrent.futures import Executor, Future, ProcessPoolExecutor, ThreadPoolExecutor
+from pathlib import Path
+from typing import Callable, List
+
+import MDAnalysis as mda
+import numpy as np
+import numpy.typing as npt
+from MDAnalysis.coordinates.memory import MemoryReader
+
+from .bake import BAKE_DIR, FrameArray, _trajectory_key
+
+# the copy of the universe each worker process evaluates its chunks with
+_worker_universe: mda.Universe | None = None
+
+
+def _init_worker(universe: bytes) -> None:
+    "Unpickle the universe once when the worker starts, rather than for every chunk"
+    global _worker_universe
+    # the pickled universe reopens the trajectory with the same format and options (or
+    # keeps the frames of an in-memory trajectory)
+    _worker_universe = pickle.loads(universe)
+
+
+def _compute_chunk(
+    func: Callable,
+    path: str,
+    frames: npt.NDArray[np.int64],
+    indices: npt.NDArray[np.int64],
+    universe: mda.Universe | None = None,
+) -> npt.NDArray[np.int64]:
+    "Evaluate `func` for a chunk of frames, writing into `path`"
+    if universe is None:
+        universe = _worker_universe
+    values = np.load(path, mmap_mode="r+")
+    for i, frame in zip(indices, frames):
+        universe.trajectory[frame]
+        values[i] = func(universe)
+    values.flush()
+    return indices
+
+
+def _code_key(code: types.CodeType, digest) -> None:
+    digest.update(code.co_code)
+    digest.update(repr(code.co_names).encode())
+    for const in code.co_consts:
+        # nested functions are hashed by their code, as their repr has an address
+        if isinstance(const, types.CodeType):
+            _code_key(const, digest)
+        else:
+            digest.update(repr(const).encode())
+
+
+def _function_key(func: Callable) -> str:
+    "Hash the code of the function, so results aren't reused once it has been edited"
+    digest = hashlib.sha1()
+    code = getattr(func, "__code__", None)
+    if code is None:
+        # callable objects are hashed by the code of their `__call__()`
+        code = getattr(getattr(func, "__call__", None), "__code__", None)
+    if code is not None:
+        _code_key(code, digest)
+    digest.update(repr(getattr(func, "__defaults__", None)).encode())
+    # values captured from the enclosing scope change the results as much as the code
+    for cell in getattr(func, "__closure__", None) or ():
+        try:
+            digest.update(repr(cell.cell_contents).encode())
+        except ValueError:
+            # a captured variable which hasn't been assigned yet
+            pass
+    return digest.hexdigest()
+
+
+def _memory_key(reader: MemoryReader, *args) -> str:
+    "Hash the frames of an in-memory trajectory, which can differ from its file"
+    digest = hashlib.sha1(np.ascontiguousarray(reader.get_array()).tobytes())
+    dimensions = getattr(reader, "dimensions_array", None)
+    if dimensions is not None:
+        digest.update(np.ascontiguousarray(dimensions).tobytes())
+    key = "_".join(str(x) for x in ("memory", digest.hexdigest(), *args))
+    return hashlib.sha1(key.encode()).hexdigest()[:16]
+
+
+def _can_call(func: Callable) -> bool:
+    "Run in a worker to check that it can import both this module and the function"
+    return callable(func)
+
+
+class PrecomputedCalculation(FrameArray):
+    """
+    The results of a per-frame calculation, evaluated ahead of time for a range of
+    frames and stored in a memory-mapped file on disk.
+
+    The frames are split into chunks which are evaluated in parallel, with each worker
+    unpickling its own copy of the `Universe`. During playback the results are then
+    just indexed for the current frame.
+
+    The function is sent to worker processes, so has to be picklable: defined at the
+    top level of an importable module. Functions which can't be pickled are instead
+    evaluated on a single background thread.
+
+    Results are reused when precomputing the same function over the same trajectory
+    again. The function is identified by a hash of its code, and an in-memory
+    trajectory by a hash of its frames rather than the file it was read from.
+
+    Parameters
+    ----------
+    func : Callable
+        Function which takes the `Universe` and returns an array for the current frame.
+    universe : mda.Universe
+        The universe to evaluate the calculation over. Used to determine the shape of
+        the results, and pickled to send to each worker.
+    name : str
+        Name of the calculation, used as part of the cache key.
+    frames : ArrayLike | None, optional
+        The universe frames to evaluate, by default all frames.
+    workers : int | None, optional
+        Number of worker processes, by default the number of CPUs.
+    chunk_size : int | None, optional
+        Number of frames evaluated by a worker at a time. By default the frames are
+        split into 4 chunks per worker, so progress updates and cancellation is prompt.
+    directory : str | Path | None, optional
+        Directory to store the results in, by default `BAKE_DIR`.
+    """
+
+    def __init__(
+        self,
+        func: Callable,
+        universe: mda.Universe,
+        name: str,
+        frames: npt.ArrayLike | None = None,
+        workers: int | None = None,
+        chunk_size: int | None = None,
+        directory: str | Path | None = None,
+    ):
+        if frames is None:
+            frames = np.arange(universe.trajectory.n_frames)
+        frames = np.unique(np.asarray(frames, dtype=int))
+        self.func = func
+        self.name = name
+        self.topology = str(universe.filename)
+        self.trajectory = str(universe.trajectory.filename)
+        self.workers = workers or os.cpu_count() or 1
+        self.chunk_size = chunk_size or max(
+            1, int(np.ceil(len(frames) / (self.workers * 4)))
+        )
+
+        # evaluate once to find the shape and dtype of the results
+        current = universe.trajectory.frame
+        universe.trajectory[int(frames[0])]
+        sample = np.asarray(func(universe))
+        universe.trajectory[current]
+        self._universe = pickle.dumps(universe)
+
+        args = (
+            self.topology,
+            name,
+            getattr(func, "__module__", ""),
+            getattr(func, "__qualname__", repr(func)),
+            _function_key(func),
+            sample.shape,
+            sample.dtype,
+            hashlib.sha1(frames.tobytes()).hexdigest(),
+        )
+        if isinstance(universe.trajectory, MemoryReader):
+            key = _memory_key(universe.trajectory, *args)
+        else:
+            key = _trajectory_key(self.trajectory, *args)
+        directory = Path(directory or BAKE_DIR)
+        super().__init__(
+            directory / f"{key}.calc.npy",
+            frames,
+            shape=sample.shape,
+            dtype=sample.dtype,
+        )
+
+        self._executor: Executor | None = None
+        # the copy of the universe chunks are evaluated with on a thread, worker
+        # processes instead unpickle their own when they start
+        self._thread_universe: mda.Universe | None = None
+        # submits the chunks and waits for them, so starting the workers doesn't block
+        self._runner: Executor | None = None
+        self._task: Future | None = None
+        self._futures: List[Future] = []
+        self._cancelled = False
+        self._lock = threading.Lock()
+
+    @property
+    def is_computing(self) -> bool:
+        return self._task is not None and not self._task.done()
+
+    def _make_executor(self) -> Executor:
+        executor = None
+        try:
+            pickle.dumps(self.func)
+            # spawn rather than fork, as forking a process with running threads is unsafe
+            executor = ProcessPoolExecutor(
+                max_workers=self.workers,
+                mp_context=multiprocessing.get_context("spawn"),
+                initializer=_init_worker,
+                initargs=(self._universe,),
+            )
+            # the worker processes have to be able to import the function, which isn't
+            # possible for everything that can be pickled (such as from inside Blender)
+            executor.submit(_can_call, self.func).result()
+            return executor
+        except Exception as e:
+            if executor is not None:
+                executor.shutdown(wait=False, cancel_futures=True)
+            print(
+                f"Calculation `{self.name}` can't be evaluated in other processes, "
+                f"evaluating on a background thread instead: {e}"
+            )
+            self._thread_universe = pickle.loads(self._universe)
+            return ThreadPoolExecutor(max_workers=1, thread_name_prefix="MNPrecompute")
+
+    def compute(self, background: bool = True) -> None:
+        """
+        Evaluate the calculation for all of the frames that don't yet have results.
+
+        Parameters
+        ----------
+        background : bool, optional
+            Return immediately, with `progress` reporting how far through the
+            evaluation is. By default True.
+        """
+        if self.is_computing:
+            return
+
+        todo = np.flatnonzero(~self._done)
+        if len(todo) == 0:
+            return
+        # results are written by the workers, make sure they all see the same file
+        self.flush()
+
+        self._cancelled = False
+        chunks = np.array_split(todo, int(np.ceil(len(todo) / self.chunk_size)))
+        if self._runner is None:
+            self._runner = ThreadPoolExecutor(
+                max_workers=1, thread_name_prefix="MNRunner"
+            )
+        self._task = self._runner.submit(self._run, chunks)
+
+        if not background:
+            self.wait()
+
+    def _run(self, chunks: List[npt.NDArray[np.int64]]) -> None:
+        "Submit the chunks to the workers and wait for them, run in the background"
+        if self._executor is None:
+            self._executor = self._make_executor()
+        with self._lock:
+            if self._cancelled:
+                return
+            self._futures = [
+                self._executor.submit(
+                    _compute_chunk,
+                    self.func,
+                    str(self.path),
+                    self.frames[chunk],
+                    chunk,
+                    self._thread_universe,
+                )
+                for chunk in chunks
+            ]
+        for future in self._futures:
+            future.add_done_callback(self._mark_done)
+        for future in self._futures:
+            if not future.cancelled():
+                future.result()
+
+    def _mark_done(self, future: Future) -> None:
+        if future.cancelled() or future.exception() is not None:
+            return
+        with self._lock:
+            self._done[future.result()] = True
+            self._done.flush()
+
+    def wait(self) -> None:
+        "Block until all of the submitted chunks have finished"
+        if self._task is not None:
+            self._task.result()
+        for future in self._futures:
+            if not future.cancelled():
+                future.result()
+                # callbacks can still be running after the result is available
+                self._mark_done(future)
+
+    def cancel(self) -> None:
+        """
+        Stop evaluating, the chunks that are already running are finished. Evaluation
+        can be resumed later by calling `compute()` again.
+        """
+        with self._lock:
+            self._cancelled = True
+            for future in self._futures:
+                future.cancel()
+        self.wait()
+
+    def close(self) -> None:
+        "Stop any evaluation and shut down the workers, the results are kept on disk"
+        self.cancel()
+        if self._executor is not None:
+            self._executor.shutdown(wait=True)
+            self._executor = None
+        if self._thread_universe is not None:
+            self._thread_universe.trajectory.close()
+            self._thread_universe = None
+        if self._runner is not None:
+            self._runner.shutdown(wait=True)
+            self._runner = None
+
+    def delete(self) -> None:
+        "Close and remove the stored results from disk"
+        self.close()
+        self._remove_files()
@@ -0,0 +1,143 @@
+import threading
+from collections import OrderedDict
+from concurrent.futures import Future, ThreadPoolExecutor
+
+import numpy as np
+import numpy.typing as npt
+
+
+class FramePrefetcher:
+    """
+    Read trajectory frames ahead of the playhead on a background thread.
+
+    The prefetcher opens its own copy of the trajectory reader, so reading frames never
+    moves the `Universe` that selections and calculations are evaluated against. Frames
+    are read in the current direction of playback and stored in a bounded ring buffer,
+    with the oldest frames being evicted first.
+
+    Parameters
+    ----------
+    reader : MDAnalysis.coordinates.base.ProtoReader
+        The reader of the trajectory to prefetch frames from. A copy of the reader is
+        made, the original is not modified.
+    world_scale : float, optional
+        Scale applied to the positions as they are read, by default 0.01
+    size : int, optional
+        Maximum number of frames stored in the buffer, by default 16
+    n_ahead : int, optional
+        Number of frames to read ahead of the playhead, by default 8
+    indices : ArrayLike | None, optional
+        Only keep the positions of the atoms at these indices, by default all atoms.
+    frames : range | None, optional
+        The frames of the reader to prefetch from. Frames requested and returned by
+        the prefetcher index into this range. By default all frames.
+    """
+
+    def __init__(
+        self,
+        reader,
+        world_scale: float = 0.01,
+        size: int = 16,
+        n_ahead: int = 8,
+        indices: npt.ArrayLike | None = None,
+        frames: range | None = None,
+    ):
+        self._reader = reader.copy()
+        self.world_scale = world_scale
+        self.indices = None if indices is None else np.asarray(indices)
+        self.frames = range(self._reader.n_frames) if frames is None else frames
+        self.size = max(size, n_ahead + 1)
+        self.n_ahead = n_ahead
+        self.n_frames: int = len(self.frames)
+        # frame -> (positions, dimensions)
+        self._buffer: OrderedDict[int, tuple] = OrderedDict()
+        self._lock = threading.Lock()
+        self._executor = ThreadPoolExecutor(
+            max_workers=1, thread_name_prefix="MNPrefetch"
+        )
+        self._future: Future | None = None
+        self._generation = 0
+        self._last_frame: int | None = None
+        self._direction = 1
+
+    def __contains__(self, frame: int) -> bool:
+        with self._lock:
+            return frame in self._buffer
+
+    def get(self, frame: int) -> np.ndarray | None:
+        "Return the positions for the frame if they have already been read, otherwise None"
+        with self._lock:
+            item = self._buffer.get(frame)
+        return None if item is None else item[0]
+
+    def get_dimensions(self, frame: int) -> np.ndarray | None:
+        "Return the unit cell dimensions for the frame if it has already been read"
+        with self._lock:
+            item = self._buffer.get(frame)
+        return None if item is None else item[1]
+
+    def request(self, frame: int) -> None:
+        """
+        Start reading the frames following `frame` in the direction of playback.
+
+        Any reading that is still in progress for a previous request is abandoned, so
+        jumping around the timeline doesn't queue up reads that are no longer needed.
+        """
+        if self._last_frame is not None and frame != self._last_frame:
+            self._direction = 1 if frame > self._last_frame else -1
+        self._last_frame = frame
+
+        frames = [
+            f
+            for f in (frame + self._direction * i for i in range(1, self.n_ahead + 1))
+            if 0 <= f < self.n_frames
+        ]
+        with self._lock:
+            frames = [f for f in frames if f not in self._buffer]
+        if not frames:
+            return
+
+        self._generation += 1
+        self._future = self._executor.submit(self._fill, self._generation, frames)
+
+    def _read(self, frame: int) -> tuple:
+        frame = self.frames[frame]
+        # for linear playback the next frame is decoded sequentially, which avoids the
+        # seek that random access into compressed formats such as XTC requires
+        if frame > 0 and self._reader.ts.frame == frame - 1:
+            ts = self._reader.next()
+        else:
+            ts = self._reader[frame]
+        dimensions = None if ts.dimensions is None else ts.dimensions.copy()
+        positions = ts.positions if self.indices is None else ts.positions[self.indices]
+        return positions * self.world_scale, dimensions
+
+    def _fill(self, generation: int, frames: list[int]) -> None:
+        for frame in frames:
+            # a newer request has been made, so stop reading for this one
+            if generation != self._generation:
+                return
+            if frame in self:
+                continue
+            item = self._read(frame)
+            with self._lock:
+                self._buffer[frame] = item
+                while len(self._buffer) > self.size:
+                    self._buffer.popitem(last=False)
+
+    def wait(self) -> None:
+        "Block until the most recent request has finished reading"
+        if self._future is not None:
+            self._future.result()
+
+    def clear(self) -> None:
+        "Abandon any reading in progress and empty the buffer"
+        self._generation += 1
+        with self._lock:
+            self._buffer.clear()
+
+    def close(self) -> None:
+        "Stop the background thread and close the reader handle"
+        self._generation += 1
+        self._executor.shutdown(wait=True, cancel_futures=True)
+        self._reader.close()
@@ -0,0 +1,151 @@
+from dataclasses import replace
+
+import bpy
+import databpy
+import MDAnalysis as mda
+import numpy as np
+import numpy.typing as npt
+from databpy import BlenderObject
+from databpy.object import LinkedObjectError
+
+from ...blender import coll, nodes
+from ..attributes import AttributePipeline
+
+PROXY_MODES = ("residue", "backbone", "stride")
+
+
+def _proxy_groups(
+    atoms: mda.AtomGroup, mode: str, stride: int
+) -> tuple[npt.NDArray[np.int64] | None, npt.NDArray[np.int64]]:
+    """
+    Return the order to gather the atoms into contiguous groups, and the start of each
+    group in that order. The order is None if the atoms are already contiguous.
+    """
+    n_atoms = atoms.n_atoms
+    if mode == "residue":
+        group = atoms.resindices
+        if np.all(group[1:] >= group[:-1]):
+            order = None
+        else:
+            order = np.argsort(group, kind="stable")
+            group = group[order]
+        starts = np.concatenate(([0], np.flatnonzero(group[1:] != group[:-1]) + 1))
+    elif mode == "backbone":
+        selected = atoms.select_atoms("name CA or name BB")
+        if selected.n_atoms == 0:
+            raise ValueError("No CA or BB atoms to use as backbone beads")
+        order = np.flatnonzero(np.isin(atoms.ix, selected.ix))
+        starts = np.arange(len(order))
+    elif mode == "stride":
+        if stride < 1:
+            raise ValueError(f"Proxy stride must be at least 1, not {stride}")
+        order = None
+        starts = np.arange(0, n_atoms, stride)
+    else:
+        raise ValueError(f"Unknown proxy mode `{mode}`, expected one of {PROXY_MODES}")
+    return order, starts
+
+
+class TrajectoryProxy(BlenderObject):
+    """
+    A lightweight stand-in for a trajectory's object, for interactive playback.
+
+    Each point of the proxy represents a group of atoms: a residue, a backbone bead or
+    a run of `stride` consecutive atoms. Positions are the centroid of each group,
+    while attributes such as selections and those used for coloring are aggregated
+    over the group with `np.add.reduceat`.
+
+    Parameters
+    ----------
+    atoms : mda.AtomGroup
+        The atoms of the trajectory's object, in the order of its vertices.
+    mode : str, optional
+        How atoms are grouped into points, one of "residue", "backbone" or "stride".
+        By default "residue".
+    stride : int, optional
+        Number of consecutive atoms per point for the "stride" mode, by default 10.
+    """
+
+    def __init__(self, atoms: mda.AtomGroup, mode: str = "residue", stride: int = 10):
+        super().__init__(obj=None)
+        self.mode = mode
+        self.stride = stride
+        self._order, self._starts = _proxy_groups(atoms, mode, stride)
+        n_grouped = atoms.n_atoms if self._order is None else len(self._order)
+        self._counts = np.diff(np.append(self._starts, n_grouped))
+
+    @property
+    def n_points(self) -> int:
+        return len(self._starts)
+
+    def reduce(self, values: npt.ArrayLike) -> np.ndarray:
+        """
+        Aggregate per-atom values into values for each point of the proxy.
+
+        Floats are averaged over each group, booleans are True if any atom of the group
+        is True, while other types are categorical so take the value of the first atom.
+        """
+        values = np.asarray(values)
+        if self._order is not None:
+            values = values[self._order]
+        if values.dtype == bool:
+            return np.add.reduceat(values.view(np.uint8), self._starts, axis=0) > 0
+        if np.issubdtype(values.dtype, np.floating):
+            counts = self._counts.reshape(-1, *([1] * (values.ndim - 1)))
+            return np.add.reduceat(values, self._starts, axis=0) / counts
+        return values[self._starts]
+
+    def create_object(
+        self, trajectory, name: str = "NewUniverseObject_proxy"
+    ) -> bpy.types.Object:
+        "Create the proxy object for the trajectory, with its aggregated attributes"
+        self.object = databpy.create_object(
+            name=name,
+            collection=coll.mn(),
+            vertices=self.reduce(trajectory.position),
+        )
+        # the same attributes as the trajectory's object, aggregated onto the points
+        # attributes which aren't stored are inputs to others, so are passed on for
+        # every atom rather than aggregated
+        attributes = [
+            replace(att, func=lambda *values, func=att.func: self.reduce(func(*values)))
+            if att.store
+            else att
+            for att in trajectory._attributes
+        ]
+        report = AttributePipeline(attributes).run(self)
+        for att_name, e in report.errors.items():
+            print(f"Unable to add attribute `{att_name}` to the proxy: {e}")
+
+        # colors stored directly on the trajectory's object
+        if "Color" in trajectory.object.data.attributes:
+            self.store_named_attribute(
+                data=self.reduce(trajectory.named_attribute("Color")),
+                name="Color",
+                atype="FLOAT_COLOR",
+            )
+
+        self.object.hide_render = True
+        self.object.hide_viewport = True
+        nodes.create_starting_node_tree(
+            self.object, style="spheres", name=f"MN_{self.object.name}"
+        )
+        return self.object
+
+    def update(
+        self,
+        positions: np.ndarray | None = None,
+        selections: dict[str, np.ndarray] | None = None,
+    ) -> None:
+        "Write aggregated positions and selection masks to the proxy object"
+        if positions is not None:
+            self.position = self.reduce(positions)
+        for name, mask in (selections or {}).items():
+            self.store_named_attribute(self.reduce(mask), name=name, atype="BOOLEAN")
+
+    def remove(self) -> None:
+        "Delete the proxy object from the scene"
+        try:
+            bpy.data.objects.remove(self.object)
+        except (ReferenceError, LinkedObjectError):
+            pass
@@ -1,15 +1,47 @@
+import re
 import MDAnalysis as mda
 import numpy.typing as npt
 import numpy as np
 from uuid import uuid1
 
+# selection keywords whose result depends on the atom positions, or on other atom
+# groups which may themselves be changing, and so have to be re-evaluated every frame
+GEOMETRIC_KEYWORDS = (
+    "around",
+    "sphlayer",
+    "sphzone",
+    "cylayer",
+    "cyzone",
+    "isolayer",
+    "point",
+    "prop",
+    "group",
+    "fullgroup",
+)
+_GEOMETRIC_RE = re.compile(r"\b(?:{})\b".format("|".join(GEOMETRIC_KEYWORDS)))
+
+
+def is_static_selection(selection_str: str) -> bool:
+    "Whether the selection only depends on the topology, so never changes between frames"
+    return _GEOMETRIC_RE.search(selection_str) is None
+
 
 class Selection:
+    # class level defaults for selections pickled before these were added
+    _is_static: bool = False
+    _static_written: bool = False
+    _mask_from: tuple | None = None
+    _mask_written: npt.NDArray[np.bool_] | None = None
+
     def __init__(self, trajectory, name: str = "selection_0"):
         self._ag: mda.AtomGroup | None = None
         self._uuid: str = str(uuid1())
         self._name = name
         self._current_selection_str: str = ""
+        self._is_static = False
+        self._static_written = False
+        self._mask_from = None
+        self._mask_written = None
         self.trajectory = trajectory
 
     def add_selection_property(
@@ -90,30 +122,70 @@ class Selection:
             self._ag = self.trajectory.universe.select_atoms(
                 selection_str, updating=self.updating, periodic=self.periodic
             )
+            self._is_static = is_static_selection(selection_str)
+            self._static_written = False
             self.mask_array = self._ag_to_mask()
             self._current_selection_str = selection_str
             self.message = ""
         except Exception as e:
             self._current_selection_str = selection_str
+            self._is_static = False
             self.message = str(e)
             print(
                 str(e)
                 + f" in selection: `{self.name}` on object: `{self.trajectory.object.name}`"
             )
 
+    @property
+    def is_static(self) -> bool:
+        "Whether the selection can't change between frames, so isn't re-evaluated"
+        return self._is_static
+
     def _ag_to_mask(self) -> npt.NDArray[np.bool_]:
-        "Return a 1D boolean mask for the Universe atoms that are in the Selection's AtomGroup."
-        return np.isin(self.trajectory.universe.atoms.ix, self._ag.ix).astype(bool)
+        """
+        Return a 1D boolean mask for the trajectory's atoms that are in the Selection's
+        AtomGroup.
+
+        The indices of the selected atoms are scattered into a new mask, rather than
+        searching for every atom in the AtomGroup. The selection is always evaluated
+        against the whole Universe, so can reference atoms which weren't imported, and
+        the mask is then taken for the imported subset. The mask is only built again
+        when the selected atoms change, otherwise the previous mask is returned, so a
+        returned mask is never modified afterwards.
+        """
+        ix = self._ag.ix
+        generation = self.trajectory._universe_generation
+        if self._mask_from is not None:
+            last_generation, last_ix, mask = self._mask_from
+            if last_generation == generation and np.array_equal(ix, last_ix):
+                return mask
+        mask = np.zeros(self.trajectory.universe.atoms.n_atoms, dtype=bool)
+        mask[ix] = True
+        mask = self.trajectory._to_subset(mask)
+        self._mask_from = (generation, ix.copy(), mask)
+        return mask
 
     def set_selection(self) -> None:
         "Sets the selection in the trajectory"
         if not self.updating:
             return
-        self.trajectory.set_boolean(self.to_mask(), name=self.name)
+        # the result of a static selection never changes, so only needs writing once
+        if self.is_static and self._static_written:
+            return
+        mask = self.to_mask()
+        # writing to the object is much slower than comparing, so skip the write if the
+        # selected atoms haven't changed since the last time it was written. The mask
+        # is only replaced when they change, so the same mask needn't be compared.
+        if mask is not self._mask_written and (
+            self._mask_written is None or not np.array_equal(mask, self._mask_written)
+        ):
+            self.trajectory.set_boolean(mask, name=self.name)
+        self._mask_written = mask
+        self._static_written = self.is_static
 
     def to_mask(self) -> npt.NDArray[np.bool_]:
         "Returns the selection as a 1D numpy boolean mask. If updating=True, recomputes selection."
-        if self.updating:
+        if self.updating and not self.is_static:
             self.mask_array = self._ag_to_mask()
         return self.mask_array
 
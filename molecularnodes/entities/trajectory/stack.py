@@ -0,0 +1,61 @@
+import MDAnalysis as mda
+import numpy as np
+from biotite.structure import AtomArrayStack, get_chain_starts, get_residue_starts
+from MDAnalysis.coordinates.memory import MemoryReader
+
+
+def _starts_to_index(starts: np.ndarray, n_atoms: int) -> np.ndarray:
+    "The index of the group that each atom is in, from the start of each group"
+    is_start = np.zeros(n_atoms, dtype=bool)
+    is_start[starts] = True
+    return np.cumsum(is_start) - 1
+
+
+def universe_from_stack(stack: AtomArrayStack) -> mda.Universe:
+    """
+    Create a universe with the models of an `AtomArrayStack` as its frames.
+
+    The coordinates of every model are held in memory by a `MemoryReader`, with the
+    topology built from the annotations of the stack: residues from the residue
+    starts, segments from the chains, and the bonds if the stack has them.
+
+    Parameters
+    ----------
+    stack : AtomArrayStack
+        The models to use as the frames of the universe.
+
+    Returns
+    -------
+    mda.Universe
+        The universe, with one frame per model.
+    """
+    n_atoms = stack.array_length()
+    res_starts = get_residue_starts(stack)
+    chain_starts = get_chain_starts(stack)
+    atom_resindex = _starts_to_index(res_starts, n_atoms)
+    atom_segindex = _starts_to_index(chain_starts, n_atoms)
+
+    universe = mda.Universe.empty(
+        n_atoms,
+        n_residues=len(res_starts),
+        n_segments=len(chain_starts),
+        atom_resindex=atom_resindex,
+        residue_segindex=atom_segindex[res_starts],
+        trajectory=False,
+    )
+    universe.add_TopologyAttr("names", stack.atom_name)
+    universe.add_TopologyAttr("elements", np.char.title(stack.element))
+    universe.add_TopologyAttr("resnames", stack.res_name[res_starts])
+    universe.add_TopologyAttr("resids", stack.res_id[res_starts])
+    universe.add_TopologyAttr("segids", stack.chain_id[chain_starts])
+    universe.add_TopologyAttr("chainIDs", stack.chain_id)
+    annotations = stack.get_annotation_categories()
+    if "b_factor" in annotations:
+        universe.add_TopologyAttr("tempfactors", stack.b_factor)
+    if "occupancy" in annotations:
+        universe.add_TopologyAttr("occupancies", stack.occupancy)
+    if stack.bonds is not None:
+        universe.add_TopologyAttr("bonds", stack.bonds.as_array()[:, :2])
+
+    universe.load_new(stack.coord.astype(np.float32), format=MemoryReader, order="fac")
+    return universe
@@ -10,11 +10,12 @@ import MDAnalysis as mda
 
 from pathlib import Path
 from ... import blender as bl
+from ...profiling import PROFILER
 from ...style import STYLE_ITEMS
 from ...session import MNSession
 from .base import Trajectory
 from . import dna
-from bpy.props import StringProperty, EnumProperty, BoolProperty
+from bpy.props import StringProperty, EnumProperty, BoolProperty, IntProperty
 
 
 def load(
@@ -22,12 +23,18 @@ def load(
     traj: str | Path,
     name: str = "NewTrajectory",
     style: str | None = "spheres",
+    subset: str | None = None,
+    start: int | None = None,
+    stop: int | None = None,
+    step: int | None = None,
 ):
     top = bl.path_resolve(top)
     traj = bl.path_resolve(traj)
 
     universe = mda.Universe(top, traj)
-    trajectory = Trajectory(universe=universe)
+    trajectory = Trajectory(
+        universe=universe, subset=subset, start=start, stop=stop, step=step
+    )
     trajectory.create_object(name=name, style=style)
 
     return trajectory
@@ -60,13 +67,187 @@ class MN_OT_Reload_Trajectory(bpy.types.Operator):
             traj = dna.OXDNA(uni)
         else:
             uni = mda.Universe(topo, traj)
-            traj = Trajectory(uni)
+            start, stop, step = obj.get("frame_window", (None, None, None))
+            traj = Trajectory(
+                uni, subset=obj.mn.subset, start=start, stop=stop, step=step
+            )
 
         traj.object = obj
         traj.set_frame(context.scene.frame_current)
         return {"FINISHED"}
 
 
+def _redraw_while_baking(uuid: str) -> float | None:
+    "Timer callback to keep the panel's bake progress updated until baking finishes"
+    traj = bpy.context.scene.MNSession.get(uuid)
+    for window in bpy.context.window_manager.windows:
+        for area in window.screen.areas:
+            if area.type == "PROPERTIES":
+                area.tag_redraw()
+
+    if traj is None or traj._bake is None or not traj._bake.is_baking:
+        return None
+    return 0.5
+
+
+class MN_OT_Bake_Trajectory(bpy.types.Operator):
+    bl_idname = "mn.bake_trajectory"
+    bl_label = "Bake"
+    bl_description = (
+        "Decode all frames of the trajectory into a cache on disk, for fast scrubbing"
+    )
+    bl_options = {"REGISTER"}
+
+    @classmethod
+    def poll(cls, context):
+        traj = context.scene.MNSession.match(context.active_object)
+        return isinstance(traj, Trajectory)
+
+    def execute(self, context):
+        traj = context.scene.MNSession.match(context.active_object)
+        try:
+            traj.bake(background=True)
+        except ValueError as e:
+            self.report({"ERROR"}, str(e))
+            return {"CANCELLED"}
+
+        bpy.app.timers.register(
+            lambda: _redraw_while_baking(traj.uuid), first_interval=0.5
+        )
+        return {"FINISHED"}
+
+
+class MN_OT_Clear_Trajectory_Bake(bpy.types.Operator):
+    bl_idname = "mn.clear_trajectory_bake"
+    bl_label = "Clear"
+    bl_description = "Stop using and delete the baked positions for this trajectory"
+    bl_options = {"REGISTER"}
+
+    @classmethod
+    def poll(cls, context):
+        traj = context.scene.MNSession.match(context.active_object)
+        return isinstance(traj, Trajectory) and traj._bake is not None
+
+    def execute(self, context):
+        traj = context.scene.MNSession.match(context.active_object)
+        traj.clear_bake(delete=True)
+        return {"FINISHED"}
+
+
+class MN_OT_Create_Trajectory_Proxy(bpy.types.Operator):
+    bl_idname = "mn.create_trajectory_proxy"
+    bl_label = "Create Proxy"
+    bl_description = (
+        "Create a lightweight proxy which is shown and updated in place of the "
+        "trajectory during playback, with the full trajectory updated when playback "
+        "stops or when rendering"
+    )
+    bl_options = {"REGISTER", "UNDO"}
+
+    mode: EnumProperty(  # type: ignore
+        name="Mode",
+        description="How atoms are grouped into the points of the proxy",
+        items=(
+            ("residue", "Residue", "One point at the centroid of each residue"),
+            ("backbone", "Backbone", "One point for each CA or BB bead"),
+            ("stride", "Stride", "One point for every `Stride` atoms"),
+        ),
+        default="residue",
+    )
+    stride: IntProperty(  # type: ignore
+        name="Stride",
+        description="Number of atoms for each point of the proxy in the Stride mode",
+        default=10,
+        min=1,
+    )
+
+    @classmethod
+    def poll(cls, context):
+        traj = context.scene.MNSession.match(context.active_object)
+        return isinstance(traj, Trajectory)
+
+    def invoke(self, context, event):
+        return context.window_manager.invoke_props_dialog(self)
+
+    def execute(self, context):
+        traj = context.scene.MNSession.match(context.active_object)
+        try:
+            traj.create_proxy(mode=self.mode, stride=self.stride)
+        except ValueError as e:
+            self.report({"ERROR"}, str(e))
+            return {"CANCELLED"}
+        context.view_layer.objects.active = traj.object
+        return {"FINISHED"}
+
+
+class MN_OT_Remove_Trajectory_Proxy(bpy.types.Operator):
+    bl_idname = "mn.remove_trajectory_proxy"
+    bl_label = "Remove Proxy"
+    bl_description = "Delete the playback proxy of this trajectory"
+    bl_options = {"REGISTER", "UNDO"}
+
+    @classmethod
+    def poll(cls, context):
+        traj = context.scene.MNSession.match(context.active_object)
+        return isinstance(traj, Trajectory) and traj.proxy is not None
+
+    def execute(self, context):
+        traj = context.scene.MNSession.match(context.active_object)
+        traj.remove_proxy()
+        return {"FINISHED"}
+
+
+class MN_OT_Export_Update_Profile(bpy.types.Operator):
+    bl_idname = "mn.export_update_profile"
+    bl_label = "Export Profile"
+    bl_description = (
+        "Write the recorded timings of each stage of the frame updates to a file"
+    )
+    bl_options = {"REGISTER"}
+
+    filepath: StringProperty(  # type: ignore
+        name="File",
+        description="Path to write the timings to",
+        default="mn_profile.json",
+        subtype="FILE_PATH",
+    )
+    format: EnumProperty(  # type: ignore
+        name="Format",
+        description="Format to write the timings in",
+        items=(
+            ("json", "JSON", "Every recorded stage and the average time of each"),
+            (
+                "chrome",
+                "Chrome Trace",
+                "Trace events which can be opened with chrome://tracing or Perfetto",
+            ),
+        ),
+        default="json",
+    )
+
+    @classmethod
+    def poll(cls, context):
+        return len(PROFILER.records) > 0
+
+    def invoke(self, context, event):
+        context.window_manager.fileselect_add(self)
+        return {"RUNNING_MODAL"}
+
+    def execute(self, context):
+        names = {
+            uuid: entity.name
+            for uuid, entity in context.scene.MNSession.entities.items()
+        }
+        try:
+            PROFILER.export(self.filepath, format=self.format, names=names)
+        except OSError as e:
+            self.report({"ERROR"}, str(e))
+            return {"CANCELLED"}
+
+        self.report({"INFO"}, f"Wrote {len(PROFILER.records)} timings")
+        return {"FINISHED"}
+
+
 class MN_OT_Import_Trajectory(bpy.types.Operator):
     bl_idname = "mn.import_trajectory"
     bl_label = "Import Protein MD"
@@ -102,23 +283,59 @@ class MN_OT_Import_Trajectory(bpy.types.Operator):
         description="Add nodes to the scene to load the trajectory",
         default=True,
     )
+    subset: StringProperty(  # type: ignore
+        name="Subset",
+        description="Only import the atoms matching this selection, empty for all atoms",
+        default="",
+        maxlen=0,
+    )
+    start: IntProperty(  # type: ignore
+        name="Start",
+        description="First frame of the trajectory to import",
+        default=0,
+        min=0,
+    )
+    stop: IntProperty(  # type: ignore
+        name="Stop",
+        description="Frame of the trajectory to stop importing before, 0 imports up to the last frame",
+        default=0,
+        min=0,
+    )
+    step: IntProperty(  # type: ignore
+        name="Step",
+        description="Import every nth frame of the trajectory",
+        default=1,
+        min=1,
+    )
 
     def execute(self, context):
-        trajectory = load(
-            top=self.topology,
-            traj=self.trajectory,
-            name=self.name,
-            style=self.style if self.setup_nodes else None,
-        )
+        try:
+            trajectory = load(
+                top=self.topology,
+                traj=self.trajectory,
+                name=self.name,
+                style=self.style if self.setup_nodes else None,
+                subset=self.subset,
+                start=self.start,
+                stop=self.stop or None,
+                step=self.step,
+            )
+        except mda.exceptions.SelectionError as e:
+            self.report({"ERROR"}, f"Invalid subset `{self.subset}`: {e}")
+            return {"CANCELLED"}
+        except ValueError as e:
+            # such as a subset without any atoms or a frame range without any frames
+            self.report({"ERROR"}, str(e))
+            return {"CANCELLED"}
 
         context.view_layer.objects.active = trajectory.object
         context.scene.frame_start = 0
-        context.scene.frame_end = trajectory.universe.trajectory.n_frames
+        context.scene.frame_end = trajectory.n_frames
 
         self.report(
             {"INFO"},
             message=f"Imported '{self.topology}' as {trajectory.name} "
-            f"with {str(trajectory.universe.trajectory.n_frames)} "
+            f"with {str(trajectory.n_frames)} "
             f"frames from '{self.trajectory}'.",
         )
 
@@ -140,9 +357,18 @@ def panel(layout, scene):
     op.name = scene.mn.import_md_name
     op.style = scene.mn.import_style
     op.setup_nodes = scene.mn.import_node_setup
+    op.subset = scene.mn.import_md_subset
+    op.start = scene.mn.import_md_start
+    op.stop = scene.mn.import_md_stop
+    op.step = scene.mn.import_md_step
     col.separator()
     col.prop(scene.mn, "import_md_topology")
     col.prop(scene.mn, "import_md_trajectory")
+    col.prop(scene.mn, "import_md_subset")
+    row = col.row(align=True)
+    row.prop(scene.mn, "import_md_start")
+    row.prop(scene.mn, "import_md_stop")
+    row.prop(scene.mn, "import_md_step")
 
     layout.separator()
     layout.label(text="Options", icon="MODIFIER")
@@ -153,4 +379,12 @@ def panel(layout, scene):
     col.enabled = scene.mn.import_node_setup
 
 
-CLASSES = [MN_OT_Import_Trajectory, MN_OT_Reload_Trajectory]
+CLASSES = [
+    MN_OT_Import_Trajectory,
+    MN_OT_Reload_Trajectory,
+    MN_OT_Bake_Trajectory,
+    MN_OT_Clear_Trajectory_Bake,
+    MN_OT_Export_Update_Profile,
+    MN_OT_Create_Trajectory_Proxy,
+    MN_OT_Remove_Trajectory_Proxy,
+]
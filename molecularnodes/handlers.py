@@ -1,6 +1,26 @@
+import os
+import time
+from concurrent.futures import ThreadPoolExecutor
+
 import bpy
 from bpy.app.handlers import persistent
 
+from .profiling import PROFILER, stage
+
+# threads used to compute entity updates in parallel, created when first needed and
+# recreated when the number of workers changes
+_EXECUTOR: ThreadPoolExecutor | None = None
+_EXECUTOR_WORKERS: int = 0
+
+# when and for how long the last update within the time budget ran, used to drop frame
+# requests which queued up while it was running
+_LAST_UPDATE_END: float = 0.0
+_LAST_UPDATE_DURATION: float = 0.0
+# frame the playhead was on when updates were dropped or deferred, which are caught up
+# with by a timer once the playhead has rested on a frame
+_CATCH_UP_FRAME: int | None = None
+_CATCH_UP_INTERVAL: float = 0.2
+
 
 # this update function requires a self and context input, as funcitons with these inputs
 # have ot be passed to the `update` arguments of UI properties. When the UI is updated,
@@ -26,6 +46,82 @@ def _selection_update_trajectories(self, context: bpy.types.Context) -> None:
         update_entities(context.scene)
 
 
+def _update_workers(scene, n_entities: int) -> int:
+    "Number of threads to compute entity updates on, where 1 updates serially"
+    workers = scene.mn.update_workers
+    if workers == 0:
+        workers = min(n_entities, os.cpu_count() or 1)
+    return max(1, min(workers, n_entities))
+
+
+def _get_executor(workers: int) -> ThreadPoolExecutor:
+    global _EXECUTOR, _EXECUTOR_WORKERS
+    if _EXECUTOR is None or _EXECUTOR_WORKERS != workers:
+        if _EXECUTOR is not None:
+            _EXECUTOR.shutdown(wait=False)
+        _EXECUTOR = ThreadPoolExecutor(
+            max_workers=workers, thread_name_prefix="MNUpdate"
+        )
+        _EXECUTOR_WORKERS = workers
+    return _EXECUTOR
+
+
+def _compute_entities(entities: list) -> None:
+    "Compute the updates for entities one after another, as they share a universe"
+    for entity in entities:
+        try:
+            with stage(entity.uuid, "compute"):
+                entity.compute_frame()
+        except Exception as e:
+            print(f"Failed to update {entity}: {e}")
+
+
+def _frame_to_set(scene, entity) -> int:
+    if entity.update_with_scene:
+        return scene.frame_current
+    return entity.frame
+
+
+def _is_playing() -> bool:
+    "Whether the frame is changing because of interactive playback in the viewport"
+    screen = bpy.context.screen
+    return screen is not None and screen.is_animation_playing
+
+
+def _is_interactive() -> bool:
+    "Whether the frame is changing from playback or scrubbing, rather than rendering"
+    if bpy.app.is_job_running("RENDER"):
+        return False
+    screen = bpy.context.screen
+    return screen is not None and (screen.is_animation_playing or screen.is_scrubbing)
+
+
+def _frame_budget(scene) -> float:
+    "Time in seconds that updating the entities for a frame should take"
+    if scene.mn.update_budget > 0:
+        return scene.mn.update_budget / 1000
+    return scene.render.fps_base / scene.render.fps
+
+
+def _schedule_catch_up(scene) -> None:
+    global _CATCH_UP_FRAME
+    _CATCH_UP_FRAME = scene.frame_current
+    if not bpy.app.timers.is_registered(_catch_up):
+        bpy.app.timers.register(_catch_up, first_interval=_CATCH_UP_INTERVAL)
+
+
+def _catch_up() -> float | None:
+    "Timer callback to fully update the entities once the playhead rests on a frame"
+    global _CATCH_UP_FRAME
+    scene = bpy.context.scene
+    if _is_interactive() or scene.frame_current != _CATCH_UP_FRAME:
+        _CATCH_UP_FRAME = scene.frame_current
+        return _CATCH_UP_INTERVAL
+    _CATCH_UP_FRAME = None
+    update_entities_full(scene)
+    return None
+
+
 # this is the 'perisisent' function which can be appended onto the
 # `bpy.app.handlers.frame_change_*` functions. Either before or after the frame changes
 # this function will then be called - ensuring all of the trajectories are up to date. We
@@ -33,28 +129,109 @@ def _selection_update_trajectories(self, context: bpy.types.Context) -> None:
 # the universe based on the current frame value
 @persistent
 def update_entities(scene):
-    "Call the `set_frame()` method of all entities in the current session"
+    """
+    Call the `set_frame()` method of all entities in the current session
+
+    Entities which support it are updated in two phases. The coordinates for all of
+    them are read and the new positions computed on a pool of threads, as reading
+    trajectories and the numpy maths largely release the GIL. The results are then
+    written to Blender serially on the main thread.
+    """
+    global _LAST_UPDATE_END, _LAST_UPDATE_DURATION
+    PROFILER.enabled = scene.mn.profile_updates
+
+    # during playback and scrubbing, keep within a time budget for each frame by
+    # dropping frames that queued up while updating took too long, and by leaving the
+    # selections and calculations for later. Renders always get full updates
+    deadline = None
+    if scene.mn.use_update_budget and _is_interactive():
+        budget = _frame_budget(scene)
+        start = time.perf_counter()
+        if _LAST_UPDATE_DURATION > budget and start - _LAST_UPDATE_END < budget:
+            _schedule_catch_up(scene)
+            return
+        deadline = start + budget
+
+    with stage("scene", "update"):
+        deferred = _update_entities_in_session(
+            scene, interactive=_is_playing(), deadline=deadline
+        )
+
+    if deadline is not None:
+        _LAST_UPDATE_END = time.perf_counter()
+        _LAST_UPDATE_DURATION = _LAST_UPDATE_END - start
+        if deferred:
+            _schedule_catch_up(scene)
+
+
+@persistent
+def update_entities_full(scene, *args):
+    """
+    Update all entities in full, including those which only update their proxy during
+    playback. Called before rendering and when playback stops.
+    """
+    PROFILER.enabled = scene.mn.profile_updates
+    with stage("scene", "update"):
+        _update_entities_in_session(scene, interactive=False)
+
+
+def _update_entities_in_session(
+    scene, interactive: bool = False, deadline: float | None = None
+) -> bool:
+    "Update the entities, returning whether any were only partially updated"
     session = scene.MNSession
     session.prune()
+
+    two_phase = []
     for entity in session.entities.values():
         # use the updated method if it exists but otherwise fallback on the old method
         # of updating the trajectories
-        
-        if hasattr(entity, "update_with_scene"):
-            if entity.update_with_scene:
-                frame_to_set = scene.frame_current
-            else:
-                frame_to_set = entity.frame
-            
+
+        if hasattr(entity, "begin_frame"):
+            # during playback entities with a proxy only update the proxy, showing it
+            # in place of the full object until playback stops
+            if getattr(entity, "proxy", None) is not None:
+                entity.show_proxy(interactive)
+            entity.begin_frame(_frame_to_set(scene, entity), proxy_only=interactive)
+            two_phase.append(entity)
+
+        elif hasattr(entity, "update_with_scene"):
             # do the entity setting, if the method isn't implemented, just pass
-            try:
-                entity.set_frame(frame_to_set)
-            except NotImplementedError:
-                pass
+            with stage(entity.uuid, "set_frame"):
+                try:
+                    entity.set_frame(_frame_to_set(scene, entity))
+                except NotImplementedError:
+                    pass
 
         else:
             # this is the old method of updating the trajectories and is maintained for
             # backwards compatibility # TODO: takeout for later release
-            entity._update_positions(scene.frame_current)
-            entity._update_selections()
-            entity._update_calculations()
+            with stage(entity.uuid, "set_frame"):
+                entity._update_positions(scene.frame_current)
+                entity._update_selections()
+                entity._update_calculations()
+
+    if not two_phase:
+        return False
+
+    # entities sharing a universe can't read from it at the same time, the universes
+    # are all alive here so their ids can't be shared by different ones
+    groups: dict[int, list] = {}
+    for entity in two_phase:
+        groups.setdefault(id(entity.universe), []).append(entity)
+
+    workers = _update_workers(scene, len(groups))
+    if workers == 1:
+        for group in groups.values():
+            _compute_entities(group)
+    else:
+        executor = _get_executor(workers)
+        futures = [executor.submit(_compute_entities, g) for g in groups.values()]
+        for future in futures:
+            future.result()
+
+    deferred = False
+    for entity in two_phase:
+        with stage(entity.uuid, "apply"):
+            deferred |= bool(entity.apply_frame(deadline=deadline))
+    return deferred
@@ -4,6 +4,7 @@ from bpy.props import BoolProperty, EnumProperty, IntProperty, StringProperty
 
 from ..blender import nodes
 import databpy
+from ..session import get_session
 from ..ui import node_info
 
 
@@ -24,6 +25,16 @@ def node_under_mouse(context, event):
     return node_under_mouse
 
 
+def _materialize_attributes(context: Context) -> None:
+    "Add any attributes the active object's nodes now read but weren't yet written"
+    obj = context.active_object
+    if obj is None:
+        return
+    entity = get_session(context).match(obj)
+    if entity is not None:
+        entity.materialize_attributes()
+
+
 def _add_node(node_name, context, show_options=False, material="default"):
     """
     Add a node group to the node tree and set the values.
@@ -46,6 +57,7 @@ def _add_node(node_name, context, show_options=False, material="default"):
 
     # if added node has a 'Material' input, set it to the default MN material
     nodes.assign_material(node, new_material=material)
+    _materialize_attributes(context)
 
 
 class MN_OT_Add_Custom_Node_Group(Operator):
@@ -234,6 +246,7 @@ class MN_OT_Node_Swap(Operator):
     def execute(self, context: Context):
         node = context.active_node
         nodes.swap(node, self.node_items)
+        _materialize_attributes(context)
         return {"FINISHED"}
 
 
@@ -252,6 +265,7 @@ class MN_OT_Change_Color(Operator):
     def execute(self, context: Context):
         node = context.active_node
         nodes.swap(node, self.color)
+        _materialize_attributes(context)
         self.report({"INFO"}, f"Selected {self.color}")
         return {"FINISHED"}
 
@@ -1,7 +1,7 @@
 import bpy
 from pathlib import Path
 from . import __package__, template
-from bpy.props import StringProperty, BoolProperty
+from bpy.props import StringProperty, BoolProperty, IntProperty
 
 CACHE_DIR = str(Path("~", "MolecularNodesCache").expanduser())
 
@@ -65,6 +65,34 @@ class MolecularNodesPreferences(bpy.types.AddonPreferences):
         default=True,
     )
 
+    cache_parse: BoolProperty(  # type: ignore
+        name="Cache Parsed Structures",
+        description=(
+            "Store parsed structures in the cache directory, so opening the same file "
+            "again skips parsing it"
+        ),
+        default=True,
+    )
+
+    cache_parse_size: IntProperty(  # type: ignore
+        name="Parse Cache Size (MB)",
+        description=(
+            "Size of the parsed structures to keep, over which the least recently "
+            "used are removed"
+        ),
+        default=2048,
+        min=0,
+    )
+
+    lazy_attributes: BoolProperty(  # type: ignore
+        name="Lazy Attributes",
+        description=(
+            "Only write the attributes that are read by the node tree when importing, "
+            "adding the others when nodes which need them are added"
+        ),
+        default=False,
+    )
+
     def draw(self, context):
         layout = self.layout
         layout.label(
@@ -86,6 +114,18 @@ class MolecularNodesPreferences(bpy.types.AddonPreferences):
 
         row.operator("mn.template_install", text=text)
         row.operator("mn.template_uninstall")
+        layout.label(
+            text="Keep parsed structures on disk for faster loading of the same files:"
+        )
+        row = layout.row()
+        row.prop(self, "cache_parse", text="")
+        col = row.column()
+        col.prop(self, "cache_parse_size")
+        col.enabled = self.cache_parse
+        layout.label(
+            text="Skip writing attributes the node tree doesn't use, for faster imports"
+        )
+        layout.prop(self, "lazy_attributes")
 
 
 CLASSES = [MN_OT_Template_Install, MN_OT_Template_Uninstall, MolecularNodesPreferences]
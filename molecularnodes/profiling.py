@@ -0,0 +1,200 @@
+"""
+Opt-in timing of the stages of updating entities when the frame changes.
+
+Timings are recorded per entity and per stage into a bounded ring buffer, from which
+rolling averages can be shown in the UI or the whole buffer exported as JSON or in the
+Chrome trace-event format (viewable in chrome://tracing or https://ui.perfetto.dev).
+When profiling is disabled, `stage()` returns a shared context manager which does
+nothing, so instrumented code pays only for a single attribute check.
+"""
+
+import json
+import threading
+import time
+from collections import deque
+from pathlib import Path
+from typing import Dict, List, NamedTuple, Tuple
+
+
+class StageRecord(NamedTuple):
+    entity: str
+    stage: str
+    start_ns: int
+    duration_ns: int
+    thread: int
+
+
+class _NullStage:
+    __slots__ = ()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *args) -> None:
+        return None
+
+
+_NULL_STAGE = _NullStage()
+
+
+class _Stage:
+    __slots__ = ("profiler", "entity", "stage", "start")
+
+    def __init__(self, profiler: "Profiler", entity: str, stage: str):
+        self.profiler = profiler
+        self.entity = entity
+        self.stage = stage
+
+    def __enter__(self):
+        self.start = time.perf_counter_ns()
+        return self
+
+    def __exit__(self, *args) -> None:
+        end = time.perf_counter_ns()
+        self.profiler._records.append(
+            StageRecord(
+                self.entity,
+                self.stage,
+                self.start,
+                end - self.start,
+                threading.get_ident(),
+            )
+        )
+
+
+class Profiler:
+    """
+    Records the wall time of named stages into a ring buffer.
+
+    Parameters
+    ----------
+    size : int, optional
+        Maximum number of records to keep, the oldest are discarded first. By default
+        10000.
+    """
+
+    def __init__(self, size: int = 10000):
+        self.enabled = False
+        # appending to and iterating over a copy of a deque is thread-safe, so stages
+        # can be recorded from the threads computing entity updates
+        self._records: deque[StageRecord] = deque(maxlen=size)
+
+    def stage(self, entity: str, stage: str):
+        "Context manager which records the time taken by the stage of an entity"
+        if not self.enabled:
+            return _NULL_STAGE
+        return _Stage(self, entity, stage)
+
+    @property
+    def records(self) -> List[StageRecord]:
+        return list(self._records)
+
+    def clear(self) -> None:
+        self._records.clear()
+
+    def averages(self, entity: str | None = None, n: int = 30) -> Dict[Tuple, float]:
+        """
+        Return the rolling average time in milliseconds of each stage.
+
+        Parameters
+        ----------
+        entity : str | None, optional
+            Only include stages for this entity, by default all entities.
+        n : int, optional
+            Number of the most recent records of each stage to average over, by
+            default 30.
+
+        Returns
+        -------
+        Dict[Tuple, float]
+            The average time of each (entity, stage), in the order they were recorded.
+        """
+        durations: Dict[Tuple, List[int]] = {}
+        for record in reversed(self.records):
+            if entity is not None and record.entity != entity:
+                continue
+            times = durations.setdefault((record.entity, record.stage), [])
+            if len(times) < n:
+                times.append(record.duration_ns)
+
+        return {
+            key: sum(times) / len(times) / 1e6
+            for key, times in reversed(list(durations.items()))
+        }
+
+    def to_dict(self, names: Dict[str, str] | None = None) -> dict:
+        "Return the records as a dictionary, with entities optionally renamed"
+        names = names or {}
+        return {
+            "records": [
+                {
+                    "entity": names.get(r.entity, r.entity),
+                    "stage": r.stage,
+                    "start_ms": r.start_ns / 1e6,
+                    "duration_ms": r.duration_ns / 1e6,
+                    "thread": r.thread,
+                }
+                for r in self.records
+            ],
+            "averages_ms": [
+                {"entity": names.get(entity, entity), "stage": stage, "average": t}
+                for (entity, stage), t in self.averages().items()
+            ],
+        }
+
+    def to_chrome_trace(self, names: Dict[str, str] | None = None) -> dict:
+        "Return the records in the Chrome trace-event format"
+        names = names or {}
+        return {
+            "traceEvents": [
+                {
+                    "name": r.stage,
+                    "cat": names.get(r.entity, r.entity),
+                    "ph": "X",
+                    "ts": r.start_ns / 1e3,
+                    "dur": r.duration_ns / 1e3,
+                    "pid": 0,
+                    "tid": r.thread,
+                    "args": {"entity": names.get(r.entity, r.entity)},
+                }
+                for r in self.records
+            ],
+            "displayTimeUnit": "ms",
+        }
+
+    def export(
+        self,
+        filepath: str | Path,
+        format: str = "json",
+        names: Dict[str, str] | None = None,
+    ) -> None:
+        """
+        Write the records to a file.
+
+        Parameters
+        ----------
+        filepath : str | Path
+            The file to write to.
+        format : str, optional
+            Either "json" for the records and averages, or "chrome" for the Chrome
+            trace-event format. By default "json".
+        names : Dict[str, str] | None, optional
+            Names to replace the entity identifiers with in the output.
+        """
+        if format == "json":
+            data = self.to_dict(names)
+        elif format == "chrome":
+            data = self.to_chrome_trace(names)
+        else:
+            raise ValueError(f"Unknown profile format: {format}")
+
+        with open(filepath, "w") as f:
+            json.dump(data, f, indent=1)
+
+
+PROFILER = Profiler()
+
+
+def stage(entity: str, stage: str):
+    "Time a stage of updating an entity with the global profiler"
+    return PROFILER.stage(entity, stage)
@@ -1,6 +1,12 @@
 import bpy
 from bpy.types import PropertyGroup
-from bpy.props import IntProperty, BoolProperty, EnumProperty, StringProperty
+from bpy.props import (
+    IntProperty,
+    BoolProperty,
+    EnumProperty,
+    FloatProperty,
+    StringProperty,
+)
 from .handlers import _update_entities
 from .style import STYLE_ITEMS
 from .session import get_session
@@ -66,6 +72,34 @@ class MolecularNodesSceneProperties(PropertyGroup):
         default=False,
     )
 
+    update_workers: IntProperty(  # type: ignore
+        name="Update Threads",
+        description="Number of threads used to read and compute trajectory frames when the frame changes. 0 uses up to one per trajectory, while 1 updates the trajectories one after another",
+        default=0,
+        min=0,
+        max=64,
+    )
+
+    use_update_budget: BoolProperty(  # type: ignore
+        name="Frame Budget",
+        description="During playback and scrubbing, drop frames that can't be updated in time and defer selections and calculations until the playhead rests. Rendering always updates every frame in full",
+        default=False,
+    )
+
+    update_budget: FloatProperty(  # type: ignore
+        name="Budget (ms)",
+        description="Time allowed for updating the trajectories each frame during playback. 0 uses the duration of a frame at the scene's frame rate",
+        default=0.0,
+        min=0.0,
+        soft_max=1000.0,
+    )
+
+    profile_updates: BoolProperty(  # type: ignore
+        name="Profile Updates",
+        description="Record how long each stage of updating the entities takes when the frame changes, shown in the trajectory panel and exportable for analysis",
+        default=False,
+    )
+
     import_centre: BoolProperty(  # type: ignore
         name="Centre Structure",
         description="Move the imported Molecule on the World Origin",
@@ -146,6 +180,30 @@ class MolecularNodesSceneProperties(PropertyGroup):
         default="NewTrajectory",
         maxlen=0,
     )
+    import_md_subset: StringProperty(  # type: ignore
+        name="Subset",
+        description="Only import the atoms matching this MDAnalysis selection, such as `not resname SOL`. Leave empty to import all atoms",
+        default="",
+        maxlen=0,
+    )
+    import_md_start: IntProperty(  # type: ignore
+        name="Start",
+        description="First frame of the trajectory to import",
+        default=0,
+        min=0,
+    )
+    import_md_stop: IntProperty(  # type: ignore
+        name="Stop",
+        description="Frame of the trajectory to stop importing before, 0 imports up to the last frame",
+        default=0,
+        min=0,
+    )
+    import_md_step: IntProperty(  # type: ignore
+        name="Step",
+        description="Import every nth frame of the trajectory",
+        default=1,
+        min=1,
+    )
     import_density_invert: BoolProperty(  # type: ignore
         name="Invert Data",
         description="Invert the values in the map. Low becomes high, high becomes low.",
@@ -299,9 +357,14 @@ class MolecularNodesObjectProperties(PropertyGroup):
         min=0,
         soft_max=5,
     )
+    prefetch: BoolProperty(  # type: ignore
+        name="Prefetch",
+        description="Read frames ahead of the playhead on a background thread during playback",
+        default=False,
+    )
     correct_periodic: BoolProperty(  # type: ignore
         name="Correct",
-        description="Correct for periodic boundary crossing when using interpolation or averaging. Assumes cubic dimensions and only works if the unit cell is orthorhombic",
+        description="Correct for periodic boundary crossing when using interpolation or averaging. Works with any unit cell, including triclinic cells, using the dimensions of each frame",
         default=False,
         update=_update_entities,
     )
@@ -317,6 +380,11 @@ class MolecularNodesObjectProperties(PropertyGroup):
         subtype="FILE_PATH",
         default="",
     )
+    subset: StringProperty(  # type: ignore
+        name="Subset",
+        description="Selection of the atoms that were imported from the trajectory, empty if all atoms were imported",
+        default="",
+    )
 
 
 class TrajectorySelectionItem(bpy.types.PropertyGroup):
@@ -23,6 +23,9 @@ def trim(dictionary: dict):
 
 def make_paths_relative(trajectories: Dict[str, Trajectory]) -> None:
     for key, traj in trajectories.items():
+        # frames held in memory are pickled along with the universe
+        if traj.in_memory:
+            continue
         # save linked universe frame
         uframe = traj.uframe
         traj.universe.load_new(make_path_relative(traj.universe.trajectory.filename))
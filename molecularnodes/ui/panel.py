@@ -3,6 +3,7 @@ import bpy
 from ..entities.trajectory import dna
 
 from ..blender import nodes
+from ..profiling import PROFILER
 from ..session import get_session
 from ..entities import density, ensemble, molecule, trajectory
 
@@ -122,11 +123,44 @@ def panel_md_properties(layout, context):
     col = row.column()
     col.enabled = obj.mn.update_with_scene
 
-    # only enable this as an option if the universe is orthothombic
+    # only enable this as an option if the universe has a unit cell, of any shape
     row = col.row()
     row.prop(obj.mn, "correct_periodic")
-    row.enabled = traj.is_orthorhombic
+    row.enabled = traj.is_periodic
     col.prop(obj.mn, "interpolate")
+    col.prop(obj.mn, "prefetch")
+
+    row = layout.row()
+    progress = traj.bake_progress
+    if progress is None:
+        row.label(text="Not baked")
+    elif progress < 1.0:
+        row.label(text=f"Baking: {progress:.0%}", icon="SORTTIME")
+    else:
+        row.label(text="Baked", icon="CHECKMARK")
+    row.operator("mn.bake_trajectory")
+    row.operator("mn.clear_trajectory_bake")
+
+    row = layout.row()
+    if traj.proxy is None:
+        row.label(text="No playback proxy")
+    else:
+        row.label(text=f"Proxy: {traj.proxy.n_points} points", icon="CHECKMARK")
+    row.operator("mn.create_trajectory_proxy")
+    row.operator("mn.remove_trajectory_proxy", text="", icon="X")
+
+    row = layout.row()
+    row.prop(context.scene.mn, "profile_updates")
+    row.operator("mn.export_update_profile")
+    if context.scene.mn.profile_updates:
+        averages = PROFILER.averages(entity=traj.uuid)
+        col = layout.column(align=True)
+        if not averages:
+            col.label(text="Change frame to record timings")
+        for (_, name), ms in averages.items():
+            row = col.row()
+            row.label(text=name.capitalize())
+            row.label(text=f"{ms:.2f} ms")
 
     layout.label(text="Selections", icon="RESTRICT_SELECT_OFF")
     row = layout.row()
@@ -211,6 +245,12 @@ def panel_session(layout, context):
     session = get_session(context)
     # if session.n_items > 0:
     #     return None
+    layout.prop(context.scene.mn, "update_workers")
+    row = layout.row()
+    row.prop(context.scene.mn, "use_update_budget")
+    col = row.column()
+    col.enabled = context.scene.mn.use_update_budget
+    col.prop(context.scene.mn, "update_budget")
     row = layout.row()
     row.label(text="Loaded items in the session")
     # row.operator("mn.session_reload")
@@ -5,7 +5,7 @@ import json
 
 from pathlib import Path
 from math import floor
-from mathutils import Matrix
+from typing import Callable, Tuple
 
 ADDON_DIR = Path(__file__).resolve().parent
 MN_DATA_FILE = os.path.join(ADDON_DIR, "assets", "MN_data_file_4.2.blend")
@@ -16,6 +16,76 @@ def add_current_module_to_path():
     sys.path.append(path)
 
 
+def factorize(values: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    Encode the values as integer codes, returning the sorted unique values and the
+    code for each item such that `uniques[codes]` recreates the input.
+
+    Equivalent to `np.unique(values, return_inverse=True)`, but short strings are first
+    packed into single integers which are much faster to sort than the strings.
+    """
+    values = np.asarray(values)
+    if values.dtype == object:
+        values = values.astype(str)
+
+    # up to 4 characters with codepoints below 2**16 can be packed into a uint64 while
+    # preserving the sort order of the strings
+    if values.dtype.kind == "U" and values.dtype.itemsize <= 16 and values.size > 0:
+        chars = values.reshape(-1).view(np.uint32).reshape(values.size, -1)
+        if chars.max() < 2**16:
+            key = np.zeros(values.size, dtype=np.uint64)
+            for column in chars.T:
+                key = (key << np.uint64(16)) | column.astype(np.uint64)
+            unique_keys, codes = np.unique(key, return_inverse=True)
+            codes = codes.reshape(-1)
+            # any occurrence of each unique key gives us back the original string
+            first = np.zeros(len(unique_keys), dtype=int)
+            first[codes] = np.arange(values.size)
+            return values.reshape(-1)[first], codes.reshape(values.shape)
+
+    uniques, codes = np.unique(values, return_inverse=True)
+    return uniques, codes.reshape(values.shape)
+
+
+def lookup(func: Callable, *arrays: np.ndarray, dtype=None) -> np.ndarray:
+    """
+    Map per-atom values through `func`, calling it only once per unique value.
+
+    The arrays are factorized, `func` is called once for each unique value (or each
+    unique combination of values when multiple arrays are given) and the results are
+    fanned back out to every item with fancy indexing.
+
+    Parameters
+    ----------
+    func : Callable
+        Function called with one value from each array, returning the mapped value.
+    *arrays : np.ndarray
+        Arrays of the same length to map through `func`.
+    dtype : optional
+        The dtype of the returned array, by default inferred from the mapped values.
+
+    Returns
+    -------
+    np.ndarray
+        The result of `func` for each item of the arrays.
+    """
+    factorized = [factorize(array) for array in arrays]
+    if len(factorized) == 1:
+        uniques, codes = factorized[0]
+        keys = zip(uniques)
+    else:
+        shape = tuple(len(uniques) for uniques, _ in factorized)
+        combined = np.ravel_multi_index([codes for _, codes in factorized], shape)
+        combined_unique, codes = np.unique(combined, return_inverse=True)
+        indices = np.unravel_index(combined_unique, shape)
+        keys = zip(*(uniques[i] for (uniques, _), i in zip(factorized, indices)))
+
+    values = np.array([func(*key) for key in keys], dtype=dtype)
+    if len(values) == 0:
+        return np.zeros(codes.shape, dtype=dtype or float)
+    return values[codes]
+
+
 def fraction(x, y):
     return x % y / y
 
@@ -33,48 +103,162 @@ def correct_periodic_1d(
 def correct_periodic_positions(
     positions_1: np.ndarray, positions_2: np.ndarray, dimensions: np.ndarray
 ) -> np.ndarray:
-    if not np.allclose(dimensions[3:], 90.0):
-        raise ValueError(
-            f"Only works with orthorhombic unitcells, and not dimensions={dimensions}"
-        )
-    final_positions = positions_2.copy()
-    for i in range(3):
-        final_positions[:, i] = correct_periodic_1d(
-            positions_1[:, i], positions_2[:, i], dimensions[i]
-        )
-    return final_positions
-
-
-def frame_mapper(
-    frame: int,
-    subframes: int = 0,
-    offset: int = 0,
-    mapping: np.ndarray | None = None,
-) -> int:
-    frame = max(frame - offset, 0)
-
-    if mapping is not None:
-        if not isinstance(mapping, np.ndarray):
-            raise ValueError(
-                "Frame mapping must be an array of values to map frames to"
-            )
-        # add the subframes to the frame mapping
-        frame_map = np.repeat(mapping, subframes + 1)
-        # get the current and next frames
-        frame_a = frame_map[frame]
-
-    frame_a = frame
-
-    if subframes > 0:
-        frame_a = int(frame / (subframes + 1))
-
-    return frame_a
-
-
-def frames_to_average(frame: int, average: int = 0, lower_bound: int = 0) -> np.ndarray:
+    "Return positions_2 moved to the periodic image closest to positions_1"
+    return minimum_image(positions_1, positions_2, dimensions)
+
+
+def box_vectors(dimensions: np.ndarray) -> np.ndarray:
+    """
+    Return the matrix of unit cell vectors from the cell dimensions.
+
+    Parameters
+    ----------
+    dimensions : np.ndarray
+        Either the lengths of an orthorhombic cell [a, b, c], the lengths and angles
+        [a, b, c, alpha, beta, gamma] in degrees, or an existing (3, 3) matrix.
+
+    Returns
+    -------
+    np.ndarray
+        A (3, 3) matrix with the cell vectors as rows, where the first vector lies
+        along x and the second in the xy plane.
+    """
+    dimensions = np.asarray(dimensions, dtype=np.float64)
+    if dimensions.shape == (3, 3):
+        return dimensions
+    if len(dimensions) == 3 or np.allclose(dimensions[3:6], 90.0):
+        return np.diag(dimensions[:3])
+
+    a, b, c = dimensions[:3]
+    cos_alpha, cos_beta, cos_gamma = np.cos(np.radians(dimensions[3:6]))
+    sin_gamma = np.sin(np.radians(dimensions[5]))
+    box = np.zeros((3, 3))
+    box[0, 0] = a
+    box[1, 0] = b * cos_gamma
+    box[1, 1] = b * sin_gamma
+    box[2, 0] = c * cos_beta
+    box[2, 1] = c * (cos_alpha - cos_beta * cos_gamma) / sin_gamma
+    box[2, 2] = np.sqrt(c**2 - box[2, 0] ** 2 - box[2, 1] ** 2)
+    return box
+
+
+def minimum_image(
+    reference: np.ndarray,
+    positions: np.ndarray,
+    dimensions: np.ndarray,
+    out: np.ndarray | None = None,
+) -> np.ndarray:
+    """
+    Return the periodic images of the positions that are closest to the reference.
+
+    The displacements from the reference are converted into fractional coordinates of
+    the unit cell, rounded to whole cell vectors and removed. This works for any
+    triclinic cell, including the dodecahedral and truncated octahedral cells used with
+    GROMACS. For strongly skewed cells a displacement approaching half a cell can end
+    up in a neighbouring image rather than the nearest, which doesn't arise between
+    consecutive frames of a trajectory.
+
+    Parameters
+    ----------
+    reference : np.ndarray
+        Positions to find the closest images to, shape (n, 3) or broadcastable.
+    positions : np.ndarray
+        Positions to move, shape (n, 3).
+    dimensions : np.ndarray
+        The unit cell, in any form accepted by `box_vectors()`.
+    out : np.ndarray | None, optional
+        Array to write the result to, which can be `positions` itself to correct them
+        in place. By default a new array is returned.
+
+    Returns
+    -------
+    np.ndarray
+        The corrected positions.
+    """
+    box = box_vectors(dimensions)
+    shift = np.subtract(positions, reference, dtype=np.float64)
+    if np.count_nonzero(box - np.diag(np.diagonal(box))) == 0:
+        lengths = np.diagonal(box)
+        shift /= lengths
+        np.round(shift, out=shift)
+        shift *= lengths
+    else:
+        shift = np.round(shift @ np.linalg.inv(box)) @ box
+    if out is None:
+        out = np.empty(np.shape(positions), dtype=np.result_type(positions, np.float32))
+    return np.subtract(positions, shift, out=out, casting="same_kind")
+
+
+def frame_lookup_table(
+    n_frames: int, subframes: int = 0, mapping: np.ndarray | None = None
+) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    Precompute the universe frames for every scene frame, before any offset.
+
+    Parameters
+    ----------
+    n_frames : int
+        Number of frames in the trajectory, used when there is no mapping.
+    subframes : int, optional
+        Number of scene frames inserted between each universe frame, by default 0.
+    mapping : np.ndarray | None, optional
+        The universe frame for each scene frame when there are no subframes, by
+        default each scene frame maps onto the universe frame with the same number.
+
+    Returns
+    -------
+    Tuple[np.ndarray, np.ndarray]
+        For each scene frame the universe frame, and the universe frame to interpolate
+        towards for subframes. The last universe frame interpolates towards itself.
+    """
+    if mapping is None:
+        mapping = np.arange(n_frames)
+    mapping = np.asarray(mapping, dtype=int)
+    following = np.append(mapping[1:], mapping[-1:])
+    return np.repeat(mapping, subframes + 1), np.repeat(following, subframes + 1)
+
+
+def frame_mapping_from_times(
+    times: np.ndarray, step: float | None = None
+) -> np.ndarray:
+    """
+    Map evenly spaced scene frames onto trajectory frames written at uneven times.
+
+    Parameters
+    ----------
+    times : np.ndarray
+        The time of each trajectory frame, in increasing order.
+    step : float | None, optional
+        The time between each scene frame, by default the smallest interval between
+        the trajectory frames.
+
+    Returns
+    -------
+    np.ndarray
+        For each scene frame, the last trajectory frame at or before its time.
+    """
+    times = np.asarray(times, dtype=float)
+    if step is None:
+        intervals = np.diff(times)
+        intervals = intervals[intervals > 0]
+        step = intervals.min() if len(intervals) > 0 else 1.0
+    if step <= 0:
+        raise ValueError(f"Time step must be positive, not {step}")
+
+    n_frames = int(np.floor((times[-1] - times[0]) / step + 1e-6)) + 1
+    targets = times[0] + np.arange(n_frames) * step
+    # allow for rounding errors in the stored times
+    return np.searchsorted(times, targets + step * 1e-6, side="right") - 1
+
+
+def frames_to_average(
+    frame: int, average: int = 0, lower_bound: int = 0, upper_bound: int | None = None
+) -> np.ndarray:
     length = average * 2 + 1
     frames = np.arange(length) + frame - average
     frames = frames[frames >= lower_bound]
+    if upper_bound is not None:
+        frames = frames[frames <= upper_bound]
     return frames
 
 
@@ -82,6 +266,10 @@ def frames_to_average(frame: int, average: int = 0, lower_bound: int = 0) -> np.
 
 
 def array_quaternions_from_dict(transforms_dict):
+    # imported here so the rest of the module can be used by the parsing workers, which
+    # run outside of Blender
+    from mathutils import Matrix
+
     n_transforms = 0
 
     if isinstance(transforms_dict, str):
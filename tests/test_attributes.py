@@ -28,3 +28,75 @@ def test_store_named_attribute(snapshot_custom):
     after = mol.named_attribute("position")
 
     assert not np.allclose(before, after)
+
+
+@pytest.mark.parametrize("workers", [1, 4])
+def test_attribute_pipeline(workers):
+    from molecularnodes.entities.attributes import Attribute, AttributePipeline
+
+    mol = mn.entities.fetch("8H1B", cache_dir=data_dir, style=None, format="bcif")
+    n = len(mol)
+
+    def fail():
+        raise ValueError("failed")
+
+    pipeline = AttributePipeline(
+        [
+            Attribute("base", lambda: np.arange(n), "INT", store=False),
+            Attribute("doubled", lambda base: base * 2, "INT", inputs=("base",)),
+            Attribute("failing", fail, "FLOAT"),
+            Attribute("dependent", lambda x: x, "FLOAT", inputs=("failing",)),
+        ],
+        workers=workers,
+    )
+    report = pipeline.run(mol)
+
+    assert np.array_equal(mol.named_attribute("doubled"), np.arange(n) * 2)
+    assert "base" not in mol.list_attributes()
+    assert set(report.errors) == {"failing", "dependent"}
+    assert "doubled" in report.write_time
+
+    with pytest.raises(ValueError):
+        AttributePipeline([Attribute("a", lambda b: b, inputs=("b",))])
+
+
+def _res_name_nums_per_atom(res_names, res_ids):
+    # the residue encoding resolved one atom at a time, as it was before vectorizing
+    ligands = []
+    res_nums = []
+    id_counter = -1
+    for i, name in enumerate(res_names):
+        res_num = mn.data.residues.get(name, {"res_name_num": -1}).get("res_name_num")
+        if res_num == 9999:
+            if res_names[i - 1] != name or res_ids[i] != res_ids[i - 1]:
+                id_counter += 1
+            unique_res_name = str(id_counter + 100) + "_" + str(name)
+            ligands.append(unique_res_name)
+            res_num = np.where(np.isin(np.unique(ligands), unique_res_name))[0][0] + 100
+        res_nums.append(res_num)
+    return np.array(res_nums), np.unique(ligands)
+
+
+@pytest.mark.parametrize("ligands", [[], ["SAM", "NA", "HOH"]])
+def test_res_name_ligands(monkeypatch, ligands):
+    from molecularnodes.entities.molecule.base import _res_name_nums
+
+    # none of the residues in the data are ligands, so some of those in 8H1B are
+    # marked as ligands to number them
+    for res_name in ligands:
+        monkeypatch.setitem(mn.data.residues, res_name, {"res_name_num": 9999})
+    array = mn.entities.parse(data_dir / "8H1B.pdb").array
+
+    res_nums, names = _res_name_nums(array.res_name, array.res_id)
+    expected_nums, expected_names = _res_name_nums_per_atom(
+        array.res_name, array.res_id
+    )
+    np.testing.assert_array_equal(res_nums, expected_nums)
+    np.testing.assert_array_equal(names, expected_names)
+    assert len(names) == len(np.unique(res_nums[res_nums >= 100]))
+    if ligands:
+        assert len(names) > len(ligands)
+
+    mol = mn.entities.load_local(data_dir / "8H1B.pdb", style=None)
+    np.testing.assert_array_equal(mol.named_attribute("res_name"), expected_nums)
+    assert list(mol.object["ligands"]) == list(expected_names)
@@ -112,6 +112,20 @@ class TestOXDNAReading:
         assert len(np.unique(traj.named_attribute("res_id"))) == 15166
         assert len(np.unique(traj.named_attribute("chain_id"))) == 178
 
+    def test_timestep_values_skipped(self, universe, monkeypatch):
+        traj = dna.OXDNA(universe)
+        traj.create_object()
+        traj.set_frame(2)
+        assert np.allclose(
+            traj.named_attribute("base_vector"), traj._timestep_value("base_vector")
+        )
+
+        # nothing is read or written again for the same frame
+        writes = []
+        monkeypatch.setattr(traj, "_update_timestep_values", writes.append)
+        traj.set_frame(2)
+        assert writes == []
+
     def test_session_register(self, file_holl_top, file_holl_dat):
         session = mn.session.get_session()
         u = mda.Universe(
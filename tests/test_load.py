@@ -142,6 +142,37 @@ def test_rcsb_nmr(snapshot_custom, del_hydrogen):
     assert (pos_1 != pos_2).all()
 
 
+def test_rcsb_nmr_as_trajectory():
+    mol = mn.entities.fetch(
+        "2M6Q", style="cartoon", cache_dir=data_dir, as_trajectory=True
+    )
+    traj = mol.trajectory
+    session = bpy.context.scene.MNSession
+
+    assert mol._frames_collection is None
+    assert traj.n_frames == 10
+    assert traj.in_memory
+    assert traj.uuid == mol.uuid
+    assert traj.object == mol.object
+    assert session.match(mol.object) is traj
+    assert len(traj.bonds) == len(mol.object.data.edges)
+
+    bpy.context.scene.frame_set(0)
+    pos_0 = mol.named_attribute("position")
+    bpy.context.scene.frame_set(3)
+    pos_3 = mol.named_attribute("position")
+    coords = traj.universe.trajectory.coordinate_array * 0.01
+    assert not np.allclose(pos_0, pos_3)
+    assert np.allclose(pos_3, coords[3], atol=1e-5)
+
+    # the interpolation between models comes from the trajectory
+    traj.subframes = 1
+    traj.interpolate = True
+    bpy.context.scene.frame_set(7)
+    expected = (coords[3] + coords[4]) / 2
+    assert np.allclose(mol.named_attribute("position"), expected, atol=1e-5)
+
+
 def test_load_small_mol(snapshot_custom):
     mol = mn.entities.load_local(data_dir / "ASN.cif")
     for att in ["position", "bond_type"]:
@@ -166,3 +197,90 @@ def test_rcsb_cache(snapshot_custom):
 
         mol2 = mn.entities.fetch("6BQN", style="cartoon", cache_dir=test_cache)
         assert np.allclose(mol1.position, mol2.position)
+
+
+def test_load_many():
+    paths = [data_dir / "1cd3.pdb", data_dir / "4ozs.bcif", data_dir / "caffeine.sdf"]
+    bad = [data_dir / "missing.cif", data_dir / "1f2n.mmtf"]
+    report = mn.entities.load_many(paths + bad, workers=2, style="spheres")
+
+    assert [result.path.name for result in report.results] == [
+        path.name for path in paths + bad
+    ]
+    assert len(report.molecules) == 3
+    assert set(report.errors) == set(bad)
+    for path, mol in zip(paths, report.molecules):
+        assert mol.object.name == path.stem
+        serial = mn.entities.load_local(path, style="spheres")
+        assert np.allclose(mol.position, serial.position)
+        # only the results of parsing are sent back from the workers, not the file
+        assert mol.file is None
+        assert mol.assemblies() == serial.assemblies()
+        assert getattr(mol, "entity_ids", None) == getattr(serial, "entity_ids", None)
+
+
+def test_parse_cache(tmp_path):
+    from molecularnodes.entities.molecule.cache import ParseCache
+
+    cache = ParseCache(tmp_path)
+    mol = mn.entities.parse(data_dir / "4ozs.bcif")
+    path = data_dir / "4ozs.bcif"
+
+    array = cache.cached(path, mol.get_structure, "BCIF", model=1)
+    assert len(cache.entries) == 1
+    # loaded from the cache rather than parsed again
+    cached = cache.cached(path, lambda **kwargs: None, "BCIF", model=1)
+    assert cached == array
+    assert cached.bonds == array.bonds
+
+    # different options are stored separately
+    cache.cached(path, mol.get_structure, "BCIF", model=1, bonds=False)
+    assert len(cache.entries) == 2
+
+    # the least recently used are removed when over the size limit
+    cache.load(cache.key(path, "BCIF", ("model", 1)))
+    cache.max_size = cache.entries[-1].stat().st_size
+    cache.evict()
+    assert cache.entries == [cache.path(cache.key(path, "BCIF", ("model", 1)))]
+
+    # only files on disk or in memory can be hashed without reading the stream
+    with open(path, "rb") as f:
+        with pytest.raises(TypeError):
+            cache.key(f, "BCIF")
+
+
+def test_parse_cache_templates(tmp_path, monkeypatch):
+    from functools import partial
+
+    from biotite.structure.io import pdb
+
+    from molecularnodes.entities.molecule import bonds, parsing
+    from molecularnodes.entities.molecule.cache import ParseCache
+
+    cache = ParseCache(tmp_path)
+    path = data_dir / "8U8W.pdb"
+    parse = partial(parsing.pdb_structure, pdb.PDBFile.read(path))
+
+    monkeypatch.setattr(bonds, "_LEARNED", {})
+    monkeypatch.setattr(bonds, "_TEMPLATES", {})
+    parsing.cached_structure(cache, path, parse, "PDB")
+    learned = bonds.learned_templates()
+    assert learned
+
+    # the templates learned from the file are learned again from the cached entry
+    monkeypatch.setattr(bonds, "_LEARNED", {})
+    monkeypatch.setattr(bonds, "_TEMPLATES", {})
+    parsing.cached_structure(cache, path, lambda: None, "PDB")
+    assert len(cache.entries) == 1
+    assert bonds.learned_templates().keys() == learned.keys()
+
+
+def test_load_many_parse_error(tmp_path):
+    broken = tmp_path / "broken.cif"
+    broken.write_text("data_broken\n_atom_site.id 1\nnot a structure\n")
+    paths = [data_dir / "1cd3.cif", broken, data_dir / "8H1B.pdb"]
+    report = mn.entities.load_many(paths, workers=2, style=None)
+
+    assert [result.ok for result in report.results] == [True, False, True]
+    assert list(report.errors) == [broken]
+    assert [mol.object.name for mol in report.molecules] == ["1cd3", "8H1B"]
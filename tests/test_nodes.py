@@ -304,3 +304,32 @@ def test_reuse_node_group():
 
     mol = mn.fetch("4ozs")
     assert n_nodes == len(tree.nodes)
+
+
+def test_lazy_attributes():
+    eager = mn.entities.parse(data_dir / "1cd3.cif")
+    eager.create_object(name="eager", style="spheres", lazy_attributes=False)
+    mol = mn.entities.parse(data_dir / "1cd3.cif")
+    mol.create_object(name="lazy", style="spheres", lazy_attributes=True)
+    required = mol.required_attributes()
+    attributes = mol.list_attributes()
+
+    # only the attributes the style reads are written
+    assert required is not None
+    assert "Color" in attributes
+    assert "lipophobicity" not in attributes
+    assert "lipophobicity" in eager.list_attributes()
+    for name in required & set(eager.list_attributes()):
+        assert name in attributes
+
+    # adding a node which reads a missing attribute adds it to the object
+    node = mol.node_group.nodes.new("GeometryNodeInputNamedAttribute")
+    node.inputs["Name"].default_value = "lipophobicity"
+    assert "lipophobicity" in mol.required_attributes()
+    report = mol.materialize_attributes()
+    assert report is not None and not report.errors
+    assert np.allclose(
+        mol.named_attribute("lipophobicity"), eager.named_attribute("lipophobicity")
+    )
+    assert mol.materialize_attributes() is None
+    assert eager.materialize_attributes() is None
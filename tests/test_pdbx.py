@@ -1,6 +1,8 @@
 import molecularnodes as mn
 
 import random
+import numpy as np
+import pytest
 from .constants import data_dir
 from .utils import NumpySnapshotExtension
 
@@ -8,7 +10,7 @@ from .utils import NumpySnapshotExtension
 def test_ss_label_to_int():
     examples = ["TURN_TY1_P68", "BEND64", "HELX_LH_PP_P9", "STRN44"]
     assert [3, 3, 1, 2] == [
-        mn.entities.molecule.pdbx._ss_label_to_int(x) for x in examples
+        mn.entities.molecule.parsing._ss_label_to_int(x) for x in examples
     ]
 
 
@@ -33,3 +35,70 @@ def test_get_ss_from_mmcif(snapshot_custom: NumpySnapshotExtension):
 def test_secondary_structure_no_helix(snapshot_custom):
     m = mn.entities.fetch("7ZL4", cache_dir=data_dir)
     assert snapshot_custom == m.named_attribute("sec_struct")
+
+
+@pytest.mark.parametrize("code", ["1BNA", "4ozs", "8H1B"])
+def test_connect_via_templates(code, monkeypatch):
+    from biotite.structure import connect_via_residue_names
+    from molecularnodes.entities.molecule import bonds as mn_bonds
+
+    # split chains between threads even for small structures
+    monkeypatch.setattr(mn_bonds, "PARALLEL_ATOMS", 0)
+
+    array = mn.entities.parse(data_dir / f"{code}.bcif").array
+    expected = connect_via_residue_names(array, inter_residue=True)
+    for workers in (1, 4):
+        bonds = mn_bonds.connect_via_templates(array, workers=workers)
+        assert np.array_equal(bonds.as_array(), expected.as_array())
+
+
+def test_secondary_structure_ranges():
+    # the ranges assigned all at once match masking every atom for each range in turn,
+    # including overlapping ranges and chains without any ranges
+    from molecularnodes.entities.molecule.intervals import assign_ranges
+
+    n_chains, n_res, n_ranges = 12, 200, 600
+    rng = np.random.default_rng(0)
+    chain_names = np.array([f"C{i}" for i in range(n_chains)])
+    chain_id = np.repeat(chain_names, n_res * 4)
+    res_id = np.tile(np.repeat(np.arange(-5, n_res - 5), 4), n_chains)
+    range_chain = rng.choice(chain_names[:-2], n_ranges)
+    range_start = rng.integers(-10, n_res, n_ranges)
+    range_end = range_start + rng.integers(0, 20, n_ranges)
+    range_value = rng.integers(1, 4, n_ranges)
+
+    values = assign_ranges(
+        chain_id, res_id, range_chain, range_start, range_end, range_value
+    )
+
+    expected = np.zeros(len(res_id), int)
+    for chain, first, last, value in zip(
+        range_chain, range_start, range_end, range_value
+    ):
+        expected[(chain_id == chain) & (res_id >= first) & (res_id <= last)] = value
+    np.testing.assert_array_equal(values, expected)
+
+
+@pytest.mark.parametrize("file", ["8H1B.bcif", "1cd3.cif", "8FAT.bcif"])
+def test_extra_annotation_report(file):
+    mol = mn.entities.parse(data_dir / file)
+    array = mol.set_extra_annotations(mol.array, mol.file)
+
+    report = mol.annotation_report
+    assert set(report.compute_time) == {"sec_struct", "entity_id"}
+    assert not report.errors
+
+    # the entity of each atom, looked up one atom at a time
+    strand_ids = mol.file.block["entity_poly"]["pdbx_strand_id"].as_array(str)
+    entity_lookup = {
+        chain: i for i, chains in enumerate(strand_ids) for chain in chains.split(",")
+    }
+    for res_name in np.unique(array.res_name[array.hetero]):
+        if res_name not in entity_lookup:
+            entity_lookup[res_name] = max(entity_lookup.values()) + 1
+    expected = [
+        entity_lookup.get(res_name, entity_lookup[chain])
+        for res_name, chain in zip(array.res_name, array.chain_id)
+    ]
+    np.testing.assert_array_equal(array.entity_id, expected)
+    assert len(np.unique(expected)) > 1
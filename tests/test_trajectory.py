@@ -9,6 +9,12 @@ import numpy as np
 from .constants import data_dir
 from .utils import NumpySnapshotExtension
 import itertools
+import json
+import time
+
+
+def z_position(universe):
+    return universe.atoms.positions[:, 2]
 
 
 class TestTrajectory:
@@ -67,6 +73,15 @@ class TestTrajectory:
         for att in attribute_added:
             assert att in attributes
 
+    def test_attributes_from_elements(self, universe):
+        traj = mn.entities.Trajectory(universe)
+        traj.create_object()
+        # the elements are only an input for the attributes computed from them
+        assert "elements" not in traj.list_attributes()
+        assert (traj.named_attribute("atomic_number") == traj.atomic_number).all()
+        assert np.allclose(traj.named_attribute("vdw_radii"), traj.vdw_radii)
+        assert np.allclose(traj.named_attribute("mass"), traj.mass)
+
     def test_trajectory_update(self, snapshot, universe):
         traj = mn.entities.Trajectory(universe)
         traj.create_object(name="TestTrajectoryUpdate")
@@ -143,6 +158,27 @@ class TestTrajectory:
                 # to the previous best selected frame
                 assert np.allclose(verts_a, verts_c)
 
+    def test_frame_mapping(self, universe):
+        traj = mn.entities.Trajectory(universe)
+        traj.create_object()
+        traj.reset_playback()
+        positions = [traj._position_at_frame(i) for i in range(5)]
+
+        traj.frame_mapping = np.array([4, 2, 0])
+        bpy.context.scene.frame_set(1)
+        assert np.allclose(traj.position, positions[2])
+
+        # scene frames past the end of the mapping hold on the last frame
+        bpy.context.scene.frame_set(10)
+        assert np.allclose(traj.position, positions[0])
+
+        with pytest.raises(ValueError):
+            traj.frame_mapping = np.array([0, 5])
+
+        traj.frame_mapping = None
+        bpy.context.scene.frame_set(10)
+        assert np.allclose(traj.position, positions[4])
+
     def test_correct_periodic(
         self,
         snapshot_custom: NumpySnapshotExtension,
@@ -165,6 +201,84 @@ class TestTrajectory:
         traj.create_object()
         assert not np.allclose(traj._position_at_frame(1), traj._position_at_frame(3))
 
+    def test_topology_cache(self, universe, universe_with_bonds):
+        traj = mn.entities.Trajectory(universe)
+        is_peptide = traj.is_peptide
+        # topology attributes are only computed once
+        assert traj.is_peptide is is_peptide
+        assert "is_peptide" not in traj.__getstate__()
+
+        # and recomputed when the universe is replaced
+        traj.universe = universe_with_bonds
+        assert traj.is_peptide is not is_peptide
+        assert len(traj.is_peptide) == universe_with_bonds.atoms.n_atoms
+
+    def test_prefetch(self, universe):
+        traj = mn.entities.Trajectory(universe)
+        traj.create_object()
+        expected = [traj._position_at_frame(i) for i in range(5)]
+
+        traj.prefetch = True
+        assert np.allclose(traj._position_at_frame(0), expected[0])
+        traj._prefetcher.wait()
+        # the frames ahead of the playhead should have been read in the background
+        for i in range(1, 5):
+            assert i in traj._prefetcher
+            assert np.allclose(traj._position_at_frame(i), expected[i])
+
+        traj.prefetch = False
+        traj._position_at_frame(0)
+        assert traj._prefetcher is None
+
+    def test_bake(self, universe, tmp_path):
+        traj = mn.entities.Trajectory(universe)
+        traj.create_object()
+        expected = [traj._position_at_frame(i) for i in range(5)]
+
+        bake = traj.bake(frames=[1, 3], directory=tmp_path)
+        assert traj.bake_progress == 1.0
+        assert np.allclose(traj._position_at_frame(3), expected[3])
+        assert np.allclose(traj._position_at_frame(1), expected[1])
+        assert bake.get(2) is None
+        assert np.allclose(traj._position_at_frame(2), expected[2])
+
+        # baking the same frames again reuses the existing files, without decoding the
+        # frames again, so values written into the file since are still there
+        traj.clear_bake()
+        stored = np.load(bake.path, mmap_mode="r+")
+        stored[bake.index(3)] = -1.0
+        stored.flush()
+        del stored
+        stat = bake.path.stat()
+        bake = traj.bake(frames=[1, 3], directory=tmp_path, background=True)
+        bake.wait()
+        assert bake.is_complete
+        assert np.all(bake.get(3) == -1.0)
+        assert bake.path.stat().st_ino == stat.st_ino
+        assert bake.path.stat().st_mtime_ns == stat.st_mtime_ns
+
+        traj.clear_bake(delete=True)
+        assert traj.bake_progress is None
+        assert not bake.path.exists()
+
+    def test_bake_done_after_flush(self, universe, tmp_path, monkeypatch):
+        from molecularnodes.entities.trajectory.bake import PositionBake
+
+        bake = PositionBake(universe.trajectory, frames=range(5), directory=tmp_path)
+        marked = []
+        flush = bake.flush
+
+        def record(done=None):
+            # frames are only marked as done by the flush that writes their positions
+            marked.append(int(np.count_nonzero(bake._done)))
+            flush(done)
+
+        monkeypatch.setattr(bake, "flush", record)
+        bake.bake(flush_every=2)
+        assert marked == [0, 2, 4]
+        assert bake.is_complete
+        bake.delete()
+
     @pytest.mark.parametrize(
         "correct,subframes,interpolate",
         itertools.product([True, False], [0, 1, 2, 3], [True, False]),
@@ -184,6 +298,21 @@ class TestTrajectory:
         assert snapshot == traj.position_cache_mean(1)
         assert snapshot == traj.cache
 
+    def test_sliding_window_mean(self, universe):
+        traj = mn.entities.Trajectory(universe)
+        traj.create_object()
+        traj.average = 1
+        positions = [
+            traj._position_at_frame(i) for i in range(universe.trajectory.n_frames)
+        ]
+
+        # moving forwards, backwards and jumping around should all match the mean over
+        # the frames currently in the window
+        for frame in [1, 2, 3, 2, 1, 0, 3]:
+            frames = mn.utils.frames_to_average(frame, 1)
+            expected = np.mean([positions[f] for f in frames], axis=0)
+            assert np.allclose(traj.position_cache_mean(frame), expected, atol=1e-6)
+
     def test_update_selection(self, snapshot_custom, universe):
         # to API add selections we currently have to operate on the UIList rather than the
         # universe itself, which isn't great
@@ -212,6 +341,369 @@ class TestTrajectory:
         sel.updating = False
         assert not (sel_2 != traj.named_attribute("custom_sel_1")).all()
 
+    def test_static_selection(self, universe):
+        traj = mn.entities.Trajectory(universe)
+        traj.create_object()
+        bpy.context.scene.frame_set(0)
+        sel = traj.add_selection(name="protein_sel", selection_str="protein")
+        assert sel.is_static
+        assert not traj.add_selection(
+            name="around_sel", selection_str="around 3.5 protein"
+        ).is_static
+
+        expected = np.isin(universe.atoms.ix, universe.select_atoms("protein").ix)
+        assert (sel.to_mask() == expected).all()
+        bpy.context.scene.frame_set(3)
+        assert (traj.named_attribute("protein_sel") == expected).all()
+
+        # once marked dirty, the static selection is written again
+        traj.set_boolean(np.zeros(traj.n_atoms, dtype=bool), name="protein_sel")
+        traj.mark_dirty()
+        traj.set_frame(3)
+        assert (traj.named_attribute("protein_sel") == expected).all()
+
+    def test_selection_masks_independent(self, universe):
+        traj = mn.entities.Trajectory(universe)
+        traj.create_object()
+        sel = traj.add_selection(name="near", selection_str="around 3.5 protein")
+        traj.set_frame(0)
+        mask_0 = sel.to_mask()
+        before = mask_0.copy()
+        traj.set_frame(4)
+        mask_4 = sel.to_mask()
+        # masks from earlier frames aren't overwritten by later ones
+        assert not np.shares_memory(mask_0, mask_4)
+        np.testing.assert_array_equal(mask_0, before)
+
+    def test_selection_mask_reused(self, universe, monkeypatch):
+        traj = mn.entities.Trajectory(universe)
+        traj.create_object()
+        sel = traj.add_selection(name="near", selection_str="around 3.5 protein")
+        traj.set_frame(0)
+        mask = sel.to_mask()
+        # the mask is only built again when the selected atoms change
+        assert sel.to_mask() is mask
+
+        writes = []
+        monkeypatch.setattr(traj, "set_boolean", lambda *args, **kwargs: writes.append(1))
+        sel.set_selection()
+        assert writes == []
+        traj.mark_dirty()
+        sel.set_selection()
+        assert writes == [1]
+
+    def test_set_frame_skips_unchanged(self, universe):
+        traj = mn.entities.Trajectory(universe)
+        traj.create_object()
+        traj.subframes = 2
+        traj.interpolate = False
+        bpy.context.scene.frame_set(0)
+
+        calls = []
+
+        def record_frame(u):
+            calls.append(u.trajectory.frame)
+            return np.zeros(u.atoms.n_atoms)
+
+        traj.calculations["record_frame"] = record_frame
+        traj.set_frame(3)
+        assert calls == [1]
+
+        # scene frames 3-5 all map onto universe frame 1, so nothing is recalculated
+        traj.set_frame(4)
+        traj.set_frame(5)
+        assert calls == [1]
+
+        traj.set_frame(6)
+        assert calls == [1, 2]
+
+        traj.mark_dirty()
+        traj.set_frame(6)
+        assert calls == [1, 2, 2]
+
+    @pytest.mark.parametrize("average", [0, 1])
+    def test_set_frame_updates_positions(self, universe, average):
+        traj = mn.entities.Trajectory(universe)
+        traj.create_object()
+        traj.interpolate = False
+        traj.average = average
+
+        traj.set_frame(0)
+        pos_0 = traj.position
+        traj.set_frame(3)
+        assert traj._frame == 3
+        assert not np.allclose(pos_0, traj.position)
+        assert np.allclose(traj.position, traj.position_cache_mean(3))
+
+    def test_precompute(self, universe, tmp_path):
+        traj = mn.entities.Trajectory(universe)
+        traj.create_object()
+        traj.calculations["z_position"] = z_position
+        precomputed = traj.precompute(
+            "z_position", workers=2, background=False, directory=tmp_path
+        )
+        assert traj.precompute_progress("z_position") == 1.0
+
+        universe.trajectory[3]
+        expected = z_position(universe)
+        assert np.allclose(precomputed.get(3), expected)
+        bpy.context.scene.frame_set(3)
+        assert np.allclose(traj.named_attribute("z_position"), expected)
+
+        traj.clear_precomputed(delete=True)
+        assert traj.precompute_progress("z_position") is None
+        assert not precomputed.path.exists()
+
+    def test_in_memory_keeps_frames(self):
+        universe = mda.Universe(
+            data_dir / "md_ppr/box.gro", data_dir / "md_ppr/first_5_frames.xtc"
+        )
+        # the frames in memory still have the filename they were read from
+        universe.transfer_to_memory()
+        universe.atoms.positions += 1.0
+        edited = universe.atoms.positions.copy()
+        traj = mn.entities.Trajectory(universe)
+        traj.create_object()
+        assert traj.in_memory
+
+        # the frames aren't reloaded from the file when saving the session
+        mn.session.make_paths_relative({traj.uuid: traj})
+        assert traj.in_memory
+        assert np.allclose(traj.universe.atoms.positions, edited)
+
+    def test_precompute_in_memory(self, tmp_path):
+        universe = mda.Universe(
+            data_dir / "md_ppr/box.gro", data_dir / "md_ppr/first_5_frames.xtc"
+        )
+        # results for the file aren't reused for the edited frames in memory
+        from_file = mn.entities.Trajectory(universe)
+        from_file.calculations["z_position"] = z_position
+        from_file.precompute(
+            "z_position", workers=2, background=False, directory=tmp_path
+        )
+        from_file.clear_precomputed()
+        universe.transfer_to_memory()
+        # only in memory, so reopening the files would give different positions
+        universe.trajectory[3]
+        universe.atoms.translate([0, 0, 10])
+        expected = z_position(universe)
+
+        traj = mn.entities.Trajectory(universe)
+        traj.calculations["z_position"] = z_position
+        precomputed = traj.precompute(
+            "z_position", workers=2, background=False, directory=tmp_path
+        )
+        assert np.allclose(precomputed.get(3), expected)
+
+        # nor are results of a function which has since changed, even with the same
+        # name and module
+        for offset in (0, 1):
+            traj.calculations["z_offset"] = lambda u: u.atoms.positions[:, 2] + offset
+            precomputed = traj.precompute(
+                "z_offset", workers=1, background=False, directory=tmp_path
+            )
+            assert np.allclose(precomputed.get(3), expected + offset)
+        traj.clear_precomputed(delete=True)
+
+    @pytest.mark.parametrize("workers", [0, 1, 2])
+    def test_update_workers(self, workers):
+        top = data_dir / "md_ppr/box.gro"
+        traj = data_dir / "md_ppr/first_5_frames.xtc"
+        trajectories = [
+            mn.entities.Trajectory(mda.Universe(top, traj)) for _ in range(3)
+        ]
+        for t in trajectories:
+            t.create_object()
+            t.subframes = 1
+            t.interpolate = True
+        expected = [
+            databpy.lerp(t._position_at_frame(1), t._position_at_frame(2), 0.5)
+            for t in trajectories
+        ]
+
+        bpy.context.scene.mn.update_workers = workers
+        bpy.context.scene.frame_set(3)
+        for t, pos in zip(trajectories, expected):
+            assert np.allclose(t.position, pos)
+        bpy.context.scene.mn.update_workers = 0
+
+    def test_subset(self, universe_with_bonds):
+        universe = universe_with_bonds
+        traj = mn.entities.Trajectory(universe, subset="protein")
+        traj.create_object()
+        protein = universe.select_atoms("protein")
+        assert len(traj.position) == protein.n_atoms
+        assert traj.object.mn.subset == "protein"
+        np.testing.assert_array_equal(traj.subset_indices, protein.ix)
+
+        # bonds are only kept between imported atoms, and index the vertices
+        bonds = traj.bonds
+        assert bonds.max() < protein.n_atoms
+        assert len(bonds) == len(protein.intra_bonds)
+
+        # selections can reference atoms that weren't imported
+        traj.add_selection(name="near_water", selection_str="around 5 resname SOL")
+        expected = np.isin(protein.ix, universe.select_atoms("around 5 resname SOL").ix)
+        np.testing.assert_array_equal(traj.named_attribute("near_water"), expected)
+
+        traj.calculations = {"index": lambda u: u.atoms.ix}
+        traj.set_frame(1)
+        np.testing.assert_array_equal(traj.named_attribute("index"), protein.ix)
+        assert np.allclose(traj.position, protein.positions * traj.world_scale)
+
+    def test_subset_no_atoms(self, universe):
+        with pytest.raises(ValueError):
+            mn.entities.Trajectory(universe, subset="resname NOTHING")
+
+    def test_frame_window(self, universe):
+        traj = mn.entities.Trajectory(universe, start=1, stop=5, step=2)
+        traj.create_object()
+        assert traj.frames == range(1, 5, 2)
+        assert traj.n_frames == 2
+
+        for frame, uframe in enumerate(traj.frames):
+            traj.set_frame(frame)
+            universe.trajectory[uframe]
+            assert np.allclose(
+                traj.position, universe.atoms.positions * traj.world_scale
+            )
+
+        # frames past the end of the window show the last frame of the window
+        traj.set_frame(10)
+        assert traj._frame == 1
+        assert traj._universe_frames(None).tolist() == [1, 3]
+
+    def test_frame_window_empty(self, universe):
+        with pytest.raises(ValueError):
+            mn.entities.Trajectory(universe, start=10)
+
+    def test_proxy(self, universe):
+        traj = mn.entities.Trajectory(universe)
+        traj.create_object()
+        traj.add_selection(name="protein", selection_str="protein")
+        proxy = traj.create_proxy(mode="residue")
+        assert proxy.n_points == universe.atoms.n_residues
+
+        traj.set_frame(0)
+        full_positions = np.array(traj.position)
+
+        # during playback only the proxy is updated, with residue centroids
+        traj.begin_frame(2, proxy_only=True)
+        traj.compute_frame()
+        traj.apply_frame()
+        assert np.allclose(traj.position, full_positions)
+        universe.trajectory[2]
+        centroids = np.array(
+            [res.atoms.positions.mean(axis=0) for res in universe.residues]
+        )
+        assert np.allclose(proxy.position, centroids * traj.world_scale, atol=1e-4)
+        np.testing.assert_array_equal(
+            proxy.named_attribute("protein"),
+            [
+                res.atoms.select_atoms("protein").n_atoms > 0
+                for res in universe.residues
+            ],
+        )
+
+        # the full object catches up on the next full update of the same frame
+        traj.set_frame(2)
+        assert np.allclose(traj.position, universe.atoms.positions * traj.world_scale)
+
+        traj.remove_proxy()
+        assert traj.proxy is None
+        assert not traj.object.hide_viewport
+
+    def test_apply_frame_deadline(self, universe):
+        traj = mn.entities.Trajectory(universe)
+        traj.create_object()
+        traj.add_selection(name="near", selection_str="around 5 resname A")
+        traj.set_frame(0)
+        before = traj.named_attribute("near")
+
+        # once the deadline has passed, the positions are still written but the
+        # selections are left for the next update
+        traj.begin_frame(3)
+        traj.compute_frame()
+        assert traj.apply_frame(deadline=time.perf_counter() - 1)
+        universe.trajectory[3]
+        assert np.allclose(traj.position, universe.atoms.positions * traj.world_scale)
+        np.testing.assert_array_equal(traj.named_attribute("near"), before)
+
+        traj.set_frame(3)
+        expected = traj.bool_selection(universe.atoms, "around 5 resname A")
+        np.testing.assert_array_equal(traj.named_attribute("near"), expected)
+
+    def test_replace_universe(self, universe):
+        traj = mn.entities.Trajectory(universe)
+        traj.create_object()
+        traj.calculations["z_position"] = z_position
+        traj.set_frame(2)
+
+        # the same frame of a different universe is written again
+        replacement = mda.Universe(
+            data_dir / "md_ppr/box.gro", data_dir / "md_ppr/first_5_frames.xtc"
+        )
+        replacement.transfer_to_memory()
+        replacement.trajectory[2]
+        replacement.atoms.translate([0, 0, 10])
+        traj.universe = replacement
+        traj.set_frame(2)
+        assert np.allclose(
+            traj.position, replacement.atoms.positions * traj.world_scale
+        )
+        assert np.allclose(
+            traj.named_attribute("z_position"), z_position(replacement)
+        )
+
+        # as is a calculation registered again under the same name
+        traj.calculations["z_position"] = lambda u: np.zeros(u.atoms.n_atoms)
+        traj.set_frame(2)
+        assert np.allclose(traj.named_attribute("z_position"), 0)
+
+    def test_failed_update_retried(self, universe, monkeypatch):
+        traj = mn.entities.Trajectory(universe)
+        traj.create_object()
+        traj.set_frame(0)
+        before = np.array(traj.position)
+
+        def fail(frame):
+            raise RuntimeError("unable to read the frame")
+
+        # nothing was written, so the same frame is updated again on the next call
+        monkeypatch.setattr(traj, "_compute_positions", fail)
+        with pytest.raises(RuntimeError):
+            traj.set_frame(3)
+        assert np.allclose(traj.position, before)
+
+        monkeypatch.undo()
+        traj.set_frame(3)
+        universe.trajectory[3]
+        assert np.allclose(traj.position, universe.atoms.positions * traj.world_scale)
+
+    def test_profile_updates(self, universe, tmp_path):
+        traj = mn.entities.Trajectory(universe)
+        traj.create_object()
+        profiler = mn.profiling.PROFILER
+        profiler.clear()
+
+        bpy.context.scene.mn.profile_updates = False
+        bpy.context.scene.frame_set(1)
+        assert len(profiler.records) == 0
+
+        bpy.context.scene.mn.profile_updates = True
+        bpy.context.scene.frame_set(2)
+        stages = {stage for _, stage in profiler.averages(entity=traj.uuid)}
+        assert {"begin", "compute", "read", "write", "apply"} <= stages
+
+        profiler.export(tmp_path / "profile.json", format="chrome")
+        with open(tmp_path / "profile.json") as f:
+            events = json.load(f)["traceEvents"]
+        assert all(event["ph"] == "X" for event in events)
+        assert any(event["cat"] == traj.uuid for event in events)
+
+        bpy.context.scene.mn.profile_updates = False
+        profiler.clear()
+
     def test_save_persistance(
         self,
         snapshot_custom: NumpySnapshotExtension,
@@ -261,3 +753,61 @@ def test_martini(snapshot_custom: NumpySnapshotExtension, toplogy):
 
     for att in obj.data.attributes.keys():
         assert snapshot_custom == traj.named_attribute(att)
+
+
+@pytest.mark.parametrize(
+    "files",
+    [
+        ["md_ppr/md.gro"],
+        ["martini/pent/TOPOL2.pdb"],
+    ],
+)
+def test_static_attributes(files):
+    # the attributes looked up once per unique value match resolving every atom
+    universe = mda.Universe(*[data_dir / file for file in files])
+    traj = mn.entities.Trajectory(universe)
+    elements = traj.elements
+    if not hasattr(universe.atoms, "elements"):
+        expected = [
+            x
+            if x in mn.data.elements.keys()
+            else mda.topology.guessers.guess_atom_element(x)
+            for x in universe.atoms.names
+        ]
+        np.testing.assert_array_equal(elements, expected)
+
+    np.testing.assert_array_equal(
+        traj.atomic_number,
+        [
+            mn.data.elements.get(x, mn.data.elements.get("X")).get("atomic_number")
+            for x in elements
+        ],
+    )
+    assert np.allclose(
+        traj.vdw_radii,
+        np.array([mn.data.elements.get(x, {}).get("vdw_radii", 100) for x in elements])
+        * 0.01
+        * traj.world_scale,
+    )
+    if hasattr(universe.atoms, "masses"):
+        expected_mass = [atom.mass for atom in universe.atoms]
+    else:
+        expected_mass = [
+            mn.data.elements.get(x, {"standard_mass": 0}).get("standard_mass")
+            for x in elements
+        ]
+    assert np.allclose(traj.mass, expected_mass)
+    np.testing.assert_array_equal(
+        traj.res_name, [x[0:3] for x in universe.atoms.resnames]
+    )
+    np.testing.assert_array_equal(
+        traj.res_num,
+        [
+            mn.data.residues.get(x, mn.data.residues.get("UNK")).get("res_name_num")
+            for x in traj.res_name
+        ],
+    )
+    np.testing.assert_array_equal(
+        traj.atom_name_num,
+        [mn.data.atom_names.get(x, -1) for x in traj.atom_name],
+    )
@@ -1,5 +1,6 @@
 import molecularnodes as mn
 import numpy as np
+import pytest
 
 
 def test_correct_1d():
@@ -7,3 +8,88 @@ def test_correct_1d():
         mn.utils.correct_periodic_1d(np.array((0.9, 0.1)), np.array((0.1, 0.9)), 1.0),
         np.array((1.1, -0.1)),
     )
+
+
+@pytest.mark.parametrize(
+    "values",
+    [
+        np.array(["CA", "N", "CA", "LONGNAME", "O", "N"], dtype=object),
+        # up to 4 characters are packed into integers, including prefixes of others
+        np.array(["CA", "C", "N", "CA", "", "OW", "HW1", "C", "ÅB"]),
+        np.array(["CA", "N", "CA", "O"], dtype=object),
+    ],
+)
+def test_factorize(values):
+    uniques, codes = mn.utils.factorize(values)
+    expected_uniques, expected_codes = np.unique(
+        values.astype(str), return_inverse=True
+    )
+    assert (uniques == expected_uniques).all()
+    assert (codes == expected_codes).all()
+    assert (uniques[codes] == values.astype(str)).all()
+
+
+def test_lookup():
+    table = {"C": 6, "N": 7, "O": 8}
+    values = np.array(["C", "N", "X", "C", "O"])
+    assert (
+        mn.utils.lookup(lambda x: table.get(x, -1), values) == [6, 7, -1, 6, 8]
+    ).all()
+
+    # multiple arrays are looked up as unique combinations
+    res_ids = np.array([1, 1, 2, 2, 1])
+    assert (
+        mn.utils.lookup(lambda x, y: f"{x}{y}", values, res_ids)
+        == ["C1", "N1", "X2", "C2", "O1"]
+    ).all()
+
+
+def test_minimum_image():
+    box = np.array([10.0, 10.0, 10.0])
+    reference = np.array([[1.0, 1.0, 1.0], [9.0, 5.0, 5.0]])
+    positions = np.array([[9.0, 1.0, 21.5], [1.0, 5.0, 5.0]])
+    assert np.allclose(
+        mn.utils.minimum_image(reference, positions, box),
+        [[-1.0, 1.0, 1.5], [11.0, 5.0, 5.0]],
+    )
+
+
+def test_minimum_image_triclinic():
+    # rhombic dodecahedron, as commonly used with GROMACS
+    dimensions = np.array([70.0, 70.0, 70.0, 60.0, 60.0, 90.0])
+    box = mn.utils.box_vectors(dimensions)
+    assert np.allclose(np.linalg.norm(box, axis=1), 70.0)
+
+    rng = np.random.default_rng(0)
+    reference = rng.random((100, 3)) * 50
+    displacement = rng.normal(0, 2, (100, 3))
+    images = rng.integers(-2, 3, (100, 3)) @ box
+    positions = reference + displacement + images
+
+    assert np.allclose(
+        mn.utils.minimum_image(reference, positions, dimensions),
+        reference + displacement,
+    )
+
+    # correcting in place
+    out = positions.copy()
+    assert mn.utils.minimum_image(reference, out, dimensions, out=out) is out
+    assert np.allclose(out, reference + displacement)
+
+
+def test_frame_lookup_table():
+    lut, lut_next = mn.utils.frame_lookup_table(3, subframes=1)
+    assert (lut == [0, 0, 1, 1, 2, 2]).all()
+    assert (lut_next == [1, 1, 2, 2, 2, 2]).all()
+
+    lut, lut_next = mn.utils.frame_lookup_table(10, mapping=np.array([0, 5, 9]))
+    assert (lut == [0, 5, 9]).all()
+    assert (lut_next == [5, 9, 9]).all()
+
+
+def test_frame_mapping_from_times():
+    # frames written every 1 ps, then every 2 ps
+    times = np.array([0.0, 1.0, 2.0, 4.0, 6.0])
+    mapping = mn.utils.frame_mapping_from_times(times)
+    assert (mapping == [0, 1, 2, 2, 3, 3, 4]).all()
+    assert (mn.utils.frame_mapping_from_times(times, step=2.0) == [0, 2, 3, 4]).all()